@@ -0,0 +1,73 @@
+import os
+import wave
+
+import numpy as np
+from pydub import AudioSegment
+
+# Export settings of each fixture format. WAV is written directly, the others are encoded with ffmpeg.
+FIXTURE_FORMATS = {
+    'wav': None,
+    'mp3': {'format': "mp3", 'bitrate': "64k"},
+    'ogg': {'format': "ogg", 'codec': "libopus", 'bitrate': "32k"},
+    'm4a': {'format': "ipod", 'codec': "aac", 'bitrate': "64k"},
+}
+
+def synthesize_speech(duration_s:float, sample_rate:int = 16000, seed:int = 0) -> np.ndarray:
+    """
+    Returns speech-like mono audio as int16 samples: voiced bursts of 0.5 to 4 seconds with a wandering
+    pitch and harmonics, separated by quiet pauses of 0.2 to 1.5 seconds. The pauses give the silence
+    detection of split_audio() realistic cut points.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(duration_s * sample_rate)
+    samples = rng.normal(0, 0.002, n_samples)
+
+    position = 0
+    while position < n_samples:
+        burst = min(int(rng.uniform(0.5, 4.0) * sample_rate), n_samples - position)
+        t = np.arange(burst) / sample_rate
+        pitch = rng.uniform(110, 240) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(0.5, 3.0) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+        envelope = np.abs(np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        samples[position:position + burst] += 0.3 * voice * envelope
+        position += burst + int(rng.uniform(0.2, 1.5) * sample_rate)
+
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+def make_fixture(path:str, duration_s:float, sample_rate:int = 16000, seed:int = 0) -> str:
+    """
+    Writes a speech-like fixture of the given duration to path, in the format given by its extension.
+    Existing fixtures are reused.
+    """
+    if os.path.isfile(path):
+        return path
+
+    samples = synthesize_speech(duration_s, sample_rate=sample_rate, seed=seed)
+    extension = os.path.splitext(path)[1].lstrip('.')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    if FIXTURE_FORMATS[extension] is None:
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(samples.tobytes())
+    else:
+        segment = AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+        segment.export(path, **FIXTURE_FORMATS[extension])
+
+    return path
+
+def make_fixtures(fixture_dir:str, durations_s:list, formats:list) -> list:
+    """
+    Writes one fixture per duration and format to fixture_dir, named "speech_<duration>s.<format>".
+
+    Returns:
+    --------
+    list
+        The paths to the fixtures.
+    """
+    return [make_fixture(os.path.join(fixture_dir, f"speech_{duration_s:g}s.{extension}"), duration_s, seed=i)
+            for i, duration_s in enumerate(durations_s)
+            for extension in formats]
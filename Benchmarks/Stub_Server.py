@@ -0,0 +1,211 @@
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class Stub_OpenAI_Server:
+    """
+    A local stand-in for the OpenAI transcription and chat-completion endpoints, so the pipeline can be
+    benchmarked without network access or API costs. Point the shared clients at it with
+    configure_client(base_url=server.base_url).
+
+    Responses are synthetic: transcripts have a number of words proportional to the uploaded bytes, with
+    segments of ten words when verbose_json is requested, and chat completions return five bullet points with the configured token usage. Latency and errors
+    are injected per request.
+
+    -----------
+    Parameters:
+    -----------
+
+    - latency_s (float): The base latency of every request. Defaults to 0.1.
+    - latency_jitter_s (float): A random extra latency of up to this many seconds. Defaults to 0.05.
+    - upload_s_per_mb (float): The extra transcription latency per MB uploaded. Defaults to 0.5.
+    - error_rate (float): The share of requests answered with a 429 or 500 error. Defaults to 0.0.
+    - retry_after_s (float): The Retry-After header sent with injected errors. Defaults to 0.05.
+    - bytes_per_word (int): The uploaded bytes per transcript word. Defaults to 1000.
+    - completion_tokens (int): The completion tokens reported by every chat completion. Defaults to 150.
+    - token_latency_s (float): The delay between streamed completion chunks. Defaults to 0.01.
+    - seed (int): The seed of the latency and error injection. Defaults to 0.
+
+    --------
+    Methods:
+    --------
+
+    - start(): Starts serving on a free local port in a background thread.
+    - stop(): Stops the server.
+    - stats(): Returns the request and injected error counters per endpoint.
+
+    -----------
+    Attributes:
+    -----------
+
+    - base_url (str): The base URL to pass to configure_client(), set by start().
+
+    ---------
+    Examples:
+    ---------
+
+    with Stub_OpenAI_Server(latency_s=0.2, error_rate=0.05) as server:
+        configure_client(base_url=server.base_url)
+        note_taker.take_notes(system_prompt=role_txt, n_items=5, use_cache=False)
+        print(server.stats())
+    """
+    def __init__(self,
+                 latency_s:float = 0.1,
+                 latency_jitter_s:float = 0.05,
+                 upload_s_per_mb:float = 0.5,
+                 error_rate:float = 0.0,
+                 retry_after_s:float = 0.05,
+                 bytes_per_word:int = 1000,
+                 completion_tokens:int = 150,
+                 token_latency_s:float = 0.01,
+                 seed:int = 0):
+        self.latency_s = latency_s
+        self.latency_jitter_s = latency_jitter_s
+        self.upload_s_per_mb = upload_s_per_mb
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+        self.bytes_per_word = bytes_per_word
+        self.completion_tokens = completion_tokens
+        self.token_latency_s = token_latency_s
+        self.base_url = None
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Starts serving on a free local port in a background thread, and sets base_url.
+        """
+        stub = self
+
+        class Handler(_Stub_Handler):
+            server_stub = stub
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+        return self
+
+    def stop(self):
+        """
+        Stops the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def stats(self) -> dict:
+        """
+        Returns the number of requests and injected errors per endpoint.
+        """
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._stats.items()}
+
+    def _count(self, endpoint:str, key:str):
+        with self._lock:
+            counts = self._stats.setdefault(endpoint, {'requests': 0, 'errors': 0})
+            counts[key] += 1
+
+    def _draw_latency_s(self) -> float:
+        with self._lock:
+            return self.latency_s + self._random.uniform(0, self.latency_jitter_s)
+
+    def _draw_error(self):
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice((429, 500))
+
+class _Stub_Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_stub = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status:int, body:dict, headers:dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, data:bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        stub = self.server_stub
+        body = self.rfile.read(int(self.headers.get('content-length', 0)))
+        endpoint = 'transcriptions' if self.path.endswith('/audio/transcriptions') else 'chat_completions'
+        stub._count(endpoint, 'requests')
+
+        latency_s = stub._draw_latency_s()
+        if endpoint == 'transcriptions':
+            latency_s += stub.upload_s_per_mb * len(body) / (1024 * 1024)
+        time.sleep(latency_s)
+
+        status = stub._draw_error()
+        if status is not None:
+            stub._count(endpoint, 'errors')
+            self._send_json(status,
+                            {'error': {'message': "Injected error", 'type': 'stub_error', 'code': None}},
+                            headers={'retry-after': str(stub.retry_after_s)})
+            return
+
+        if endpoint == 'transcriptions':
+            n_words = max(1, len(body) // stub.bytes_per_word)
+            words = [f"word{i}" for i in range(n_words)]
+            transcript = {'text': ' '.join(words)}
+            if b'verbose_json' in body:
+                # one segment per ten words, at a speaking rate of two words per second
+                transcript['segments'] = [{'id': i // 10, 'start': i / 2.0, 'end': min(i + 10, n_words) / 2.0,
+                                           'text': ' '.join(words[i:i + 10])}
+                                          for i in range(0, n_words, 10)]
+            self._send_json(200, transcript)
+            return
+
+        request = json.loads(body)
+        prompt = ' '.join(message['content'] for message in request['messages'])
+        prompt_tokens = len(prompt.split())
+        content = '\n'.join(f"{i}. Synthetic note {i}." for i in range(1, 6))
+        usage = {'prompt_tokens': prompt_tokens,
+                 'completion_tokens': stub.completion_tokens,
+                 'total_tokens': prompt_tokens + stub.completion_tokens}
+
+        if not request.get('stream'):
+            self._send_json(200, {'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()),
+                                  'model': request['model'],
+                                  'choices': [{'index': 0, 'finish_reason': 'stop',
+                                               'message': {'role': 'assistant', 'content': content}}],
+                                  'usage': usage})
+            return
+
+        self.send_response(200)
+        self.send_header('content-type', 'text/event-stream')
+        self.send_header('transfer-encoding', 'chunked')
+        self.end_headers()
+        for piece in content.split(' '):
+            time.sleep(stub.token_latency_s)
+            delta = {'id': 'stub', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                     'model': request['model'],
+                     'choices': [{'index': 0, 'delta': {'content': f"{piece} "}, 'finish_reason': None}]}
+            self._send_chunk(f"data: {json.dumps(delta)}\n\n".encode("utf-8"))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
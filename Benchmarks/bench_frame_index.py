@@ -0,0 +1,62 @@
+"""
+Benchmarks NoteTaker_MP3.frame_index() on a synthetic constant-bitrate MP3 stream.
+
+The stream is built from valid 128 kbps MPEG-1 Layer III frame headers with random payloads, so ffmpeg
+is not needed, and the payloads contain as many false sync words as real audio does.
+
+Examples:
+    python Benchmarks/bench_frame_index.py
+    python Benchmarks/bench_frame_index.py --durations 600 3600 --repeats 5
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NoteTaker_MP3 import frame_index
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no CRC
+HEADER = 0xFFFB9000
+FRAME_BYTES = 417
+FRAME_S = 1152 / 44100
+
+def make_stream(duration_s:float, seed:int = 0) -> bytes:
+    n_frames = int(duration_s / FRAME_S)
+    rng = np.random.default_rng(seed)
+    payload = rng.integers(0, 256, size=(n_frames, FRAME_BYTES - 3), dtype=np.uint8)
+    parts = []
+    for i in range(n_frames):
+        # every third frame is padded, which keeps the average at 128 kbps
+        padded = i % 3 == 0
+        parts.append((HEADER | (0x200 if padded else 0)).to_bytes(4, 'big'))
+        parts.append(payload[i, :FRAME_BYTES - 4 + padded].tobytes())
+    return b"".join(parts)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the MP3 frame index on synthetic streams.")
+    parser.add_argument('--durations', type=float, nargs='+', default=[600, 3600],
+                        help="Stream durations in seconds.")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Timed runs per duration; the fastest is reported.")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    report = {}
+    for duration_s in args.durations:
+        data = make_stream(duration_s)
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            index = frame_index(data)
+            timings.append(time.perf_counter() - start)
+        report[duration_s] = {'bytes': len(data), 'frames': len(index['offsets']), 'best_s': min(timings)}
+        print(f"{duration_s:>8.0f} s  {len(data) / 1e6:>7.1f} MB  {len(index['offsets']):>8} frames  {min(timings):.3f} s")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Benchmarks the NoteTaker pipeline against a local OpenAI stand-in server, with synthetic audio fixtures.
+
+Every stage of OpenAI_NoteTaker.take_notes() is timed separately: probe, transcode, upload, summarize
+and save. Single-file runs report the p50 and p95 latency of each stage, and batch runs report the
+throughput of NoteTaker_Batch. Peak RSS is sampled during every run. No API calls are made and no costs
+are incurred.
+
+Examples:
+    python Benchmarks/run_benchmarks.py
+    python Benchmarks/run_benchmarks.py --durations 60 600 --formats wav mp3 --repeats 5 --error-rate 0.05
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import threading
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Audio_Fixtures import FIXTURE_FORMATS, make_fixtures
+from Stub_Server import Stub_OpenAI_Server
+from NoteTaker_Probe import _probe_audio
+from NoteTaker_RateLimiter import configure_rate_limit
+from NoteTaker_Batch import NoteTaker_Batch
+from OpenAI_Client import configure_client
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Transcriber import OpenAI_Transcriber
+from OpenAI_Summarizer import OpenAI_Summarizer
+
+STAGES = ('probe', 'transcode', 'upload', 'summarize', 'save')
+SYSTEM_PROMPT = "You are a graduating SHS student, excellent at summarizing notes in layman's terms."
+
+def current_rss_mb() -> float:
+    """
+    Returns the resident set size of this process in MB, or its peak so far where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+class Memory_Sampler:
+    """
+    Samples the RSS of this process in a background thread while in use as a context manager, and keeps
+    the peak in `peak_rss_mb`.
+    """
+    def __init__(self, interval_s:float = 0.01):
+        self.interval_s = interval_s
+        self.peak_rss_mb = 0.0
+        self._stopped = threading.Event()
+
+    def _sample(self):
+        while not self._stopped.is_set():
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+            self._stopped.wait(self.interval_s)
+
+    def __enter__(self):
+        self.peak_rss_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+
+@contextlib.contextmanager
+def timed(timings:dict, stage:str):
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+
+def run_single(input_path:str, output_dir:str, args) -> dict:
+    """
+    Takes notes for one file, running the stages of OpenAI_NoteTaker.take_notes() one by one so each is timed.
+    The caches are bypassed, so every run makes the same requests.
+    """
+    timings = {}
+    stem = os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0])
+    note_taker = OpenAI_NoteTaker(input_dir=input_path)
+
+    with Memory_Sampler() as sampler:
+        with timed(timings, 'probe'):
+            _probe_audio.cache_clear()
+            note_taker.Transcriber = OpenAI_Transcriber(input_dir=input_path)
+            note_taker.Transcriber.get_filesize()
+            note_taker.Transcriber.get_duration()
+
+        with timed(timings, 'transcode'):
+            if args.transcode:
+                note_taker.Transcriber.transcode(profile=args.transcode_profile)
+
+        with timed(timings, 'upload'):
+            note_taker.Transcriber.transcribe_audio(chunked=args.chunked,
+                                                    max_workers=args.max_workers,
+                                                    max_chunk_mb=args.max_chunk_mb,
+                                                    use_cache=False)
+
+        with timed(timings, 'summarize'):
+            note_taker.Summarizer = OpenAI_Summarizer(transcript_text=note_taker.Transcriber.transcript_text)
+            note_taker.Summarizer.summarize_text(system_prompt=SYSTEM_PROMPT, n_items=args.n_items, use_cache=False)
+
+        with timed(timings, 'save'):
+            note_taker.save_notes(export_transcription_dir=f"{stem} [Transcribed]",
+                                  export_summary_dir=f"{stem} [Notes]")
+
+    return {'file': os.path.basename(input_path),
+            'duration': note_taker.Transcriber.duration,
+            'size_mb': note_taker.Transcriber.input_filesize,
+            'stages': timings,
+            'total_s': sum(timings.values()),
+            'peak_rss_mb': sampler.peak_rss_mb}
+
+def summarize_runs(runs:list) -> dict:
+    """
+    Returns the p50 and p95 latency of each stage and of whole runs, and the throughput of the runs.
+    """
+    latency = {}
+    for stage in STAGES + ('total',):
+        values = [run['total_s'] if stage == 'total' else run['stages'][stage] for run in runs]
+        latency[stage] = {'p50_s': float(np.percentile(values, 50)),
+                          'p95_s': float(np.percentile(values, 95))}
+
+    busy_s = sum(run['total_s'] for run in runs)
+
+    return {'runs': len(runs),
+            'latency': latency,
+            'files_per_min': 60.0 * len(runs) / busy_s,
+            'audio_min_per_min': sum(run['duration'] for run in runs) / busy_s,
+            'peak_rss_mb': max(run['peak_rss_mb'] for run in runs)}
+
+def run_batch(fixture_paths:list, output_dir:str, args) -> dict:
+    """
+    Takes notes for all fixtures with NoteTaker_Batch, starting from an empty manifest.
+    """
+    input_dir = os.path.join(output_dir, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    for path in fixture_paths:
+        shutil.copy(path, input_dir)
+
+    batch = NoteTaker_Batch(input_dir=input_dir,
+                            output_dir=os.path.join(output_dir, "output"),
+                            max_api_concurrency=args.max_api_concurrency)
+
+    start = time.perf_counter()
+    with Memory_Sampler() as sampler:
+        manifest = batch.run(system_prompt=SYSTEM_PROMPT,
+                             n_items=args.n_items,
+                             chunked=args.chunked,
+                             transcode=args.transcode,
+                             use_cache=False)
+    wall_s = time.perf_counter() - start
+
+    done = [entry for entry in manifest.values() if entry.get('status') == 'done']
+    audio_s = sum(entry['probe']['duration'] for entry in done)
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return {'files': len(manifest),
+            'failed': len(manifest) - len(done),
+            'wall_s': wall_s,
+            'files_per_min': 60.0 * len(done) / wall_s,
+            'audio_min_per_min': audio_s / wall_s,
+            'peak_rss_mb': sampler.peak_rss_mb,
+            'peak_worker_rss_mb': children_rss / (1024 * 1024) if sys.platform == "darwin" else children_rss / 1024}
+
+def print_report(report:dict):
+    print(f"\nSingle-file runs ({report['single']['runs']}):")
+    print(f"{'stage':<10} {'p50 (s)':>10} {'p95 (s)':>10}")
+    for stage, latency in report['single']['latency'].items():
+        print(f"{stage:<10} {latency['p50_s']:>10.3f} {latency['p95_s']:>10.3f}")
+    print(f"Throughput: {report['single']['files_per_min']:.1f} files/min, "
+          f"{report['single']['audio_min_per_min']:.1f} audio min/min")
+    print(f"Peak RSS: {report['single']['peak_rss_mb']:.1f} MB")
+
+    if 'batch' in report:
+        batch = report['batch']
+        print(f"\nBatch run ({batch['files']} files, {batch['failed']} failed): {batch['wall_s']:.2f} s")
+        print(f"Throughput: {batch['files_per_min']:.1f} files/min, {batch['audio_min_per_min']:.1f} audio min/min")
+        print(f"Peak RSS: {batch['peak_rss_mb']:.1f} MB, worker processes: {batch['peak_worker_rss_mb']:.1f} MB")
+
+    print(f"\nStub server requests: {report['server']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NoteTaker pipeline against a local OpenAI stand-in server.")
+    parser.add_argument("--durations", type=float, nargs='+', default=[30, 120, 600], help="Fixture durations in seconds.")
+    parser.add_argument("--formats", nargs='+', default=None, choices=sorted(FIXTURE_FORMATS),
+                        help="Fixture formats. Defaults to all formats if ffmpeg is installed, else wav.")
+    parser.add_argument("--fixture-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Fixtures"))
+    parser.add_argument("--repeats", type=int, default=3, help="Single-file runs per fixture.")
+    parser.add_argument("--no-batch", action='store_true', help="Skip the batch run.")
+    parser.add_argument("--n-items", type=int, default=5)
+    parser.add_argument("--chunked", action='store_true')
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--max-chunk-mb", type=float, default=24.0)
+    parser.add_argument("--transcode", action='store_true')
+    parser.add_argument("--transcode-profile", default="mp3", choices=["mp3", "opus"])
+    parser.add_argument("--max-api-concurrency", type=int, default=4)
+    parser.add_argument("--latency-s", type=float, default=0.1)
+    parser.add_argument("--latency-jitter-s", type=float, default=0.05)
+    parser.add_argument("--upload-s-per-mb", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--output", default=None, help="Writes the report as JSON to this path.")
+    parser.add_argument("--verbose", action='store_true', help="Shows the pipeline's own output.")
+
+    return parser.parse_args(argv)
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    formats = args.formats or (sorted(FIXTURE_FORMATS) if shutil.which("ffmpeg") else ['wav'])
+    fixture_paths = make_fixtures(args.fixture_dir, args.durations, formats)
+    print(f"{len(fixture_paths)} fixture(s) in {args.fixture_dir}.")
+
+    # the stand-in server has no account limits, so only the pipeline itself is measured
+    for model in ("whisper-1", "gpt-3.5-turbo"):
+        configure_rate_limit(model, base_delay_s=0.05)
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    with Stub_OpenAI_Server(latency_s=args.latency_s,
+                            latency_jitter_s=args.latency_jitter_s,
+                            upload_s_per_mb=args.upload_s_per_mb,
+                            error_rate=args.error_rate,
+                            completion_tokens=args.completion_tokens) as server, \
+         tempfile.TemporaryDirectory() as output_dir:
+        configure_client(base_url=server.base_url, api_key="stub")
+
+        report = {'config': vars(args), 'formats': formats}
+        with quiet:
+            runs = [run_single(path, output_dir, args) for path in fixture_paths for _ in range(args.repeats)]
+            report['runs'] = runs
+            report['single'] = summarize_runs(runs)
+            if not args.no_batch:
+                report['batch'] = run_batch(fixture_paths, output_dir, args)
+        report['server'] = server.stats()
+
+    print_report(report)
+
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved at: {args.output}")
+
+    return report
+
+if __name__ == "__main__":
+    main()
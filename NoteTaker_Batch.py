@@ -0,0 +1,301 @@
+import os
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import magic
+from pydub import AudioSegment
+
+from NoteTaker_Probe import probe_audio, remember_probe
+from NoteTaker_Estimator import NoteTaker_Estimator
+from NoteTaker_Store import NoteTaker_Store
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from NoteTaker_Events import stage, emit, bind_context
+
+def _prepare_file(input_path:str, filetype:str, export_mp3_dir:str = None) -> dict:
+    """
+    Probes an input file and, if an MP3 export path is given, transcodes it to MP3. Runs in a worker
+    process, since decoding and encoding audio is CPU-bound.
+    """
+    probe = probe_audio(input_path)
+    upload_path = input_path
+
+    if export_mp3_dir is not None and filetype != "audio/mpeg":
+        AudioSegment.from_file(input_path).export(export_mp3_dir, format="mp3")
+        upload_path = export_mp3_dir
+
+    return {'probe': probe,
+            'upload_path': upload_path}
+
+class NoteTaker_Batch:
+    """
+    This class takes notes for every recording in a directory, such as all the parts of one event.
+    Probing and MP3 conversion run in a process pool, while the transcription and summarization jobs
+    run in a thread pool that takes notes for `max_api_concurrency` files at a time. The limit is per file,
+    not per API call: each file transcribes its chunks one at a time unless `max_workers` is passed to
+    run(), and account-wide request limits are left to the shared rate limiters of NoteTaker_RateLimiter.
+    Transcripts and notes are written to `output_dir` as "<name> [Transcribed].txt" and
+    "<name> [Notes].txt", and the timed segments of each transcript as "<name> [Segments].arrow".
+
+    The status of each file is recorded in a JSON manifest. Rerunning a batch skips the files that are
+    already done and unchanged, so only new, changed or failed files are processed again.
+
+    -----------
+    Parameters:
+    -----------
+
+    - input_dir (str): The directory containing the recordings.
+    - output_dir (str): The directory where transcripts and notes are saved. Defaults to "Data/Output".
+    - manifest_path (str): The path to the JSON manifest. Defaults to "<output_dir>/manifest.json".
+    - max_api_concurrency (int): The number of files whose transcription and summarization run at the same time. Defaults to 4.
+    - max_processes (int): The number of worker processes for probing and conversion. Defaults to the number of CPUs.
+    - convert2mp3 (bool): If True, non-MP3 recordings are converted to MP3 in `output_dir` before upload. Defaults to False.
+    - store (NoteTaker_Store): If given, every transcript and summary is also recorded in this searchable store. Defaults to None.
+    - **notetaker_kwargs: Passed on to every OpenAI_NoteTaker, e.g. transcriber_model and summarizer_model.
+
+    --------
+    Methods:
+    --------
+
+    - find_files(): Returns the audio and video files in input_dir, including subdirectories.
+    - load_manifest(): Loads the manifest from manifest_path.
+    - pending_files(): Returns the files that are new, changed or failed since the last run.
+    - estimate(system_prompt, n_items): Estimates the cost and time of the pending files without calling the API.
+    - run(system_prompt, n_items, ...): Takes notes for every pending file and updates the manifest.
+
+    -----------
+    Attributes:
+    -----------
+
+    - manifest (dict): The status of each file, keyed by its path relative to input_dir.
+    - note_takers (dict): The OpenAI_NoteTaker instance of each file processed in this run.
+
+    ---------
+    Examples:
+    ---------
+
+    batch = NoteTaker_Batch(input_dir="Data/Input/DSSoc Mentorship",
+                            output_dir="Data/Output/DSSoc Mentorship",
+                            convert2mp3=True)
+    batch.run(system_prompt=role_txt, n_items=6)
+    """
+    def __init__(self,
+                 input_dir:str,
+                 output_dir:str = os.path.join("Data", "Output"),
+                 manifest_path:str = None,
+                 max_api_concurrency:int = 4,
+                 max_processes:int = None,
+                 convert2mp3:bool = False,
+                 store:NoteTaker_Store = None,
+                 **notetaker_kwargs):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.manifest_path = manifest_path if manifest_path is not None else os.path.join(output_dir, "manifest.json")
+        self.max_api_concurrency = max_api_concurrency
+        self.max_processes = max_processes
+        self.convert2mp3 = convert2mp3
+        self.store = store
+        self.notetaker_kwargs = notetaker_kwargs
+
+        self.note_takers = {}
+        self._manifest_lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.load_manifest()
+
+    def find_files(self) -> dict:
+        """
+        Returns the audio and video files in input_dir and its subdirectories, detected by MIME type.
+
+        Returns:
+        --------
+        dict
+            The MIME type of each file, keyed by its path relative to input_dir.
+        """
+        mime = magic.Magic(mime=True)
+        files = {}
+
+        for root, _, filenames in os.walk(self.input_dir):
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                filetype = mime.from_file(path)
+                if filetype.startswith(("audio/", "video/")):
+                    files[os.path.relpath(path, self.input_dir)] = filetype
+
+        return files
+
+    def load_manifest(self):
+        """
+        Loads the manifest from manifest_path, or starts an empty one if it does not exist yet.
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _update_manifest(self, relpath:str, **entry):
+        with self._manifest_lock:
+            self.manifest.setdefault(relpath, {}).update(entry)
+            self._save_manifest()
+
+    def _fingerprint(self, relpath:str) -> dict:
+        stat = os.stat(os.path.join(self.input_dir, relpath))
+        return {'size_bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def pending_files(self) -> dict:
+        """
+        Returns the files that are new, changed or failed since the last run.
+
+        Returns:
+        --------
+        dict
+            The MIME type of each pending file, keyed by its path relative to input_dir.
+        """
+        pending = {}
+        for relpath, filetype in self.find_files().items():
+            entry = self.manifest.get(relpath, {})
+            if entry.get('status') != 'done' or entry.get('fingerprint') != self._fingerprint(relpath):
+                pending[relpath] = filetype
+
+        return pending
+
+    def estimate(self,
+                 system_prompt:str = None,
+                 n_items:int = None,
+                 **estimator_kwargs) -> dict:
+        """
+        Estimates the cost and wall-clock time of the pending files before running the batch, with no API calls.
+        Transcripts already in output_dir are counted instead of predicted.
+
+        Parameters:
+        -----------
+        system_prompt : str
+            The prompt that will be used to generate the summaries.
+        n_items : int
+            The number of bullet points in each summary.
+        **estimator_kwargs
+            Passed on to NoteTaker_Estimator, e.g. summarizer_model or tokens_per_min.
+
+        Returns:
+        --------
+        dict
+            See NoteTaker_Estimator.estimate().
+        """
+        estimator_kwargs.setdefault('transcriber_model', self.notetaker_kwargs.get('transcriber_model', "whisper-1"))
+        estimator_kwargs.setdefault('summarizer_model', self.notetaker_kwargs.get('summarizer_model', "gpt-3.5-turbo"))
+        # prices set for the note takers also apply to the estimate, as for unknown or fine-tuned models
+        for price in ('USD_per_min', 'USD_per_1k'):
+            if price in self.notetaker_kwargs:
+                estimator_kwargs.setdefault(price, self.notetaker_kwargs[price])
+        estimator = NoteTaker_Estimator(**estimator_kwargs)
+
+        files = [os.path.join(self.input_dir, relpath) for relpath in self.pending_files()]
+        transcripts = {path: f"{self._output_stem(os.path.relpath(path, self.input_dir))} [Transcribed].txt"
+                       for path in files}
+        transcripts = {path: transcript for path, transcript in transcripts.items() if os.path.isfile(transcript)}
+
+        return estimator.estimate(files=files,
+                                  prompts=[{'system_prompt': system_prompt, 'n_items': n_items}],
+                                  transcripts=transcripts,
+                                  max_api_concurrency=self.max_api_concurrency)
+
+    def _output_stem(self, relpath:str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(relpath)[0])
+
+    def _take_notes(self, relpath:str, prepared:dict, take_notes_kwargs:dict):
+        stem = self._output_stem(relpath)
+        if prepared['upload_path'] == os.path.join(self.input_dir, relpath):
+            # the worker process already probed the file, so the note taker does not probe it again
+            remember_probe(prepared['upload_path'], prepared['probe'])
+
+        note_taker = OpenAI_NoteTaker(input_dir=prepared['upload_path'], **self.notetaker_kwargs)
+        self.note_takers[relpath] = note_taker
+
+        note_taker.take_notes(**take_notes_kwargs)
+        note_taker.save_notes(export_transcription_dir=f"{stem} [Transcribed]",
+                              export_summary_dir=f"{stem} [Notes]",
+                              export_segments_dir=f"{stem} [Segments]",
+                              store=self.store)
+        note_taker.get_total_job_price()
+
+        return {'transcript_path': f"{stem} [Transcribed].txt",
+                'notes_path': f"{stem} [Notes].txt",
+                'segments_path': note_taker.Transcriber.filepath_segments,
+                'price': note_taker.complete_job_price_dict}
+
+    def run(self,
+            system_prompt:str = None,
+            n_items:int = None,
+            **take_notes_kwargs) -> dict:
+        """
+        Takes notes for every pending file. Files are probed and converted in the process pool, and each
+        file is handed to the API thread pool as soon as it is ready. The manifest is saved after every file,
+        so an interrupted batch resumes where it stopped.
+
+        Parameters:
+        -----------
+        system_prompt : str
+            The prompt that is used to generate the summaries.
+        n_items : int
+            The number of bullet points in each summary.
+        **take_notes_kwargs
+            Passed on to OpenAI_NoteTaker.take_notes(), e.g. chunked=True.
+
+        Returns:
+        --------
+        dict
+            The manifest after the run.
+        """
+        pending = self.pending_files()
+        print(f"{len(pending)} file(s) to process in {self.input_dir}.")
+
+        take_notes_kwargs = dict(take_notes_kwargs, system_prompt=system_prompt, n_items=n_items)
+        # files already run in parallel, so each file transcribes its chunks one at a time unless asked otherwise
+        take_notes_kwargs.setdefault('max_workers', 1)
+
+        with stage('batch', input_dir=self.input_dir, files=len(pending)) as metrics:
+            with ProcessPoolExecutor(max_workers=self.max_processes) as process_pool, \
+                 ThreadPoolExecutor(max_workers=self.max_api_concurrency) as api_pool:
+
+                prepare_futures = {}
+                for relpath, filetype in pending.items():
+                    # the output directories are only made here, so estimate() writes nothing
+                    os.makedirs(os.path.dirname(self._output_stem(relpath)), exist_ok=True)
+                    export_mp3_dir = f"{self._output_stem(relpath)}.mp3" if self.convert2mp3 else None
+                    self._update_manifest(relpath, status='running', fingerprint=self._fingerprint(relpath), error=None)
+                    prepare_futures[process_pool.submit(_prepare_file,
+                                                        os.path.join(self.input_dir, relpath),
+                                                        filetype,
+                                                        export_mp3_dir)] = relpath
+
+                api_futures = {}
+                for future in as_completed(prepare_futures):
+                    relpath = prepare_futures[future]
+                    try:
+                        prepared = future.result()
+                    except Exception as e:
+                        print(f"Error preparing {relpath}: {e}")
+                        self._update_manifest(relpath, status='failed', error=repr(e))
+                        continue
+
+                    self._update_manifest(relpath, probe=prepared['probe'])
+                    api_futures[api_pool.submit(bind_context(self._take_notes), relpath, prepared, take_notes_kwargs)] = relpath
+
+                for future in as_completed(api_futures):
+                    relpath = api_futures[future]
+                    try:
+                        self._update_manifest(relpath, status='done', **future.result())
+                    except Exception as e:
+                        print(f"Error taking notes for {relpath}: {e}")
+                        self._update_manifest(relpath, status='failed', error=repr(e))
+                    emit('batch_file', file=relpath, status=self.manifest[relpath]['status'])
+
+            metrics['failed'] = sum(self.manifest[relpath]['status'] == 'failed' for relpath in pending)
+
+        return self.manifest
@@ -0,0 +1,213 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+class Disk_Cache:
+    """
+    A persistent, content-addressed cache of JSON-serializable values stored as one file per entry.
+    The cache is capped in size, and the least recently used entries are evicted first. Recently used
+    entries can also be kept in memory, so repeated lookups in the same process skip the disk.
+
+    -----------
+    Parameters:
+    -----------
+
+    - cache_dir (str): The directory where the cache entries are stored. Created if it does not exist.
+    - max_size_mb (float): The maximum total size of the cache entries in MB. Defaults to 512.
+    - max_memory_items (int): The number of recently used entries also kept in memory. Defaults to 0.
+
+    --------
+    Methods:
+    --------
+
+    - make_key(*parts): Returns a SHA-256 digest of the given key parts.
+    - get(key): Returns the cached value for the key, or None on a miss.
+    - set(key, value): Stores the value under the key and evicts old entries if the cache is over its size cap.
+    - evict(): Deletes the least recently used entries until the cache fits under its size cap.
+    - clear(): Deletes all entries.
+    - stats(): Returns the hit and miss counters and the current size of the cache.
+
+    -----------
+    Attributes:
+    -----------
+
+    - cache_dir (str): The directory where the cache entries are stored.
+    - max_size_mb (float): The maximum total size of the cache entries in MB.
+    - max_memory_items (int): The number of recently used entries also kept in memory.
+    - hits (int): The number of get() calls that found an entry.
+    - misses (int): The number of get() calls that did not find an entry.
+
+    ---------
+    Examples:
+    ---------
+
+    cache = Disk_Cache(cache_dir="Data/Cache/Transcripts", max_size_mb=256)
+    key = cache.make_key(hash_file("audio_file.mp3"), "whisper-1")
+
+    if cache.get(key) is None:
+        cache.set(key, {'text': "..."})
+
+    print(cache.stats())
+    """
+    def __init__(self,
+                 cache_dir:str,
+                 max_size_mb:float = 512,
+                 max_memory_items:int = 0):
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Returns a SHA-256 hex digest of the given key parts. Parts are serialized as sorted JSON, so
+        dictionaries of options give the same key regardless of their order.
+        """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key:str):
+        """
+        Returns the cached value for the key, or None on a miss. A hit marks the entry as recently used.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key:str, value):
+        if self.max_memory_items <= 0:
+            return
+
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def set(self, key:str, value):
+        """
+        Stores the value under the key, then evicts the least recently used entries if the cache is
+        over its size cap. The entry is written to a temporary file first, so readers never see a partial entry.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        self._remember(key, value)
+        self.evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the cache fits under its size cap.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            total_size = sum(size for _, size, _ in entries)
+            max_size = self.max_size_mb * 1024 * 1024
+
+            for _, size, path in entries:
+                if total_size <= max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total_size -= size
+
+    def clear(self):
+        """
+        Deletes all entries.
+        """
+        with self._lock:
+            self._memory.clear()
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters, the number of entries and the current size of the cache in MB.
+        """
+        entries = self._entries()
+
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(entries),
+                'size_mb': sum(size for _, size, _ in entries) / (1024 * 1024)}
+
+def hash_file(input_dir:str) -> str:
+    """
+    Returns a SHA-256 hex digest of the file contents. The digest is remembered per path, size and
+    modification time, so an unchanged file is only read once per process.
+    """
+    stat = os.stat(input_dir)
+
+    return _hash_file(os.path.abspath(input_dir), stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=256)
+def _hash_file(path:str, size_bytes:int, mtime_ns:int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+_default_caches = {}
+
+def get_default_cache(name:str, max_size_mb:float = 512, max_memory_items:int = 0) -> Disk_Cache:
+    """
+    Returns the process-wide cache stored under Data/Cache/<name>, creating it on first use.
+    """
+    if name not in _default_caches:
+        _default_caches[name] = Disk_Cache(cache_dir=os.path.join("Data", "Cache", name),
+                                           max_size_mb=max_size_mb,
+                                           max_memory_items=max_memory_items)
+
+    return _default_caches[name]
@@ -0,0 +1,119 @@
+import os
+import json
+import threading
+
+from NoteTaker_Cache import Disk_Cache, hash_file
+
+class NoteTaker_Checkpoint:
+    """
+    A crash-safe record of the finished units of one note-taking job: the probe, each transcribed chunk
+    and each summary request. Every unit is appended to a JSON Lines file and flushed to disk as soon as
+    it finishes, so a job that is restarted after a crash or a dead kernel resumes from the last finished
+    unit and never pays for the same API call twice.
+
+    Checkpoints are keyed by the hash of the recording and the job options, so rerunning the same job
+    finds its checkpoint, while a changed recording or other options start a fresh one. A line cut short
+    by a crash is ignored on load. Local work such as transcoding is not recorded, since redoing it is
+    free, and writing its output to disk on every run would cost more than it saves.
+
+    -----------
+    Parameters:
+    -----------
+
+    - path (str): The path to the .jsonl checkpoint file. Created if it does not exist, resumed otherwise.
+
+    --------
+    Methods:
+    --------
+
+    - for_job(input_dir, checkpoint_dir, **options): Returns the checkpoint of a job, resuming it if it exists.
+    - get(kind, key): Returns the value recorded for a unit, or None if it has not finished.
+    - set(kind, key, value): Records a finished unit.
+    - clear(): Deletes the checkpoint once the job has finished. Later set() calls are ignored.
+
+    -----------
+    Attributes:
+    -----------
+
+    - path (str): The path to the .jsonl checkpoint file.
+    - resumed (int): The number of units loaded from an earlier run.
+
+    ---------
+    Examples:
+    ---------
+
+    checkpoint = NoteTaker_Checkpoint.for_job("audio_file.mp3", transcriber_model="whisper-1", chunked=True)
+    segment = checkpoint.get('segment', "3")
+    if segment is None:
+        segment = transcribe(chunk)
+        checkpoint.set('segment', "3", segment)
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self._state = {}
+        self._lock = threading.Lock()
+        self._cleared = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        try:
+            with open(path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._state.setdefault(record['kind'], {})[record['key']] = record['value']
+        except FileNotFoundError:
+            pass
+
+        self.resumed = sum(len(units) for units in self._state.values())
+        if self.resumed > 0:
+            print(f"Resuming from checkpoint: {self.resumed} finished unit(s).")
+
+    @classmethod
+    def for_job(cls,
+                input_dir:str,
+                checkpoint_dir:str = os.path.join("Data", "Checkpoints"),
+                **options):
+        """
+        Returns the checkpoint of the job that processes input_dir with the given options, resuming it
+        if an earlier run left one behind.
+        """
+        job_key = Disk_Cache.make_key(hash_file(input_dir), options)
+
+        return cls(os.path.join(checkpoint_dir, f"{job_key}.jsonl"))
+
+    def get(self, kind:str, key:str):
+        """
+        Returns the value recorded for a finished unit, or None if it has not finished.
+        """
+        with self._lock:
+            return self._state.get(kind, {}).get(key)
+
+    def set(self, kind:str, key:str, value):
+        """
+        Records a finished unit, and flushes it to disk before returning. Does nothing once the
+        checkpoint has been cleared, so that late calls, e.g. a probe after the job has finished, do
+        not leave a new checkpoint file behind.
+        """
+        line = json.dumps({'kind': kind, 'key': key, 'value': value}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._cleared:
+                return
+            self._state.setdefault(kind, {})[key] = value
+            with open(self.path, 'a', encoding="utf-8") as f:
+                f.write(f"{line}\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """
+        Deletes the checkpoint once the job has finished. Later set() calls are ignored.
+        """
+        with self._lock:
+            self._state = {}
+            self._cleared = True
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,388 @@
+import os
+import hmac
+import json
+import time
+import queue
+import socket
+import secrets
+import itertools
+import threading
+import tempfile
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+from NoteTaker_Events import add_event_handler, remove_event_handler, event_context
+
+# The directory of the pipeline modules. The caches, checkpoints and relative outputs of jobs are kept
+# under it, so the daemon and the CLI share Data/Cache and Data/Checkpoints whichever directory they are
+# started from.
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The daemon listens on a per-user Unix socket in the runtime directory where available, and on a local
+# TCP port otherwise, so clients started from any directory find it.
+if hasattr(socket, 'AF_UNIX'):
+    DEFAULT_ADDRESS = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+                                   f"notetaker-{os.getuid()}.sock" if hasattr(os, 'getuid') else "notetaker.sock")
+else:
+    DEFAULT_ADDRESS = ("127.0.0.1", 8765)
+
+# Any local user can connect to a TCP port, so a daemon listening on one only accepts requests that carry
+# the token it writes to this file, readable by its owner only.
+TOKEN_PATH = os.path.join(PACKAGE_DIR, "Data", "daemon.token")
+
+def connect(address = DEFAULT_ADDRESS, timeout:float = None) -> socket.socket:
+    """
+    Connects to a running daemon. Raises OSError if no daemon listens at the address.
+    """
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    sock.settimeout(None)
+
+    return sock
+
+def read_token(token_path:str = TOKEN_PATH) -> str:
+    """
+    Returns the token of the daemon listening on a TCP port, or None if none has written one.
+    """
+    try:
+        with open(token_path, encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def request(message:dict, address = DEFAULT_ADDRESS, token_path:str = TOKEN_PATH):
+    """
+    Sends one request to the daemon and yields its replies, one dictionary per line, until it closes
+    the connection. Requests to a TCP address carry the token read from token_path.
+    """
+    if isinstance(address, tuple):
+        message = dict(message, token=read_token(token_path))
+
+    with connect(address) as sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps(message).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            yield json.loads(line)
+
+def daemon_running(address = DEFAULT_ADDRESS, token_path:str = TOKEN_PATH) -> bool:
+    """
+    Returns True if a daemon answers at the address.
+    """
+    try:
+        return next(request({'op': 'ping'}, address, token_path))['type'] == 'pong'
+    except (OSError, StopIteration, ValueError):
+        return False
+
+class NoteTaker_Daemon:
+    """
+    A long-lived local worker that takes notes for jobs sent over a local socket, e.g. by the notetaker
+    CLI or app.py. The modules, the tokenizer, the pooled API client and the caches are loaded once when
+    the daemon starts, so a job starts in milliseconds instead of paying for them again in every script,
+    notebook or Streamlit rerun. All jobs run concurrently in one thread pool, and each job streams its
+    progress, its bullet points and its pipeline events back to the client that submitted it.
+
+    The protocol is one JSON request per connection, answered with JSON lines:
+    - {'op': 'submit', 'job': {...}}: replies 'accepted', then 'progress', 'bullet' and 'event' messages,
+      and finally 'done' with the result, or 'error'.
+    - {'op': 'status'}: replies 'status' with the state of every job.
+    - {'op': 'ping'} and {'op': 'shutdown'}.
+    On a TCP address, every request must also carry the 'token' that the daemon writes to token_path
+    when it starts; requests without it are refused.
+
+    -----------
+    Parameters:
+    -----------
+
+    - address (str or tuple): The Unix socket path, or the (host, port) on platforms without Unix sockets. Defaults to DEFAULT_ADDRESS.
+    - max_jobs (int): The maximum number of jobs that run at the same time. Defaults to 4.
+    - token_path (str): The file, readable by its owner only, where a daemon on a TCP address writes its token. Defaults to TOKEN_PATH.
+    - data_root (str): The directory under which the Data/Cache and Data/Checkpoints directories of the jobs are kept, and relative export paths are saved. Defaults to PACKAGE_DIR.
+    - **notetaker_kwargs: Passed on to every OpenAI_NoteTaker, e.g. transcriber_model and summarizer_model.
+
+    --------
+    Methods:
+    --------
+
+    - warm_up(): Loads the pipeline modules, the tokenizer, the API client and the caches.
+    - submit(job, listener): Queues a job and returns its id.
+    - status(): Returns the state of every job.
+    - serve_forever(): Warms up and serves requests until shutdown() is called.
+    - shutdown(): Stops serving and waits for the running jobs.
+
+    ---------
+    Examples:
+    ---------
+
+    # in a terminal, or with `python notetaker.py daemon`
+    NoteTaker_Daemon(max_jobs=4).serve_forever()
+
+    # from any script, CLI or app
+    for message in request({'op': 'submit', 'job': {'input_path': "Data/Input/QnA.mp3", 'n_items': 5}}):
+        print(message)
+    """
+    def __init__(self,
+                 address = DEFAULT_ADDRESS,
+                 max_jobs:int = 4,
+                 token_path:str = TOKEN_PATH,
+                 data_root:str = PACKAGE_DIR,
+                 **notetaker_kwargs):
+        self.address = address
+        self.max_jobs = max_jobs
+        self.token_path = token_path
+        self.data_root = data_root
+        self.notetaker_kwargs = notetaker_kwargs
+
+        self.jobs = {}
+        self._job_ids = itertools.count(1)
+        self._listeners = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="notetaker-job")
+        self._server = None
+        self._token = None
+
+    def warm_up(self):
+        """
+        Imports the pipeline and loads everything jobs share, so the first job does not pay for it.
+        """
+        start = time.perf_counter()
+
+        from OpenAI_NoteTaker import OpenAI_NoteTaker
+        from OpenAI_Summarizer import get_encoding
+        from OpenAI_Client import get_client
+        from NoteTaker_Cache import Disk_Cache
+
+        self._NoteTaker = OpenAI_NoteTaker
+        get_encoding(self.notetaker_kwargs.get('encoding_name', "cl100k_base"))
+        get_client()
+
+        # the caches and checkpoints are passed to every job under data_root, whatever the working directory
+        cache_dir = os.path.join(self.data_root, "Data", "Cache")
+        if 'transcript_cache' not in self.notetaker_kwargs:
+            self.notetaker_kwargs['transcript_cache'] = Disk_Cache(os.path.join(cache_dir, "Transcripts"))
+        if 'summary_cache' not in self.notetaker_kwargs:
+            self.notetaker_kwargs['summary_cache'] = Disk_Cache(os.path.join(cache_dir, "Summaries"), max_memory_items=256)
+        self.notetaker_kwargs.setdefault('checkpoint_dir', os.path.join(self.data_root, "Data", "Checkpoints"))
+
+        # pipeline events of a job are forwarded to the client that submitted it
+        add_event_handler(self._forward_event)
+
+        print(f"NoteTaker daemon warmed up in {time.perf_counter() - start:.2f} s.")
+
+    def _notify(self, job_id:int, message:dict):
+        with self._lock:
+            listeners = list(self._listeners.get(job_id, []))
+        for listener in listeners:
+            listener(dict(message, job_id=job_id))
+
+    def _forward_event(self, event:dict):
+        if event.get('daemon_job') is not None:
+            self._notify(event['daemon_job'], {'type': 'event', 'event': event})
+
+    def submit(self, job:dict, listener = None) -> int:
+        """
+        Queues a job and returns its id. The job is a dictionary with the absolute 'input_path' of the
+        recording and, optionally, 'system_prompt', 'n_items', 'chunked', 'transcode', 'trim_silence',
+        'hierarchical', 'incremental', 'use_cache', 'checkpoint', 'export_transcription_dir' and
+        'export_summary_dir', with the defaults of OpenAI_NoteTaker.take_notes(). The listener, if given, is called with every message of the job. Raises ValueError if the job
+        has no absolute 'input_path'.
+        """
+        if not isinstance(job, dict) or not isinstance(job.get('input_path'), str) or not os.path.isabs(job['input_path']):
+            raise ValueError("A job must be a dictionary with an absolute 'input_path'.")
+
+        with self._lock:
+            job_id = next(self._job_ids)
+            self.jobs[job_id] = {'status': 'queued',
+                                 'input_path': job['input_path'],
+                                 'submitted_at': time.time(),
+                                 'started_at': None,
+                                 'finished_at': None,
+                                 'error': None}
+            if listener is not None:
+                self._listeners[job_id] = [listener]
+
+        self._executor.submit(self._run_job, job_id, job)
+        return job_id
+
+    def status(self) -> dict:
+        """
+        Returns the state of every job, keyed by job id.
+        """
+        with self._lock:
+            return {job_id: dict(state) for job_id, state in self.jobs.items()}
+
+    def _update_job(self, job_id:int, **state):
+        # under the lock, so status() never copies a job while it changes
+        with self._lock:
+            self.jobs[job_id].update(state)
+
+    def _run_job(self, job_id:int, job:dict):
+        self._update_job(job_id, status='running', started_at=time.time())
+
+        def on_chunk(n_done, n_total):
+            self._notify(job_id, {'type': 'progress', 'chunks_done': n_done, 'chunks_total': n_total})
+
+        try:
+            with event_context(daemon_job=job_id):
+                note_taker = self._NoteTaker(input_dir=job['input_path'], **self.notetaker_kwargs)
+
+                if job.get('hierarchical', False)==True or job.get('incremental', False)==True:
+                    note_taker.take_notes(system_prompt=job.get('system_prompt'),
+                                          n_items=job.get('n_items'),
+                                          chunked=job.get('chunked', False),
+                                          transcode=job.get('transcode', False),
+                                          trim_silence=job.get('trim_silence', False),
+                                          use_cache=job.get('use_cache', True),
+                                          checkpoint=job.get('checkpoint', False),
+                                          hierarchical=job.get('hierarchical', False),
+                                          incremental=job.get('incremental', False))
+                    for bullet in note_taker.Summarizer.summarized_text.splitlines():
+                        self._notify(job_id, {'type': 'bullet', 'text': bullet})
+                else:
+                    for bullet in note_taker.stream_notes(system_prompt=job.get('system_prompt'),
+                                                          n_items=job.get('n_items'),
+                                                          chunked=job.get('chunked', False),
+                                                          transcode=job.get('transcode', False),
+                                                          trim_silence=job.get('trim_silence', False),
+                                                          use_cache=job.get('use_cache', True),
+                                                          checkpoint=job.get('checkpoint', False),
+                                                          progress_callback=on_chunk):
+                        self._notify(job_id, {'type': 'bullet', 'text': bullet})
+
+                result = {'transcript': note_taker.Transcribed_Audio,
+                          'notes': note_taker.Summarizer.summarized_text}
+                if job.get('export_transcription_dir') is not None or job.get('export_summary_dir') is not None:
+                    note_taker.save_notes(export_transcription_dir=self._data_path(job.get('export_transcription_dir')),
+                                          export_summary_dir=self._data_path(job.get('export_summary_dir')))
+                    result.update(transcript_path=note_taker.Transcriber.filepath_txt,
+                                  notes_path=note_taker.Summarizer.filepath_txt)
+                note_taker.get_total_job_price()
+                result['price'] = note_taker.complete_job_price_dict
+
+            self._update_job(job_id, status='done', finished_at=time.time())
+            self._notify(job_id, {'type': 'done', 'result': result})
+
+        except Exception as e:
+            self._update_job(job_id, status='failed', finished_at=time.time(), error=repr(e))
+            self._notify(job_id, {'type': 'error', 'error': repr(e)})
+
+        finally:
+            with self._lock:
+                self._listeners.pop(job_id, None)
+
+    def _data_path(self, path:str) -> str:
+        # relative export paths are saved under data_root; absolute ones are kept as they are
+        return os.path.join(self.data_root, path) if path is not None else None
+
+    def _handle(self, stream):
+        def send(reply:dict):
+            stream.write(json.dumps(reply, default=str).encode("utf-8") + b"\n")
+            stream.flush()
+
+        try:
+            message = json.loads(stream.readline())
+            if not isinstance(message, dict) or 'op' not in message:
+                raise ValueError("A request must be a JSON object with an 'op'.")
+        except ValueError as e:
+            send({'type': 'error', 'error': repr(e)})
+            return
+
+        if self._token is not None and not hmac.compare_digest(str(message.get('token')), self._token):
+            send({'type': 'error', 'error': "Invalid or missing token."})
+            return
+
+        if message['op'] == 'ping':
+            send({'type': 'pong'})
+        elif message['op'] == 'status':
+            send({'type': 'status', 'jobs': self.status()})
+        elif message['op'] == 'shutdown':
+            send({'type': 'stopping'})
+            threading.Thread(target=self.shutdown, daemon=True).start()
+        elif message['op'] == 'submit':
+            replies = queue.Queue()
+            try:
+                job_id = self.submit(message.get('job'), listener=replies.put)
+            except ValueError as e:
+                send({'type': 'error', 'error': repr(e)})
+                return
+            send({'type': 'accepted', 'job_id': job_id})
+            while True:
+                reply = replies.get()
+                if reply['type'] != 'event' or message.get('events', False)==True:
+                    send(reply)
+                if reply['type'] in ('done', 'error'):
+                    break
+        else:
+            send({'type': 'error', 'error': f"Unknown op: {message['op']}"})
+
+    def serve_forever(self):
+        """
+        Warms up, then serves requests until shutdown() is called.
+        """
+        self.warm_up()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    daemon._handle(_Stream(self.rfile, self.wfile))
+                except (OSError, ValueError):
+                    pass
+
+        if isinstance(self.address, tuple):
+            self._write_token()
+            self._server = socketserver.ThreadingTCPServer(self.address, Handler)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+            if os.path.exists(self.address):
+                if daemon_running(self.address):
+                    raise RuntimeError(f"A NoteTaker daemon is already running at {self.address}.")
+                os.remove(self.address)
+            self._server = socketserver.ThreadingUnixStreamServer(self.address, Handler)
+            os.chmod(self.address, 0o600)
+        self._server.daemon_threads = True
+
+        print(f"NoteTaker daemon listening at {self.address} with {self.max_jobs} job slot(s).")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.remove(self.address)
+            if self._token is not None and os.path.exists(self.token_path):
+                os.remove(self.token_path)
+
+    def _write_token(self):
+        """
+        Writes a new random token to token_path, readable and writable by the owner only.
+        """
+        self._token = secrets.token_hex(32)
+        os.makedirs(os.path.dirname(os.path.abspath(self.token_path)), exist_ok=True)
+        if os.path.exists(self.token_path):
+            os.remove(self.token_path)
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding="utf-8") as f:
+            f.write(self._token)
+
+    def shutdown(self):
+        """
+        Stops serving new requests, waits for the running jobs to finish, and stops forwarding events.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+        self._executor.shutdown(wait=True)
+        remove_event_handler(self._forward_event)
+
+class _Stream:
+    """
+    Joins the read and write halves of a socket connection into one line stream.
+    """
+    def __init__(self, rfile, wfile):
+        self.readline = rfile.readline
+        self.write = wfile.write
+        self.flush = wfile.flush
@@ -0,0 +1,194 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from NoteTaker_Probe import probe_audio
+from OpenAI_Summarizer import count_tokens_batch
+
+# Default prices per model. Transcription is billed per minute of audio, and summarization per 1,000 tokens.
+MODEL_PRICES = {
+    'whisper-1': {'USD_per_min': 0.006},
+    'gpt-3.5-turbo': {'USD_per_1k': 0.002},
+}
+
+def _model_price(model:str, unit:str) -> float:
+    """
+    Returns the default price of a model from MODEL_PRICES, in the given unit ('USD_per_min' or 'USD_per_1k').
+    """
+    try:
+        return MODEL_PRICES[model][unit]
+    except KeyError:
+        raise ValueError(f"No default {unit} price for model '{model}'. Pass {unit} to set its price.") from None
+
+class NoteTaker_Estimator:
+    """
+    This class estimates the cost and wall-clock time of a batch of NoteTaker jobs before anything is
+    uploaded. Durations are read from file headers, transcripts that already exist are counted with
+    tiktoken, and the length of the others is predicted from the audio duration. No API calls are made.
+
+    -----------
+    Parameters:
+    -----------
+
+    - transcriber_model (str): The transcriber model whose price is used. Defaults to "whisper-1".
+    - summarizer_model (str): The summarizer model whose price is used. Defaults to "gpt-3.5-turbo".
+    - USD_per_min (float): Overrides the transcription price per minute of MODEL_PRICES. Defaults to None.
+    - USD_per_1k (float): Overrides the summarization price per 1,000 tokens of MODEL_PRICES. Defaults to None.
+    - encoding_name (str): The tiktoken encoding used to count transcript tokens. Defaults to "cl100k_base".
+    - tokens_per_min (float): The predicted transcript tokens per minute of speech. Defaults to 200.
+    - tokens_per_item (float): The predicted output tokens per bullet point. Defaults to 40.
+    - transcription_s_per_min (float): The predicted transcription latency per minute of audio. Defaults to 2.0.
+    - upload_MB_per_s (float): The predicted upload throughput. Defaults to 2.0.
+    - output_tokens_per_s (float): The predicted generation speed of the summarizer model. Defaults to 50.
+    - request_overhead_s (float): The predicted fixed latency of each API request. Defaults to 1.0.
+
+    --------
+    Methods:
+    --------
+
+    - estimate(files, prompts, transcript_dir=None, transcripts=None, max_api_concurrency=4): Returns the per-file and total cost and time estimates.
+
+    -----------
+    Attributes:
+    -----------
+
+    - USD_per_min (float): The transcription price per minute used in the estimates.
+    - USD_per_1k (float): The summarization price per 1,000 tokens used in the estimates.
+    - estimates (dict): The result of the last call to estimate().
+
+    ---------
+    Examples:
+    ---------
+
+    estimator = NoteTaker_Estimator()
+    estimates = estimator.estimate(files=["Data/Input/DSSoc Mentorship/Mentorship_Vid_Pt2.mp4"],
+                                   prompts=[{'system_prompt': role_txt, 'n_items': 6},
+                                            {'system_prompt': role_txt, 'n_items': 10}],
+                                   transcript_dir="Data/Output/DSSoc Mentorship")
+    print(estimates['total'])
+    """
+    def __init__(self,
+                 transcriber_model:str = "whisper-1",
+                 summarizer_model:str = "gpt-3.5-turbo",
+                 USD_per_min:float = None,
+                 USD_per_1k:float = None,
+                 encoding_name:str = "cl100k_base",
+                 tokens_per_min:float = 200,
+                 tokens_per_item:float = 40,
+                 transcription_s_per_min:float = 2.0,
+                 upload_MB_per_s:float = 2.0,
+                 output_tokens_per_s:float = 50,
+                 request_overhead_s:float = 1.0):
+        self.transcriber_model = transcriber_model
+        self.summarizer_model = summarizer_model
+        self.USD_per_min = USD_per_min if USD_per_min is not None else _model_price(transcriber_model, 'USD_per_min')
+        self.USD_per_1k = USD_per_1k if USD_per_1k is not None else _model_price(summarizer_model, 'USD_per_1k')
+        self.encoding_name = encoding_name
+        self.tokens_per_min = tokens_per_min
+        self.tokens_per_item = tokens_per_item
+        self.transcription_s_per_min = transcription_s_per_min
+        self.upload_MB_per_s = upload_MB_per_s
+        self.output_tokens_per_s = output_tokens_per_s
+        self.request_overhead_s = request_overhead_s
+
+    def _find_transcript(self, input_path:str, transcript_dir:str):
+        if transcript_dir is None:
+            return None
+
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        for filename in (f"{stem} [Transcribed].txt", f"{stem}.txt"):
+            path = os.path.join(transcript_dir, filename)
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+    def estimate(self,
+                 files:list,
+                 prompts:list,
+                 transcript_dir:str = None,
+                 transcripts:dict = None,
+                 max_api_concurrency:int = 4) -> dict:
+        """
+        Estimates the cost and wall-clock time of transcribing each file and summarizing it once per prompt.
+
+        Parameters:
+        -----------
+        files : list
+            The paths to the recordings.
+        prompts : list
+            One dictionary per summary to generate for each file, with the keys 'system_prompt' and 'n_items'.
+        transcript_dir : str, optional
+            A directory of existing transcripts named "<name> [Transcribed].txt" or "<name>.txt". Files
+            with an existing transcript are not charged for transcription, and their real token count is used.
+        transcripts : dict, optional
+            The path to the existing transcript of each file, for transcripts that are not in transcript_dir.
+        max_api_concurrency : int, optional
+            The number of jobs expected to run at the same time. Default is 4.
+
+        Returns:
+        --------
+        dict
+            'files' maps each path to its 'duration', 'transcript_tokens', 'transcript_source',
+            'transcription_price', 'summarization_price', 'total_price' and 'wall_clock_s'.
+            'total' holds the summed prices and the wall-clock estimate of the whole batch.
+        """
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            probes = list(executor.map(probe_audio, files))
+
+        transcripts = transcripts or {}
+        transcript_paths = [transcripts.get(path) or self._find_transcript(path, transcript_dir) for path in files]
+        existing = [i for i, path in enumerate(transcript_paths) if path is not None]
+        existing_texts = []
+        for i in existing:
+            with open(transcript_paths[i], 'r', encoding="utf-8") as f:
+                existing_texts.append(f.read())
+
+        existing_tokens = dict(zip(existing, count_tokens_batch(existing_texts, self.encoding_name)))
+        prompt_tokens = count_tokens_batch([prompt['system_prompt'] or "" for prompt in prompts], self.encoding_name)
+
+        self.estimates = {'files': {}, 'total': {}}
+
+        for i, (path, probe) in enumerate(zip(files, probes)):
+            minutes = probe['duration'] / 60.0
+
+            if i in existing_tokens:
+                transcript_tokens = existing_tokens[i]
+                transcription_price = 0.0
+                transcription_s = 0.0
+            else:
+                transcript_tokens = int(minutes * self.tokens_per_min)
+                transcription_price = minutes * self.USD_per_min
+                transcription_s = (self.request_overhead_s
+                                   + probe['size_mb'] / self.upload_MB_per_s
+                                   + minutes * self.transcription_s_per_min)
+
+            summarization_price = 0.0
+            summarization_s = 0.0
+            for prompt, n_prompt_tokens in zip(prompts, prompt_tokens):
+                output_tokens = (prompt['n_items'] or 5) * self.tokens_per_item
+                summarization_price += (transcript_tokens + n_prompt_tokens + output_tokens) * (self.USD_per_1k / 1000.0)
+                summarization_s += self.request_overhead_s + output_tokens / self.output_tokens_per_s
+
+            self.estimates['files'][path] = {'duration': probe['duration'],
+                                             'transcript_tokens': transcript_tokens,
+                                             'transcript_source': 'existing' if i in existing_tokens else 'predicted',
+                                             'transcription_price': transcription_price,
+                                             'summarization_price': summarization_price,
+                                             'total_price': transcription_price + summarization_price,
+                                             'wall_clock_s': transcription_s + summarization_s}
+
+        per_file = self.estimates['files'].values()
+        busy_s = sum(estimate['wall_clock_s'] for estimate in per_file)
+        longest_s = max((estimate['wall_clock_s'] for estimate in per_file), default=0.0)
+
+        self.estimates['total'] = {'files': len(files),
+                                   'duration': sum(estimate['duration'] for estimate in per_file),
+                                   'transcription_price': sum(estimate['transcription_price'] for estimate in per_file),
+                                   'summarization_price': sum(estimate['summarization_price'] for estimate in per_file),
+                                   'total_price': sum(estimate['total_price'] for estimate in per_file),
+                                   'wall_clock_s': max(busy_s / max_api_concurrency, longest_s)}
+
+        print(f"Estimated total price: {self.estimates['total']['total_price']:.5f} USD")
+        print(f"Estimated wall-clock time: {self.estimates['total']['wall_clock_s']:.0f} s")
+
+        return self.estimates
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import itertools
+import threading
+import contextvars
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Fields added to every event emitted in the current context, e.g. the file being processed.
+_context_fields = contextvars.ContextVar('notetaker_event_fields', default={})
+_current_stage = contextvars.ContextVar('notetaker_event_stage', default=None)
+
+_handlers = []
+_handlers_lock = threading.Lock()
+_stage_ids = itertools.count(1)
+
+class JSONL_Event_Writer:
+    """
+    An event handler that appends every event to a JSON Lines file, one JSON object per line. Writes
+    from several threads are serialized, and each line is flushed so the file can be tailed live.
+
+    -----------
+    Parameters:
+    -----------
+
+    - path (str): The path to the .jsonl file. Created if it does not exist, appended to otherwise.
+
+    ---------
+    Examples:
+    ---------
+
+    writer = JSONL_Event_Writer("Data/Output/events.jsonl")
+    add_event_handler(writer)
+    note_taker.take_notes(system_prompt=role_txt, n_items=5)
+    remove_event_handler(writer)
+    writer.close()
+    """
+    def __init__(self, path:str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event:dict):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(f"{line}\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def add_event_handler(handler):
+    """
+    Registers a callable that receives every event as a dictionary. Handlers are called in the thread
+    that emitted the event, so they should be quick and thread-safe.
+    """
+    with _handlers_lock:
+        _handlers.append(handler)
+
+    return handler
+
+def remove_event_handler(handler):
+    """
+    Unregisters a handler added with add_event_handler().
+    """
+    with _handlers_lock:
+        if handler in _handlers:
+            _handlers.remove(handler)
+
+def events_enabled() -> bool:
+    """
+    Returns True if at least one handler is registered, so that metrics which are costly to compute
+    can be skipped otherwise.
+    """
+    return bool(_handlers)
+
+def emit(event:str, **fields):
+    """
+    Sends an event to every registered handler. Besides the given fields, each event carries its name,
+    a Unix timestamp, the thread name, the fields of event_context() and the id of the enclosing stage.
+    Does nothing when no handler is registered.
+    """
+    if not _handlers:
+        return
+
+    record = {'event': event,
+              'time': time.time(),
+              'thread': threading.current_thread().name,
+              'parent_id': _current_stage.get()}
+    record.update(_context_fields.get())
+    record.update(fields)
+
+    with _handlers_lock:
+        handlers = list(_handlers)
+    for handler in handlers:
+        handler(record)
+
+@contextlib.contextmanager
+def event_context(**fields):
+    """
+    Adds the given fields to every event emitted inside the block, including events emitted by nested
+    calls. Use bind_context() to carry the fields into worker threads.
+
+    Examples:
+    ---------
+    with event_context(file="audio_file.mp3", job="mentorship"):
+        note_taker.take_notes(system_prompt=role_txt, n_items=5)
+    """
+    token = _context_fields.set({**_context_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _context_fields.reset(token)
+
+def bind_context(fn):
+    """
+    Returns a wrapper of fn that runs it in a copy of the caller's event context, so that events emitted
+    by fn in a thread pool keep the fields and parent stage of the code that submitted it.
+    """
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run_in_context
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident memory of the process so far in MB, or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+@contextlib.contextmanager
+def stage(name:str, **fields):
+    """
+    Times a pipeline stage, emitting a 'stage_start' event on entry and a 'stage_end' event on exit.
+    The 'stage_end' event carries the wall time, the status ('ok' or 'error'), the error if any and the
+    peak RSS of the process. The block receives a dictionary whose entries are added to the 'stage_end'
+    event, for metrics only known at the end such as tokens, bytes uploaded, cost or cache hits.
+
+    Examples:
+    ---------
+    with stage('upload', model="whisper-1") as metrics:
+        response = upload(audio_file)
+        metrics['bytes_uploaded'] = size
+    """
+    metrics = {}
+    if not _handlers:
+        yield metrics
+        return
+
+    stage_id = next(_stage_ids)
+    emit('stage_start', stage=name, stage_id=stage_id, **fields)
+    token = _current_stage.set(stage_id)
+    start = time.perf_counter()
+    status, error = 'ok', None
+
+    try:
+        yield metrics
+    except BaseException as e:
+        status, error = 'error', repr(e)
+        raise
+    finally:
+        wall_s = time.perf_counter() - start
+        _current_stage.reset(token)
+        emit('stage_end', stage=name, stage_id=stage_id, wall_s=wall_s, status=status, error=error,
+             peak_rss_mb=peak_rss_mb(), **{**fields, **metrics})
+
+# Setting NOTETAKER_EVENTS to a file path writes the events of every run to that file.
+if os.environ.get("NOTETAKER_EVENTS"):
+    add_event_handler(JSONL_Event_Writer(os.environ["NOTETAKER_EVENTS"]))
@@ -0,0 +1,355 @@
+import io
+import os
+import time
+import threading
+
+from pydub import AudioSegment
+from pydub.audio_segment import extract_wav_headers, fix_wav_headers, read_wav_audio
+from pydub.silence import detect_silence
+
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Transcriber import OpenAI_Transcriber
+from OpenAI_Summarizer import OpenAI_Summarizer, sum_usage
+from NoteTaker_Events import stage
+
+class NoteTaker_Live(OpenAI_NoteTaker):
+    """
+    This class takes notes of a recording while it is still being written, such as a live meeting.
+    The file is polled as it grows, and only the newly appended audio is decoded and transcribed, in
+    segments cut at silences a few seconds behind the end of the file so that no word is cut in half.
+    The transcript grows segment by segment, and the notes are refreshed incrementally: the new part of
+    the transcript is summarized on its own, and the partial notes are combined into the current notes.
+    When the recording stops growing, the tail is transcribed and the final notes are ready seconds later.
+
+    -----------
+    Parameters:
+    -----------
+
+    - input_dir (str): The path to the recording being written.
+    - min_segment_s (float): The minimum length of new audio transcribed at once, in seconds. Defaults to 30.
+    - max_segment_s (float): The maximum length of audio transcribed at once, in seconds. Defaults to 600.
+    - guard_s (float): How far behind the end of the file a segment must end, in seconds, since the last
+      moments of a growing file may still be incomplete. Defaults to 2.
+    - search_window_s (float): How far back from the segment end to look for a silence to cut at, in seconds. Defaults to 10.
+    - min_silence_len (int): The minimum length of a silence to cut at, in milliseconds. Defaults to 500.
+    - silence_thresh (int): The loudness in dBFS below which audio is considered silent. Defaults to -40.
+    - **notetaker_kwargs: Passed on to OpenAI_NoteTaker, e.g. transcriber_model and summarizer_model.
+
+    --------
+    Methods:
+    --------
+
+    - poll(final=False): Transcribes the next finalized segment of new audio, if any.
+    - refresh_notes(system_prompt, n_items): Summarizes the transcript added since the last refresh and updates the notes.
+    - follow(system_prompt, n_items, ...): Follows the recording until it stops growing, yielding segments and notes as they arrive.
+    - stop(): Makes follow() transcribe the rest of the recording and finish.
+    - save_notes(export_transcription_dir, export_summary_dir): Saves the transcript and the notes.
+    - get_total_job_price(): Calculates the total price of the job.
+
+    -----------
+    Attributes:
+    -----------
+
+    - processed_s (float): The length of the recording transcribed so far, in seconds.
+    - Transcriber (OpenAI_Transcriber): Holds the rolling transcript in transcript_text and transcript_segments.
+    - Summarizer (OpenAI_Summarizer): Holds the current notes in summarized_text, and their token usage.
+
+    ---------
+    Examples:
+    ---------
+
+    live = NoteTaker_Live(input_dir="Data/Input/meeting.wav")
+    for update in live.follow(system_prompt=role_txt, n_items=6, refresh_every_s=300):
+        if update['type'] == 'notes':
+            print(update['notes'])
+    live.save_notes(export_transcription_dir="Data/Output/meeting [Transcribed]",
+                    export_summary_dir="Data/Output/meeting [Notes]")
+    """
+    def __init__(self,
+                 input_dir:str,
+                 min_segment_s:float = 30.0,
+                 max_segment_s:float = 600.0,
+                 guard_s:float = 2.0,
+                 search_window_s:float = 10.0,
+                 min_silence_len:int = 500,
+                 silence_thresh:int = -40,
+                 **notetaker_kwargs):
+        super().__init__(input_dir=input_dir, **notetaker_kwargs)
+        self.min_segment_s = min_segment_s
+        self.max_segment_s = max_segment_s
+        self.guard_s = guard_s
+        self.search_window_s = search_window_s
+        self.min_silence_len = min_silence_len
+        self.silence_thresh = silence_thresh
+
+        self.Transcriber = OpenAI_Transcriber(input_dir = self.input_dir,
+                                              transcriber_model = self.transcriber_model,
+                                              USD_per_min = self.USD_per_min,
+                                              transcript_cache = self.transcript_cache,
+                                              client = self.client)
+        # segments are uploaded from memory, so the whole-file handles opened by both Transcribers are never read
+        self.audio_file.close()
+        self.Transcriber.audio_file.close()
+        self.Summarizer = OpenAI_Summarizer(transcript_text = "",
+                                            summarizer_model = self.summarizer_model,
+                                            USD_per_1k = self.USD_per_1k,
+                                            encoding_name = self.encoding_name,
+                                            summary_cache = self.summary_cache,
+                                            client = self.client)
+        self.Transcriber.transcript_segments = []
+        self.Transcriber.transcript_text = ""
+        self.Transcribed_Audio = ""
+
+        self.processed_s = 0.0
+        self.partial_completions = []
+        self.reduce_completions = []
+        self._summarized_segments = 0
+        self._polled_size = None
+        self._wav_format = None
+        self._decoded_audio = None
+        self._decoded_start_s = 0.0
+        self._decoded_end_s = 0.0
+        self._stopped = threading.Event()
+        
+    def _read_new_audio(self) -> AudioSegment:
+        """
+        Decodes the audio appended after `processed_s`. For WAV recordings, only the new PCM bytes are
+        read, since the header of a file that is still being written does not hold its final length yet.
+        Other formats are decoded by ffmpeg, and the decoded audio not transcribed yet is kept between
+        polls, so that only what was appended since the last poll, plus the last `guard_s` seconds that
+        may have been decoded from an incomplete tail, is decoded again.
+        """
+        if not (self.input_dir.lower().endswith(".wav") or "wav" in self.Transcriber.filetype):
+            if self._decoded_audio is not None and self._decoded_start_s <= self.processed_s <= self._decoded_end_s:
+                audio = self._decoded_audio[int(round((self.processed_s - self._decoded_start_s) * 1000)):]
+                audio += AudioSegment.from_file(self.input_dir, start_second=self._decoded_end_s)
+            else:
+                audio = AudioSegment.from_file(self.input_dir, start_second=self.processed_s)
+
+            keep_ms = max(0, len(audio) - int(self.guard_s * 1000))
+            self._decoded_audio = audio[:keep_ms]
+            self._decoded_start_s = self.processed_s
+            self._decoded_end_s = self.processed_s + keep_ms / 1000.0
+            return audio
+        
+        with open(self.input_dir, 'rb') as f:
+            if self._wav_format is None:
+                header = bytearray(f.read(64 * 1024))
+                fix_wav_headers(header)
+                wav = read_wav_audio(header)
+                self._wav_format = {'data_offset': extract_wav_headers(header)[-1].position + 8, 
+                                    'sample_width': wav.bits_per_sample // 8, 
+                                    'frame_rate': wav.sample_rate, 
+                                    'channels': wav.channels}
+            
+            wav_format = self._wav_format
+            frame_size = wav_format['sample_width'] * wav_format['channels']
+            f.seek(wav_format['data_offset'] + int(round(self.processed_s * wav_format['frame_rate'])) * frame_size)
+            raw_data = f.read()
+        
+        return AudioSegment(data=raw_data[:len(raw_data) // frame_size * frame_size], 
+                            sample_width=wav_format['sample_width'], 
+                            frame_rate=wav_format['frame_rate'], 
+                            channels=wav_format['channels'])
+
+    def _segment_end_ms(self, audio:AudioSegment, final:bool):
+        """
+        Returns where the next segment of the new audio ends, in milliseconds from its start, or None if
+        not enough finalized audio has been appended yet.
+        """
+        max_segment_ms = int(self.max_segment_s * 1000)
+        if final:
+            return min(len(audio), max_segment_ms) if len(audio) > 0 else None
+
+        end_ms = min(len(audio) - int(self.guard_s * 1000), max_segment_ms)
+        if end_ms < self.min_segment_s * 1000:
+            return None
+
+        window_start_ms = max(0, end_ms - int(self.search_window_s * 1000))
+        silences = detect_silence(audio[window_start_ms:end_ms],
+                                  min_silence_len=self.min_silence_len,
+                                  silence_thresh=self.silence_thresh,
+                                  seek_step=10)
+        if silences:
+            silence_start, silence_end = silences[-1]
+            end_ms = window_start_ms + (silence_start + silence_end) // 2
+
+        return end_ms
+
+    def poll(self, final:bool = False) -> list:
+        """
+        Decodes the audio appended since the last segment and, once enough of it is finalized, transcribes
+        the next segment and appends it to the rolling transcript.
+
+        Parameters:
+        -----------
+        final : bool, optional
+            If True, the recording is treated as finished, so the audio up to the end of the file is
+            transcribed, without waiting for `min_segment_s` or keeping `guard_s` back. Default is False.
+
+        Returns:
+        --------
+        list
+            The new transcript segments, empty if there was nothing to transcribe yet.
+        """
+        size = os.path.getsize(self.input_dir)
+        if not final and size == self._polled_size:
+            return []
+        self._polled_size = size
+
+        audio = self._read_new_audio()
+        end_ms = self._segment_end_ms(audio, final)
+        if end_ms is None or end_ms < 100:
+            return []
+
+        # more audio may be finalized after this segment
+        self._polled_size = None
+
+        chunk_file = io.BytesIO()
+        audio[:end_ms].export(chunk_file,
+                              format="mp3",
+                              bitrate="64k",
+                              parameters=["-ac", "1", "-ar", "16000"])
+        chunk_file.name = f"live_{len(self.Transcriber.transcript_segments)}.mp3"
+
+        with stage('live_segment', index=len(self.Transcriber.transcript_segments)) as metrics:
+            transcript = self.Transcriber._upload(chunk_file, upload_start_s=self.processed_s)
+            metrics.update(audio_s=end_ms / 1000.0,
+                           cost_usd=end_ms / 1000.0 * (self.USD_per_min/60.0))
+
+        segment = {'index': len(self.Transcriber.transcript_segments),
+                   'start': self.processed_s,
+                   'end': self.processed_s + end_ms / 1000.0,
+                   'text': transcript['text'].strip(),
+                   'timed_segments': transcript['timed_segments']}
+        self.processed_s = segment['end']
+
+        self.Transcriber.transcript_segments.append(segment)
+        self.Transcriber.transcript_text = ' '.join(s['text'] for s in self.Transcriber.transcript_segments)
+        self.Transcriber.timed_segments.extend(segment['timed_segments'])
+        self.Transcriber.transcript = {'text': self.Transcriber.transcript_text,
+                                       'segments': self.Transcriber.transcript_segments,
+                                       'timed_segments': self.Transcriber.timed_segments}
+        self.Transcribed_Audio = self.Transcriber.transcript_text
+
+        return [segment]
+
+    def refresh_notes(self,
+                      system_prompt:str = None,
+                      n_items:int = None,
+                      use_cache:bool = True) -> str:
+        """
+        Updates the notes with the segments transcribed since the last refresh. Only the new part of the
+        transcript is summarized, and the partial notes of every refresh so far are combined into the
+        current notes. The transcript is never summarized twice, but the combining prompt holds every
+        partial note so far, so its tokens grow with the length of the meeting; refresh less often, with
+        a larger `refresh_every_s` in follow(), to keep long meetings cheap.
+
+        Returns:
+        --------
+        str
+            The current notes, or None if nothing has been transcribed yet.
+        """
+        self.system_prompt, self.n_items = system_prompt, n_items
+        new_segments = self.Transcriber.transcript_segments[self._summarized_segments:]
+        new_text = ' '.join(segment['text'] for segment in new_segments).strip()
+
+        with stage('live_notes_refresh', new_segments=len(new_segments)):
+            if new_text:
+                self.partial_completions.append(self.Summarizer._chat_completion(system_prompt = system_prompt,
+                                                                                 user_content = self.Summarizer._map_prompt(new_text),
+                                                                                 use_cache = use_cache))
+            self._summarized_segments = len(self.Transcriber.transcript_segments)
+
+            if not self.partial_completions:
+                return None
+            if not new_text and self.reduce_completions:
+                return self.Summarizer.summarized_text
+
+            completion = self.Summarizer._chat_completion(system_prompt = system_prompt,
+                                                          user_content = self.Summarizer._reduce_prompt([c['summarized_text'] for c in self.partial_completions], n_items),
+                                                          use_cache = use_cache)
+            self.reduce_completions.append(completion)
+
+        self.Summarizer.transcript_text = self.Transcribed_Audio
+        self.Summarizer._set_map_reduce_result(self.partial_completions, completion)
+        self.Summarizer.phase_usage_dict['reduce'] = sum_usage([c['usage'] for c in self.reduce_completions])
+        self.Summarizer.output_usage_dict = sum_usage(self.Summarizer.phase_usage_dict.values())
+        self.Summarizer.output_tokens_count = self.Summarizer.output_usage_dict['total_tokens']
+
+        return self.Summarizer.summarized_text
+
+    def stop(self):
+        """
+        Makes follow() treat the recording as finished: the rest of it is transcribed and the final notes are generated.
+        """
+        self._stopped.set()
+
+    def follow(self,
+               system_prompt:str = None,
+               n_items:int = None,
+               poll_interval_s:float = 5.0,
+               idle_timeout_s:float = 30.0,
+               refresh_every_s:float = 120.0,
+               use_cache:bool = True,
+               show_notes:bool = False):
+        """
+        Follows the recording as it grows, transcribing finalized segments and refreshing the notes, until
+        the file has not grown for `idle_timeout_s` seconds or stop() is called. The rest of the recording
+        is then transcribed and the final notes are generated.
+
+        Parameters:
+        -----------
+        system_prompt : str, optional
+            The prompt that is used to generate the notes.
+        n_items : int, optional
+            The number of bullet points in the notes.
+        poll_interval_s : float, optional
+            How often the file is checked for new audio, in seconds. Default is 5.
+        idle_timeout_s : float, optional
+            How long the file must stop growing before the recording is considered finished, in seconds. Default is 30.
+        refresh_every_s : float, optional
+            How much new audio is transcribed between refreshes of the notes, in seconds. Default is 120.
+        use_cache : bool, optional
+            If True, the summary cache is used. Default is True.
+        show_notes : bool, optional
+            If True, the notes are printed after every refresh. Default is False.
+
+        Yields:
+        -------
+        dict
+            {'type': 'segment', 'segment': ...} for every transcribed segment, and
+            {'type': 'notes', 'notes': ..., 'final': ...} for every refresh of the notes.
+        """
+        last_size = None
+        last_growth = time.monotonic()
+        refreshed_s = 0.0
+
+        while True:
+            size = os.path.getsize(self.input_dir)
+            if size != last_size:
+                last_size = size
+                last_growth = time.monotonic()
+            finished = self._stopped.is_set() or time.monotonic() - last_growth >= idle_timeout_s
+
+            segments = self.poll(final=finished)
+            for segment in segments:
+                yield {'type': 'segment', 'segment': segment}
+
+            if segments and not finished and self.processed_s - refreshed_s >= refresh_every_s:
+                refreshed_s = self.processed_s
+                notes = self.refresh_notes(system_prompt=system_prompt, n_items=n_items, use_cache=use_cache)
+                if show_notes==True:
+                    print(notes)
+                yield {'type': 'notes', 'notes': notes, 'final': False}
+
+            if finished and not segments:
+                break
+            if not segments:
+                self._stopped.wait(poll_interval_s)
+
+        notes = self.refresh_notes(system_prompt=system_prompt, n_items=n_items, use_cache=use_cache)
+        if show_notes==True:
+            print(f"NoteTaker's Summary in {n_items} points: \n")
+            print(notes)
+        yield {'type': 'notes', 'notes': notes, 'final': True}
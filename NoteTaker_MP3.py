@@ -0,0 +1,264 @@
+import io
+import mmap
+from functools import lru_cache
+
+import numpy as np
+
+# Bitrates in kbps by bitrate index, for (MPEG-1, layer) and (MPEG-2/2.5, layer). Index 0 is the
+# free format, which has no fixed frame length and is not supported.
+_BITRATES_KBPS = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+def parse_frame_header(header:int):
+    """
+    Parses the 32-bit header of an MPEG audio frame.
+
+    Returns:
+    --------
+    tuple or None
+        The (frame length in bytes, samples per frame, sample rate) of the frame, or None if the
+        header is not a valid frame header.
+    """
+    if header >> 21 != 0x7FF:
+        return None
+
+    version = _VERSIONS.get((header >> 19) & 0b11)
+    layer = _LAYERS.get((header >> 17) & 0b11)
+    bitrate_index = (header >> 12) & 0b1111
+    sample_rate_index = (header >> 10) & 0b11
+    padding = (header >> 9) & 0b1
+    if version is None or layer is None or bitrate_index in (0, 0b1111) or sample_rate_index == 0b11:
+        return None
+
+    bitrate = _BITRATES_KBPS[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    if layer == 3 and version != 1:
+        return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+    return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+def _id3v2_size(data) -> int:
+    """
+    Returns the size of the ID3v2 tag at the start of the data, or 0 if there is none.
+    """
+    if len(data) < 10 or bytes(data[:3]) != b"ID3":
+        return 0
+
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+_WINDOW_BYTES = 1 << 22
+
+@lru_cache(maxsize=1)
+def _header_tables():
+    """
+    Returns the frame length in bytes, samples per frame and sample rate of every frame header, indexed
+    by the 13 header bits after the frame sync that they depend on. Invalid headers have length 0.
+    """
+    lengths = np.zeros(1 << 13, dtype=np.int64)
+    samples = np.zeros(1 << 13, dtype=np.int64)
+    rates = np.ones(1 << 13, dtype=np.int64)
+    for key in range(1 << 13):
+        frame = parse_frame_header((0xFFE0 << 16) | (key << 8))
+        if frame is not None:
+            lengths[key], samples[key], rates[key] = frame
+
+    return lengths, samples, rates
+
+def _frame_candidates(data):
+    """
+    Returns the positions of every valid frame header in the data, with the frame length, samples
+    per frame and sample rate of each. The sync bytes are searched with NumPy, one window at a time,
+    so the temporary arrays stay small however large the file is.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    size = len(buffer)
+    positions = []
+    for window_start in range(0, max(size - 3, 0), _WINDOW_BYTES):
+        window = buffer[window_start:min(window_start + _WINDOW_BYTES, size - 3) + 2]
+        hits = np.flatnonzero(window[:-2] == 0xFF)
+        positions.append(hits[window[hits + 1] >= 0xE0] + window_start)
+    positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+
+    lengths, samples, rates = _header_tables()
+    keys = ((buffer[positions + 1].astype(np.int64) & 0x1F) << 8) | buffer[positions + 2]
+    frame_lengths = lengths[keys]
+    valid = (frame_lengths > 0) & (positions + frame_lengths <= size)
+
+    return positions[valid], frame_lengths[valid], samples[keys[valid]], rates[keys[valid]]
+
+def _chain(jumps:list, first:int, end:int) -> np.ndarray:
+    """
+    Returns the indices of the frames chained from `first`, each starting where the previous one ends,
+    with the jump tables of _frame_chains(). The chain is followed by doubling, without a Python loop
+    over its frames.
+    """
+    last, n_steps = first, 0
+    for level in range(len(jumps) - 1, -1, -1):
+        if jumps[level][last] != end:
+            last = jumps[level][last]
+            n_steps += 1 << level
+
+    steps = np.arange(n_steps + 1)
+    chain = np.full(n_steps + 1, first, dtype=np.int64)
+    for level in range(len(jumps)):
+        take = (steps >> level) & 1 == 1
+        chain[take] = jumps[level][chain[take]]
+
+    return chain
+
+def frame_index(data) -> dict:
+    """
+    Walks the MPEG audio frames of an MP3 file in memory, e.g. a memory-mapped file, without decoding
+    them. Tags (ID3v2 at the start, ID3v1 or APE at the end) and a leading Xing/Info/VBRI header frame
+    are skipped, and junk between frames is skipped by searching for the next frame sync. A frame found
+    after junk only counts if the frame after it is valid too, so stray sync bytes are not mistaken
+    for frames.
+
+    The frame headers are found and parsed with NumPy, and runs of back-to-back frames are followed by
+    pointer doubling, so only junk between frames costs Python-level steps.
+
+    Parameters:
+    -----------
+    data: bytes, memoryview or mmap.mmap
+        The bytes of the MP3 file.
+
+    Returns:
+    --------
+    dict
+        'offsets' and 'ends', the byte offsets where each frame starts and ends, and 'starts_s' and
+        'ends_s', the times in seconds where each frame starts and ends, as NumPy arrays.
+    """
+    size = len(data)
+    positions, lengths, samples, rates = _frame_candidates(data)
+    n = len(positions)
+
+    # the frame that starts where each frame ends, or n if there is none
+    ends = positions + lengths
+    follower = np.searchsorted(positions, ends)
+    follower[(follower < n) & (positions[np.minimum(follower, n - 1)] != ends)] = n
+    jumps = [np.append(follower, n)]
+    while len(jumps) < max(n, 1).bit_length():
+        jumps.append(jumps[-1][jumps[-1]])
+
+    # a frame found after junk, or at the start, only counts if it is followed by a frame or ends the file
+    confirmed = np.flatnonzero((follower < n) | (ends == size))
+
+    frames = []
+    pos = _id3v2_size(data)
+    while True:
+        next_confirmed = np.searchsorted(positions[confirmed], pos)
+        if next_confirmed == len(confirmed):
+            break
+        chain = _chain(jumps, int(confirmed[next_confirmed]), n)
+        frames.append(chain)
+        pos = int(ends[chain[-1]])
+
+    frames = np.concatenate(frames) if frames else np.zeros(0, dtype=np.int64)
+
+    # the first frame of a VBR file may be a header frame without audio, which describes the whole file
+    if len(frames) and any(tag in bytes(data[positions[frames[0]]:positions[frames[0]] + min(lengths[frames[0]], 64)]) for tag in (b"Xing", b"Info", b"VBRI")):
+        frames = frames[1:]
+
+    offsets = positions[frames]
+    durations = samples[frames] / rates[frames]
+    ends_s = np.cumsum(durations)
+
+    return {'offsets': offsets,
+            'ends': offsets + lengths[frames],
+            'starts_s': ends_s - durations,
+            'ends_s': ends_s}
+
+def split_frames(index:dict,
+                 max_chunk_bytes:int,
+                 max_chunk_s:float = None) -> list:
+    """
+    Groups consecutive frames of a frame_index() into chunks of at most `max_chunk_bytes` bytes and,
+    if given, at most `max_chunk_s` seconds. Every chunk holds at least one frame.
+
+    Returns:
+    --------
+    list
+        The (start byte, end byte, start second, end second) of each chunk.
+    """
+    offsets, ends, starts_s, ends_s = index['offsets'], index['ends'], index['starts_s'], index['ends_s']
+
+    chunks = []
+    first = 0
+    while first < len(offsets):
+        last = int(np.searchsorted(ends, offsets[first] + max_chunk_bytes, side='right'))
+        if max_chunk_s is not None:
+            last = min(last, int(np.searchsorted(ends_s, starts_s[first] + max_chunk_s, side='right')))
+        last = max(last, first + 1)
+
+        chunks.append((int(offsets[first]), int(ends[last - 1]), float(starts_s[first]), float(ends_s[last - 1])))
+        first = last
+
+    return chunks
+
+def map_file(path:str) -> memoryview:
+    """
+    Memory-maps a file read-only and returns a memoryview of it. Slices of the view share the mapping,
+    so chunks of the file are cut without copying, and only the pages that are read are loaded.
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, io.SEEK_END) == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+class Memory_File(io.RawIOBase):
+    """
+    A read-only, seekable file over a bytes-like object, e.g. a slice of a memory-mapped file, that
+    can be uploaded like an open file without copying the slice first.
+
+    -----------
+    Parameters:
+    -----------
+
+    - view (memoryview): The bytes of the file.
+    - name (str): The file name sent with uploads, whose extension tells the API the format.
+    """
+    def __init__(self, view:memoryview, name:str):
+        self._view = view
+        self._pos = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def read(self, size:int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return data
+
+    def seek(self, offset:int, whence:int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
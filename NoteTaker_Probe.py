@@ -0,0 +1,114 @@
+import os
+import wave
+from functools import lru_cache
+
+import ffmpeg
+from pydub import AudioSegment
+
+def probe_audio(input_dir:str) -> dict:
+    """
+    Reads the duration, sample rate, channels, bitrate and size of an audio file without decoding it.
+
+    The result is cached per file, keyed on its absolute path, size and modification time, so repeated
+    calls for the same unchanged file (e.g. from get_filesize, get_duration and get_price) only probe once.
+
+    Parameters:
+    -----------
+    input_dir : str
+        The file path to the audio file to be probed.
+
+    Returns:
+    --------
+    dict
+        A dictionary with the keys 'duration' (s), 'sample_rate' (Hz), 'channels', 'bit_rate' (bps),
+        'size_bytes', 'size_mb' and 'method', the latter being one of 'wave', 'ffprobe' or 'decode'.
+
+    Examples:
+    ---------
+    probe = probe_audio("Data/Input/DSSoc Mentorship/Mentorship_Vid_Pt2.mp4")
+    print(probe['duration'])
+    """
+    stat = os.stat(input_dir)
+    key = (os.path.abspath(input_dir), stat.st_size, stat.st_mtime_ns)
+    if key in _remembered_probes:
+        return dict(_remembered_probes[key])
+
+    return dict(_probe_audio(*key))
+
+# Probes made in other processes, e.g. by the NoteTaker_Batch worker processes, keyed like _probe_audio().
+_remembered_probes = {}
+
+def remember_probe(input_dir:str, probe:dict):
+    """
+    Records the probe of a file made in another process, so that probe_audio() returns it instead of
+    probing the file again. The probe is only used while the file's size and modification time match.
+    """
+    stat = os.stat(input_dir)
+    _remembered_probes[(os.path.abspath(input_dir), stat.st_size, stat.st_mtime_ns)] = dict(probe)
+
+@lru_cache(maxsize=256)
+def _probe_audio(path:str, size_bytes:int, mtime_ns:int) -> dict:
+    """
+    Probes the file from its WAV header or ffprobe metadata, and only decodes it fully as a last resort.
+    """
+    probe = _probe_wave(path) or _probe_ffprobe(path) or _probe_decode(path)
+    probe['size_bytes'] = size_bytes
+    probe['size_mb'] = size_bytes / (1024 * 1024)
+
+    return probe
+
+def _probe_wave(path:str):
+    """
+    Reads the probe fields from a PCM WAV header. Returns None if the file is not a PCM WAV file.
+    """
+    try:
+        with wave.open(path, 'r') as f:
+            rate = f.getframerate()
+            channels = f.getnchannels()
+
+            return {'duration': f.getnframes() / float(rate),
+                    'sample_rate': rate,
+                    'channels': channels,
+                    'bit_rate': rate * channels * f.getsampwidth() * 8,
+                    'method': 'wave'}
+
+    except (wave.Error, EOFError):
+        return None
+
+def _probe_ffprobe(path:str):
+    """
+    Reads the probe fields from the container and stream metadata reported by ffprobe. Returns None if
+    ffprobe is not installed or cannot read the file.
+    """
+    try:
+        metadata = ffmpeg.probe(path)
+    except (ffmpeg.Error, OSError):
+        return None
+
+    audio_streams = [stream for stream in metadata.get('streams', []) if stream.get('codec_type') == 'audio']
+    stream = audio_streams[0] if audio_streams else {}
+    container = metadata.get('format', {})
+
+    duration = container.get('duration', stream.get('duration'))
+    if duration is None:
+        return None
+
+    bit_rate = stream.get('bit_rate', container.get('bit_rate'))
+
+    return {'duration': float(duration),
+            'sample_rate': int(stream['sample_rate']) if 'sample_rate' in stream else None,
+            'channels': stream.get('channels'),
+            'bit_rate': int(bit_rate) if bit_rate is not None else None,
+            'method': 'ffprobe'}
+
+def _probe_decode(path:str) -> dict:
+    """
+    Reads the probe fields by decoding the whole file with pydub.
+    """
+    audio = AudioSegment.from_file(path)
+
+    return {'duration': audio.duration_seconds,
+            'sample_rate': audio.frame_rate,
+            'channels': audio.channels,
+            'bit_rate': audio.frame_rate * audio.channels * audio.sample_width * 8,
+            'method': 'decode'}
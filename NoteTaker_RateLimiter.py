@@ -0,0 +1,203 @@
+import time
+import random
+import asyncio
+import threading
+
+import openai
+
+# Default account limits per model, in requests per minute (rpm) and tokens per minute (tpm).
+# A limit of None is not enforced. Use configure_rate_limit() to match your account's tier.
+DEFAULT_LIMITS = {
+    'whisper-1': {'rpm': 50, 'tpm': None},
+    'gpt-3.5-turbo': {'rpm': 3500, 'tpm': 90000},
+}
+
+# Errors worth retrying: throttling, timeouts, dropped connections and 5xx responses.
+RETRYABLE_ERRORS = (openai.RateLimitError,
+                    openai.APITimeoutError,
+                    openai.APIConnectionError,
+                    openai.InternalServerError)
+
+class Rate_Limiter:
+    """
+    A token-bucket scheduler that keeps API calls to one model under its requests-per-minute and
+    tokens-per-minute limits, and retries throttled or failed calls with jittered exponential backoff.
+
+    Both buckets start full and refill continuously, so short bursts go through immediately while the
+    sustained rate stays at the limit. A call waits until both buckets can cover it.
+
+    -----------
+    Parameters:
+    -----------
+
+    - rpm (int): The requests per minute limit. None disables it. Defaults to None.
+    - tpm (int): The tokens per minute limit. None disables it. Defaults to None.
+    - max_retries (int): The number of retries after a retryable error. Defaults to 6.
+    - base_delay_s (float): The backoff delay before the first retry. Doubles on every retry. Defaults to 1.0.
+    - max_delay_s (float): The cap on the backoff delay. Defaults to 60.0.
+
+    --------
+    Methods:
+    --------
+
+    - acquire(tokens=0): Blocks until the call fits under the limits, then takes it out of the buckets.
+    - acquire_async(tokens=0): Same as acquire(), without blocking the event loop.
+    - call(fn, *args, tokens=0, **kwargs): Calls fn under the limits and retries it on retryable errors.
+    - call_async(fn, *args, tokens=0, **kwargs): Same as call(), for coroutine functions.
+
+    -----------
+    Attributes:
+    -----------
+
+    - retries (int): The number of retries made so far.
+    - waited_s (float): The total time spent waiting for the buckets to refill.
+
+    ---------
+    Examples:
+    ---------
+
+    limiter = get_rate_limiter("gpt-3.5-turbo")
+    response = limiter.call(client.chat.completions.create, model="gpt-3.5-turbo", messages=messages, tokens=1500)
+    """
+    def __init__(self,
+                 rpm:int = None,
+                 tpm:int = None,
+                 max_retries:int = 6,
+                 base_delay_s:float = 1.0,
+                 max_delay_s:float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.retries = 0
+        self.waited_s = 0.0
+
+        self._requests = float(rpm) if rpm else 0.0
+        self._tokens = float(tpm) if tpm else 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens:int) -> float:
+        """
+        Refills the buckets, then either takes the call out of them and returns 0, or returns how long
+        to wait before the buckets can cover it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+
+            wait_s = 0.0
+            if self.rpm:
+                self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+                if self._requests < 1:
+                    wait_s = max(wait_s, (1 - self._requests) * 60.0 / self.rpm)
+            if self.tpm:
+                tokens = min(tokens, self.tpm)
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+                if self._tokens < tokens:
+                    wait_s = max(wait_s, (tokens - self._tokens) * 60.0 / self.tpm)
+
+            if wait_s == 0.0:
+                if self.rpm:
+                    self._requests -= 1
+                if self.tpm:
+                    self._tokens -= tokens
+            else:
+                self.waited_s += wait_s
+
+            return wait_s
+
+    def acquire(self, tokens:int = 0):
+        """
+        Blocks until a call using `tokens` tokens fits under the limits, then takes it out of the buckets.
+        """
+        while (wait_s := self._reserve(tokens)) > 0:
+            time.sleep(wait_s)
+
+    async def acquire_async(self, tokens:int = 0):
+        """
+        Same as acquire(), but sleeps on the event loop instead of blocking the thread.
+        """
+        while (wait_s := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait_s)
+
+    def _backoff_s(self, attempt:int, error:Exception) -> float:
+        """
+        Returns the delay before the next retry: the server's Retry-After if given, otherwise a
+        full-jitter exponential backoff.
+        """
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(float(retry_after), self.max_delay_s)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** attempt))
+
+    def call(self, fn, *args, tokens:int = 0, **kwargs):
+        """
+        Calls fn(*args, **kwargs) once the limits allow it, retrying on RETRYABLE_ERRORS with backoff.
+
+        Parameters:
+        -----------
+        fn : callable
+            The API call, e.g. client.chat.completions.create.
+        tokens : int, optional
+            The estimated tokens of the call, counted against the tokens per minute limit. Default is 0.
+
+        Returns:
+        --------
+        The return value of fn.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                time.sleep(self._backoff_s(attempt, e))
+
+    async def call_async(self, fn, *args, tokens:int = 0, **kwargs):
+        """
+        Same as call(), for coroutine functions such as the methods of openai.AsyncOpenAI.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(tokens)
+            try:
+                return await fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._backoff_s(attempt, e))
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model:str) -> Rate_Limiter:
+    """
+    Returns the process-wide Rate_Limiter of a model, so that every Transcriber, Summarizer and
+    NoteTaker in the process shares the same limits. Unknown models are not limited, but are still retried.
+    """
+    with _rate_limiters_lock:
+        if model not in _rate_limiters:
+            _rate_limiters[model] = Rate_Limiter(**DEFAULT_LIMITS.get(model, {}))
+
+        return _rate_limiters[model]
+
+def configure_rate_limit(model:str, rpm:int = None, tpm:int = None, **kwargs) -> Rate_Limiter:
+    """
+    Replaces the process-wide Rate_Limiter of a model with one using the given limits.
+
+    Examples:
+    ---------
+    configure_rate_limit("whisper-1", rpm=100)
+    configure_rate_limit("gpt-3.5-turbo", rpm=10000, tpm=1000000)
+    """
+    with _rate_limiters_lock:
+        _rate_limiters[model] = Rate_Limiter(rpm=rpm, tpm=tpm, **kwargs)
+
+        return _rate_limiters[model]
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# One row per transcript segment. Times are in seconds of the original recording.
+SEGMENT_SCHEMA = pa.schema([('start', pa.float64()),
+                            ('end', pa.float64()),
+                            ('text', pa.string()),
+                            ('tokens', pa.int32())])
+
+SEGMENT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+def segments_to_table(segments:list, tokens:list) -> pa.Table:
+    """
+    Returns the segments, dictionaries with a start, an end and a text, as an Arrow table with the
+    token count of each text, so that the transcript can be re-chunked later without re-tokenizing it.
+    """
+    return pa.table({'start': [segment.get('start') for segment in segments],
+                     'end': [segment.get('end') for segment in segments],
+                     'text': [segment['text'] for segment in segments],
+                     'tokens': tokens},
+                    schema=SEGMENT_SCHEMA)
+
+def write_segments(table:pa.Table, path:str) -> str:
+    """
+    Writes a segment table to an Arrow IPC file (.arrow) or a Parquet file (.parquet), chosen by the
+    extension of the path. Arrow files are written uncompressed, so that load_segments() maps them
+    without copying; Parquet files are smaller, for archiving.
+
+    Returns:
+    --------
+    str
+        The path of the written file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+
+    if path.endswith(SEGMENT_FORMATS['parquet']):
+        pq.write_table(table, tmp_path, compression="zstd")
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    os.replace(tmp_path, path)
+    return path
+
+def load_segments(path:str) -> pa.Table:
+    """
+    Loads a segment file written by write_segments(). Arrow files are memory-mapped and read without
+    copying, so only the columns and rows that are used are paged in. Parquet files are memory-mapped
+    and decoded.
+    """
+    if path.endswith(SEGMENT_FORMATS['parquet']):
+        return pq.read_table(path, memory_map=True)
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+def load_segment_archive(directory:str) -> pa.Table:
+    """
+    Loads every segment file in a directory and its subdirectories as one table, with the path of
+    each segment's file in a 'source' column. The files stay memory-mapped, and their tables are
+    concatenated without copying.
+    """
+    tables = []
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.endswith(tuple(SEGMENT_FORMATS.values())):
+                path = os.path.join(root, filename)
+                table = load_segments(path)
+                source = pa.DictionaryArray.from_arrays(np.zeros(len(table), dtype=np.int32), [path])
+                tables.append(table.append_column('source', source))
+
+    if not tables:
+        return SEGMENT_SCHEMA.empty_table().append_column('source', pa.array([], pa.dictionary(pa.int32(), pa.string())))
+
+    return pa.concat_tables(tables)
+
+def chunk_segments(table:pa.Table,
+                   chunk_tokens:int = 3000,
+                   overlap_tokens:int = 200) -> list:
+    """
+    Groups consecutive segments into chunks of at most `chunk_tokens` tokens, using the stored token
+    counts instead of re-tokenizing the text. Chunks end at segment boundaries, and each chunk repeats
+    the last segments of the previous one, up to `overlap_tokens` tokens. A segment longer than
+    `chunk_tokens` makes a chunk of its own.
+
+    Returns:
+    --------
+    list
+        The text of each chunk.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens.")
+
+    texts = table.column('text').to_pylist()
+    ends = np.cumsum(table.column('tokens').to_numpy(zero_copy_only=False).astype(np.int64))
+    starts = ends - table.column('tokens').to_numpy(zero_copy_only=False)
+
+    chunks = []
+    first = 0
+    while first < len(texts):
+        # the chunk ends at the last segment that fits, and always holds at least one segment
+        last = max(int(np.searchsorted(ends, starts[first] + chunk_tokens, side='right')), first + 1)
+        chunks.append(' '.join(texts[first:last]))
+        if last >= len(texts):
+            break
+
+        # the next chunk starts with the trailing segments of this one that fit in the overlap, as long
+        # as the next segment still fits after them
+        next_first = max(int(np.searchsorted(starts, ends[last - 1] - overlap_tokens, side='left')),
+                         int(np.searchsorted(starts, ends[last] - chunk_tokens, side='left')))
+        first = min(max(next_first, first + 1), last)
+
+    return chunks
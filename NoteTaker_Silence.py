@@ -0,0 +1,92 @@
+import bisect
+
+import numpy as np
+
+def frame_levels(samples:np.ndarray, sample_rate:int, frame_ms:int = 30) -> np.ndarray:
+    """
+    Returns the loudness of each full frame of 16-bit mono PCM samples in dBFS, from the RMS energy of
+    the frame. Trailing samples that do not fill a frame are ignored.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+def _runs(mask:np.ndarray):
+    """
+    Returns the start and end indices of the runs of True values in a boolean array.
+    """
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def compress_silences(samples:np.ndarray,
+                      sample_rate:int,
+                      frame_ms:int = 30,
+                      silence_thresh:float = -40,
+                      min_silence_s:float = 1.0,
+                      keep_silence_s:float = 0.3):
+    """
+    Shortens every silence of at least `min_silence_s` seconds to `keep_silence_s` seconds, split
+    between its two ends so that speech onsets and decays are kept. A `keep_silence_s` of 0 drops
+    long silences entirely. Frames are classified as silent with one vectorized pass over their energy.
+
+    Parameters:
+    -----------
+    samples : np.ndarray
+        16-bit mono PCM samples.
+    sample_rate : int
+        The sample rate of the samples.
+    frame_ms : int, optional
+        The length of the analysis frames in milliseconds. Default is 30.
+    silence_thresh : float, optional
+        The loudness in dBFS below which a frame is silent. Default is -40.
+    min_silence_s : float, optional
+        The length from which a silence is shortened, in seconds. Default is 1.0.
+    keep_silence_s : float, optional
+        The length a long silence is shortened to, in seconds. Default is 0.3.
+
+    Returns:
+    --------
+    tuple
+        The kept samples, and the offset map: a list of (trimmed_start_s, original_start_s, length_s)
+        tuples, one per kept stretch of audio, for to_original_time().
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    silent = frame_levels(samples, sample_rate, frame_ms) < silence_thresh
+    keep = np.ones(len(silent), dtype=bool)
+
+    min_frames = max(1, int(round(min_silence_s * 1000 / frame_ms)))
+    head_frames = int(round(keep_silence_s * 1000 / frame_ms)) // 2
+    tail_frames = int(round(keep_silence_s * 1000 / frame_ms)) - head_frames
+
+    starts, ends = _runs(silent)
+    long_silences = (ends - starts) >= min_frames
+    for start, end in zip(starts[long_silences], ends[long_silences]):
+        keep[start + head_frames:end - tail_frames] = False
+
+    # trailing samples that do not fill a frame are kept
+    sample_keep = np.concatenate((np.repeat(keep, frame_len),
+                                  np.ones(len(samples) - len(keep) * frame_len, dtype=bool)))
+    kept_samples = samples[sample_keep]
+
+    starts, ends = _runs(sample_keep)
+    lengths = ends - starts
+    trimmed_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    offset_map = [(trimmed_start / sample_rate, start / sample_rate, length / sample_rate)
+                  for trimmed_start, start, length in zip(trimmed_starts.tolist(), starts.tolist(), lengths.tolist())]
+
+    return kept_samples, offset_map
+
+def to_original_time(t:float, offset_map:list) -> float:
+    """
+    Maps a time in the trimmed audio, in seconds, back to the time in the original recording.
+    """
+    if not offset_map:
+        return t
+
+    i = max(bisect.bisect_right([entry[0] for entry in offset_map], t) - 1, 0)
+    trimmed_start, original_start, length = offset_map[i]
+
+    return original_start + min(t - trimmed_start, length)
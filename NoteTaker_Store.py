@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from NoteTaker_Cache import hash_file
+from NoteTaker_Events import stage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    duration_s REAL,
+    transcriber_model TEXT,
+    summarizer_model TEXT,
+    system_prompt TEXT,
+    n_items INTEGER,
+    transcription_usd REAL,
+    summarization_usd REAL,
+    usage TEXT,
+    transcript_path TEXT,
+    notes_path TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_source_hash ON sessions (source_hash);
+
+CREATE TABLE IF NOT EXISTS segments (
+    segment_id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    start_s REAL,
+    end_s REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_session ON segments (session_id, position);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    summary_id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_session ON summaries (session_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='segment_id', tokenize='porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS summaries_fts USING fts5(
+    text, content='summaries', content_rowid='summary_id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.segment_id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.segment_id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS summaries_ai AFTER INSERT ON summaries BEGIN
+    INSERT INTO summaries_fts (rowid, text) VALUES (new.summary_id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS summaries_ad AFTER DELETE ON summaries BEGIN
+    INSERT INTO summaries_fts (summaries_fts, rowid, text) VALUES ('delete', old.summary_id, old.text);
+END;
+"""
+
+class NoteTaker_Store:
+    """
+    An embedded SQLite store of every transcript and summary, with a full-text index over both. Each
+    note-taking job is recorded as a session, with the hash of its source recording, the models, the
+    prompt and the cost, and its transcript is stored segment by segment with timestamps. Searches
+    rank the matching segments of all sessions with BM25, so a phrase said in any past meeting is
+    found without reading the .txt files.
+
+    -----------
+    Parameters:
+    -----------
+
+    - db_path (str): The path to the SQLite database. Created if it does not exist. Defaults to "Data/Store/notetaker.db".
+
+    --------
+    Methods:
+    --------
+
+    - add_session(note_taker, transcript_path, notes_path): Records the transcript and summary of a finished job.
+    - search(query, limit, session_id): Returns the best matching transcript segments across all sessions.
+    - search_summaries(query, limit): Returns the best matching summaries across all sessions.
+    - get_session(session_id): Returns the metadata, segments and summary of a session.
+    - list_sessions(): Returns the metadata of all sessions, newest first.
+    - delete_session(session_id): Deletes a session with its segments and summary.
+    - close(): Closes the database connection.
+
+    -----------
+    Attributes:
+    -----------
+
+    - db_path (str): The path to the SQLite database.
+
+    ---------
+    Examples:
+    ---------
+
+    store = NoteTaker_Store()
+    note_taker.take_notes(system_prompt=role_txt, n_items=6, chunked=True)
+    note_taker.save_notes(export_transcription_dir="Data/Output/QnA [Transcribed]",
+                          export_summary_dir="Data/Output/QnA [Notes]",
+                          store=store)
+
+    for hit in store.search("data engineering career", limit=5):
+        print(hit['source_path'], hit['start_s'], hit['snippet'])
+    """
+    def __init__(self,
+                 db_path:str = os.path.join("Data", "Store", "notetaker.db")):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # one connection shared by all threads, serialized with a lock, e.g. for NoteTaker_Batch workers
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _transcript_segments(Transcriber) -> list:
+        """
+        Returns the timestamped segments of a transcript: the timed segments returned by the model, or
+        the chunks if there are none, or the whole transcript as one segment if it was not chunked either.
+        """
+        segments = getattr(Transcriber, 'timed_segments', None) or getattr(Transcriber, 'transcript_segments', None)
+        if segments:
+            return [(segment.get('start'), segment.get('end'), segment['text']) for segment in segments]
+
+        return [(0.0, Transcriber.get_probe()['duration'], Transcriber.transcript_text)]
+
+    def add_session(self,
+                    note_taker,
+                    transcript_path:str = None,
+                    notes_path:str = None) -> int:
+        """
+        Records the transcript and summary of a finished job. A previous session of the same recording
+        with the same models, prompt and number of items is replaced, so rerunning a job does not
+        duplicate its results in searches.
+
+        Parameters:
+        -----------
+        note_taker : OpenAI_NoteTaker
+            A note taker whose take_notes(), stream_notes() or take_notes_async() has finished.
+        transcript_path : str, optional
+            The path of the saved transcript .txt file, if any.
+        notes_path : str, optional
+            The path of the saved summary .txt file, if any.
+
+        Returns:
+        --------
+        int
+            The id of the new session.
+        """
+        Transcriber, Summarizer = note_taker.Transcriber, note_taker.Summarizer
+        source_hash = hash_file(note_taker.input_dir)
+        system_prompt = getattr(note_taker, 'system_prompt', None)
+        n_items = getattr(note_taker, 'n_items', None)
+        segments = self._transcript_segments(Transcriber)
+        usage = dict(Summarizer.output_usage_dict)
+
+        with stage('store', segments=len(segments)), self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE source_hash = ? AND transcriber_model IS ? "
+                                     "AND summarizer_model IS ? AND system_prompt IS ? AND n_items IS ?",
+                                     (source_hash, note_taker.transcriber_model, note_taker.summarizer_model,
+                                      system_prompt, n_items))
+            cursor = self._connection.execute(
+                "INSERT INTO sessions (source_path, source_hash, created_at, duration_s, transcriber_model, "
+                "summarizer_model, system_prompt, n_items, transcription_usd, summarization_usd, usage, "
+                "transcript_path, notes_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(note_taker.input_dir), source_hash, time.time(),
+                 Transcriber.get_probe()['duration'], note_taker.transcriber_model, note_taker.summarizer_model,
+                 system_prompt, n_items,
+                 Transcriber.get_billed_duration() * (note_taker.USD_per_min/60.0),
+                 usage['total_tokens'] * (note_taker.USD_per_1k/1000.0),
+                 json.dumps(usage), transcript_path, notes_path))
+            session_id = cursor.lastrowid
+
+            self._connection.executemany("INSERT INTO segments (session_id, position, start_s, end_s, text) "
+                                         "VALUES (?, ?, ?, ?, ?)",
+                                         [(session_id, position, start_s, end_s, text)
+                                          for position, (start_s, end_s, text) in enumerate(segments)])
+            self._connection.execute("INSERT INTO summaries (session_id, text) VALUES (?, ?)",
+                                     (session_id, Summarizer.summarized_text))
+
+        return session_id
+
+    def search(self,
+               query:str,
+               limit:int = 20,
+               session_id:int = None) -> list:
+        """
+        Returns the transcript segments that best match the query across all sessions, best first.
+
+        Parameters:
+        -----------
+        query : str
+            An FTS5 query: words, "quoted phrases", prefixes such as engin*, and AND / OR / NOT.
+            Words are matched on their stems, so "engineers" also matches "engineering".
+        limit : int, optional
+            The maximum number of segments returned. Default is 20.
+        session_id : int, optional
+            If given, only the segments of this session are searched.
+
+        Returns:
+        --------
+        list
+            One dictionary per segment with its session_id, source_path, position, start_s, end_s,
+            text, a snippet with the matches in [brackets], and its BM25 score (lower is better).
+        """
+        sql = ("SELECT s.session_id, s.source_path, g.position, g.start_s, g.end_s, g.text, "
+               "snippet(segments_fts, 0, '[', ']', '...', 16) AS snippet, bm25(segments_fts) AS score "
+               "FROM segments_fts JOIN segments g ON g.segment_id = segments_fts.rowid "
+               "JOIN sessions s ON s.session_id = g.session_id "
+               "WHERE segments_fts MATCH ?")
+        params = [query]
+        if session_id is not None:
+            sql += " AND g.session_id = ?"
+            params.append(session_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        with stage('search', index='segments'), self._lock:
+            return [dict(row) for row in self._connection.execute(sql, params)]
+
+    def search_summaries(self,
+                         query:str,
+                         limit:int = 20) -> list:
+        """
+        Returns the summaries that best match the query across all sessions, best first. See search()
+        for the query syntax.
+
+        Returns:
+        --------
+        list
+            One dictionary per summary with its session_id, source_path, system_prompt, text, a snippet
+            with the matches in [brackets], and its BM25 score (lower is better).
+        """
+        sql = ("SELECT s.session_id, s.source_path, s.system_prompt, m.text, "
+               "snippet(summaries_fts, 0, '[', ']', '...', 16) AS snippet, bm25(summaries_fts) AS score "
+               "FROM summaries_fts JOIN summaries m ON m.summary_id = summaries_fts.rowid "
+               "JOIN sessions s ON s.session_id = m.session_id "
+               "WHERE summaries_fts MATCH ? ORDER BY score LIMIT ?")
+
+        with stage('search', index='summaries'), self._lock:
+            return [dict(row) for row in self._connection.execute(sql, (query, limit))]
+
+    def _session_row(self, row) -> dict:
+        session = dict(row)
+        session['usage'] = json.loads(session['usage']) if session['usage'] is not None else None
+        return session
+
+    def get_session(self, session_id:int) -> dict:
+        """
+        Returns the metadata of a session, with its transcript segments in order under 'segments' and
+        its summary under 'summary'. Raises KeyError if there is no such session.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(session_id)
+
+            session = self._session_row(row)
+            session['segments'] = [dict(segment) for segment in self._connection.execute(
+                "SELECT position, start_s, end_s, text FROM segments WHERE session_id = ? ORDER BY position",
+                (session_id,))]
+            summary = self._connection.execute("SELECT text FROM summaries WHERE session_id = ?",
+                                               (session_id,)).fetchone()
+            session['summary'] = summary['text'] if summary is not None else None
+
+        return session
+
+    def list_sessions(self) -> list:
+        """
+        Returns the metadata of all sessions, newest first.
+        """
+        with self._lock:
+            return [self._session_row(row) for row in
+                    self._connection.execute("SELECT * FROM sessions ORDER BY created_at DESC")]
+
+    def delete_session(self, session_id:int):
+        """
+        Deletes a session with its segments and summary.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
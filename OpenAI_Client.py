@@ -0,0 +1,106 @@
+import os
+import asyncio
+import threading
+import weakref
+
+import httpx
+import openai
+
+# Default HTTP settings of the shared clients. Retries are left to NoteTaker_RateLimiter.
+CLIENT_CONFIG = {
+    'api_key': None,
+    'base_url': None,
+    'timeout_s': 600.0,
+    'connect_timeout_s': 10.0,
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry_s': 30.0,
+}
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def configure_client(**config):
+    """
+    Changes the settings of the shared OpenAI clients. The clients are rebuilt on their next use.
+
+    Parameters:
+    -----------
+    api_key : str, optional
+        The OpenAI API key. Defaults to openai.api_key, then to the OPENAI_API_KEY environment variable.
+    base_url : str, optional
+        The base URL of the API, e.g. "http://localhost:8000/v1" for a local stand-in server.
+        Defaults to the OPENAI_BASE_URL environment variable, then to the OpenAI API.
+    timeout_s : float, optional
+        The read timeout of each request in seconds. Long uploads need a generous value. Default is 600.
+    connect_timeout_s : float, optional
+        The timeout for opening a connection in seconds. Default is 10.
+    max_connections : int, optional
+        The maximum number of open connections. Default is 20.
+    max_keepalive_connections : int, optional
+        The maximum number of idle connections kept alive for reuse. Default is 10.
+    keepalive_expiry_s : float, optional
+        How long an idle connection is kept alive in seconds. Default is 30.
+
+    Examples:
+    ---------
+    configure_client(base_url="http://localhost:8000/v1", timeout_s=60)
+    """
+    global _client
+
+    unknown = set(config) - set(CLIENT_CONFIG)
+    if unknown:
+        raise TypeError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+
+    with _lock:
+        CLIENT_CONFIG.update(config)
+        if _client is not None:
+            _client.close()
+        _client = None
+        _async_clients.clear()
+
+def _client_kwargs() -> dict:
+    return {'api_key': CLIENT_CONFIG['api_key'] or openai.api_key,
+            'base_url': CLIENT_CONFIG['base_url'] or os.environ.get("OPENAI_BASE_URL"),
+            'max_retries': 0}
+
+def _http_settings() -> dict:
+    return {'timeout': httpx.Timeout(CLIENT_CONFIG['timeout_s'], connect=CLIENT_CONFIG['connect_timeout_s']),
+            'limits': httpx.Limits(max_connections=CLIENT_CONFIG['max_connections'],
+                                   max_keepalive_connections=CLIENT_CONFIG['max_keepalive_connections'],
+                                   keepalive_expiry=CLIENT_CONFIG['keepalive_expiry_s'])}
+
+def get_client() -> openai.OpenAI:
+    """
+    Returns the process-wide OpenAI client. Its keep-alive connection pool is shared by every
+    OpenAI_Transcriber, OpenAI_Summarizer and OpenAI_NoteTaker that is not given its own client, so
+    consecutive and concurrent requests reuse open TLS connections.
+    """
+    global _client
+
+    with _lock:
+        if _client is None:
+            http_settings = _http_settings()
+            _client = openai.OpenAI(timeout=http_settings['timeout'],
+                                    http_client=httpx.Client(**http_settings),
+                                    **_client_kwargs())
+
+        return _client
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    Returns the shared async OpenAI client of the running event loop. Async connection pools cannot
+    be used across event loops, so each loop gets its own client, dropped when the loop is closed.
+    Must be called from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        if loop not in _async_clients:
+            http_settings = _http_settings()
+            _async_clients[loop] = openai.AsyncOpenAI(timeout=http_settings['timeout'],
+                                                      http_client=httpx.AsyncClient(**http_settings),
+                                                      **_client_kwargs())
+
+        return _async_clients[loop]
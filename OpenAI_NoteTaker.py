@@ -1,5 +1,14 @@
+import os
+import asyncio
+import openai
+
 from OpenAI_Transcriber import OpenAI_Transcriber
 from OpenAI_Summarizer import OpenAI_Summarizer
+from NoteTaker_Cache import Disk_Cache, get_default_cache
+from NoteTaker_RateLimiter import get_rate_limiter
+from OpenAI_Client import get_async_client
+from NoteTaker_Events import stage, event_context
+from NoteTaker_Checkpoint import NoteTaker_Checkpoint
 
 class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
 
@@ -9,7 +18,11 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
                  USD_per_min:float = 0.006, 
                  summarizer_model:str = "gpt-3.5-turbo", 
                  USD_per_1k:float = 0.002, 
-                 encoding_name:str = "cl100k_base"):
+                 encoding_name:str = "cl100k_base", 
+                 transcript_cache:Disk_Cache = None, 
+                 summary_cache:Disk_Cache = None, 
+                 client:openai.OpenAI = None, 
+                 checkpoint_dir:str = os.path.join("Data", "Checkpoints")):
         """
         Initializes an instance of the OpenAI_NoteTaker class.
 
@@ -20,10 +33,16 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
             summarizer_model (str, optional): The name of the OpenAI summarization model to use. Defaults to "gpt-3.5-turbo".
             USD_per_1k (float, optional): The price per 1,000 tokens charged by the summarization model, in USD. Defaults to 0.002.
             encoding_name (str, optional): The name of the character-level encoding used by the summarization model. Defaults to "cl100k_base".
+            transcript_cache (Disk_Cache, optional): The on-disk cache of transcripts. Defaults to the shared cache under Data/Cache/Transcripts.
+            summary_cache (Disk_Cache, optional): The in-memory and on-disk cache of summaries. Defaults to the shared cache under Data/Cache/Summaries.
+            client (openai.OpenAI, optional): The OpenAI client reused by every Transcriber and Summarizer of this NoteTaker. Defaults to the shared, connection-pooled client of OpenAI_Client.
+            checkpoint_dir (str, optional): The directory where the checkpoints of unfinished jobs are kept. Defaults to "Data/Checkpoints".
         """
         super().__init__(input_dir=input_dir, 
                          transcriber_model=transcriber_model, 
-                         USD_per_min=USD_per_min,  
+                         USD_per_min=USD_per_min, 
+                         transcript_cache=transcript_cache, 
+                         client=client, 
                         )
         """
         Initializes an instance of the OpenAI_Transcriber class.
@@ -36,6 +55,11 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
         self.summarizer_model = summarizer_model
         self.USD_per_1k = USD_per_1k
         self.encoding_name = encoding_name
+        self.summary_cache = summary_cache if summary_cache is not None else get_default_cache("Summaries", max_memory_items=256)
+        self.system_prompt = None
+        self.n_items = None
+        self.checkpoint = None
+        self.checkpoint_dir = checkpoint_dir
         
     
     def take_notes(self, 
@@ -44,7 +68,16 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
                    convert2mp3:bool = False,
                    export_mp3_dir:str = None, 
                    show_transcription:bool=False,
-                   show_notes:bool=False):
+                   show_notes:bool=False, 
+                   chunked:bool=False, 
+                   max_workers:int=4, 
+                   use_cache:bool=True, 
+                   hierarchical:bool=False, 
+                   transcode:bool=False, 
+                   transcode_profile:str="mp3", 
+                   trim_silence:bool=False, 
+                   incremental:bool=False, 
+                   checkpoint:bool=False):
         """
         Transcribes an audio file, summarizes the transcript, and displays the summary.
 
@@ -55,12 +88,21 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
             export_mp3_dir (str, optional): The directory where the MP3 file is exported, if it is converted. Defaults to None.
             show_transcription (bool, optional): If True, the transcription text is printed to the console. Defaults to False.
             show_notes (bool, optional): If True, the summary is printed to the console. Defaults to False.
+            chunked (bool, optional): If True, long recordings are split at silences and transcribed in parallel chunks. Defaults to False.
+            max_workers (int, optional): The maximum number of chunks transcribed at the same time when chunked is True. Defaults to 4.
+            use_cache (bool, optional): If True, unchanged recordings and identical summary requests are read from the transcript and summary caches. Defaults to True.
+            hierarchical (bool, optional): If True, transcripts are summarized with a map-reduce pass over token-bounded chunks, for transcripts that exceed the model's context window. Chunks end at the boundaries of the timed segments when the model returns them. Defaults to False.
+            transcode (bool, optional): If True, the audio file is converted in memory to a 16 kHz mono speech profile before upload, instead of being uploaded as is. Defaults to False.
+            transcode_profile (str, optional): The speech profile used when transcode or trim_silence is True, either "mp3" or "opus". Defaults to "mp3".
+            trim_silence (bool, optional): If True, silences longer than a second are shortened before upload to cut the billed minutes, and the audio is encoded with transcode_profile. Chunk timestamps still refer to the original recording. Defaults to False.
+            checkpoint (bool, optional): If True, the probe, each transcribed chunk and each summary request are recorded in a checkpoint as soon as they finish, so that rerunning the job after a crash resumes where it stopped instead of paying again. The checkpoint is deleted once the job has finished. Defaults to False.
+            incremental (bool, optional): If True, the transcript is summarized with a map-reduce pass over content-defined chunks whose partial summaries are remembered, so that re-summarizing an edited transcript with OpenAI_Summarizer.summarize_text_incremental() only pays for the edited chunks. Defaults to False.
 
         Methods:
             - to_mp3(export_dir:str=None): Converts the audio file to an MP3 file and saves it to the specified export directory.
             - get_filesize(): Returns the size of the audio file in bytes.
             - get_duration(): Returns the duration of the audio file in seconds.
-            - transcribe_audio(show_output:bool=False): Transcribes the audio file and saves the transcription text to a class attribute.
+            - transcribe_audio(show_output:bool=False, chunked:bool=False, max_workers:int=4): Transcribes the audio file and saves the transcription text to a class attribute.
             - summarize_text(system_prompt:str=None, n_items:int=None, show_notes:bool=False): Generates a summary of the transcription text using the OpenAI API and saves the summary to a class attribute.
             - save_txt(export_dir:str=None): Saves the transcription or summary text to a .txt file in the specified export directory.
 
@@ -85,39 +127,393 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
             - Transcribed_Audio (str): The text of the audio transcription.
             - Summarizer (OpenAI_Summarizer): An instance of the OpenAI_Summarizer class.
         """
+        self.system_prompt, self.n_items = system_prompt, n_items
+        with event_context(file=self.input_dir), stage('take_notes', chunked=chunked, hierarchical=hierarchical, transcode=transcode):
+            self._transcribe(convert2mp3 = convert2mp3, 
+                             export_mp3_dir = export_mp3_dir, 
+                             transcode = transcode, 
+                             transcode_profile = transcode_profile, 
+                             show_transcription = show_transcription, 
+                             chunked = chunked, 
+                             max_workers = max_workers, 
+                             use_cache = use_cache, 
+                             trim_silence = trim_silence, 
+                             checkpoint = checkpoint)
+            
+            if show_notes==True:
+                print(f"NoteTaker's Summary in {n_items} points: \n")
+                
+            if incremental==True:
+                self.Summarizer.summarize_text_incremental(system_prompt = system_prompt, 
+                                                           n_items = n_items, 
+                                                           max_workers = max_workers, 
+                                                           show_notes = show_notes, 
+                                                           use_cache = use_cache)
+            elif hierarchical==True:
+                if self.Transcriber.timed_segments:
+                    self.Summarizer.segments = self.Transcriber.get_segments_table(encoding_name=self.encoding_name)
+                self.Summarizer.summarize_text_hierarchical(system_prompt = system_prompt, 
+                                                            n_items = n_items, 
+                                                            max_workers = max_workers, 
+                                                            show_notes = show_notes, 
+                                                            use_cache = use_cache)
+            else:
+                self.Summarizer.summarize_text(system_prompt = system_prompt, 
+                                               n_items = n_items, 
+                                               show_notes = show_notes, 
+                                               use_cache = use_cache)
+            
+            self._clear_checkpoint()
+        
+    def _transcribe(self, 
+                    convert2mp3:bool = False, 
+                    export_mp3_dir:str = None, 
+                    transcode:bool = False, 
+                    transcode_profile:str = "mp3", 
+                    show_transcription:bool = False, 
+                    chunked:bool = False, 
+                    max_workers:int = 4, 
+                    use_cache:bool = True, 
+                    progress_callback = None, 
+                    trim_silence:bool = False, 
+                    checkpoint:bool = False):
+        """
+        Runs the transcription stages shared by take_notes() and stream_notes(), then prepares the Summarizer.
+        With checkpoint=True, the checkpoint of the job is opened, or resumed, and shared by both.
+        """
+        if checkpoint==True:
+            self.checkpoint = NoteTaker_Checkpoint.for_job(self.input_dir, 
+                                                           self.checkpoint_dir, 
+                                                           transcriber_model = self.transcriber_model, 
+                                                           convert2mp3 = convert2mp3, 
+                                                           transcode = transcode, 
+                                                           transcode_profile = transcode_profile, 
+                                                           chunked = chunked, 
+                                                           trim_silence = trim_silence)
+        else:
+            self.checkpoint = None
+        
         self.Transcriber = OpenAI_Transcriber(input_dir = self.input_dir, 
                                               transcriber_model = self.transcriber_model, 
-                                              USD_per_min = self.USD_per_min)
+                                              USD_per_min = self.USD_per_min, 
+                                              transcript_cache = self.transcript_cache, 
+                                              client = self.client)
+        self.Transcriber.checkpoint = self.checkpoint
         if convert2mp3==True:
             self.Transcriber.to_mp3(export_dir=export_mp3_dir)
+        if trim_silence==True:
+            self.Transcriber.trim_silence(profile=transcode_profile)
+        elif transcode==True:
+            self.Transcriber.transcode(profile=transcode_profile)
         
         self.Transcriber.get_filesize()
         self.Transcriber.get_duration()
         
-        self.Transcriber.transcribe_audio(show_output=show_transcription)
+        self.Transcriber.transcribe_audio(show_output=show_transcription, 
+                                          chunked=chunked, 
+                                          max_workers=max_workers, 
+                                          use_cache=use_cache, 
+                                          progress_callback=progress_callback)
         
         self.Transcribed_Audio = self.Transcriber.transcript_text
         
         self.Summarizer = OpenAI_Summarizer(transcript_text = self.Transcribed_Audio, 
                                             summarizer_model = self.summarizer_model, 
                                             USD_per_1k = self.USD_per_1k, 
-                                            encoding_name = self.encoding_name)
+                                            encoding_name = self.encoding_name, 
+                                            summary_cache = self.summary_cache, 
+                                            client = self.client)
+        self.Summarizer.checkpoint = self.checkpoint
 
         self.Summarizer.num_tokens_from_input_string()
         print(f"Input transcription tokens: {self.Summarizer.input_num_tokens}\n")
         
-        if show_notes==True:
-            print(f"NoteTaker's Summary in {n_items} points: \n")
+    def _clear_checkpoint(self):
+        """
+        Deletes the checkpoint of a finished job, and detaches it from the Transcriber and Summarizer so
+        that later calls, such as get_total_job_price(), do not record into it.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+            self.checkpoint = None
+        for component in (getattr(self, 'Transcriber', None), getattr(self, 'Summarizer', None)):
+            if component is not None:
+                component.checkpoint = None
+        
+    def take_notes_variants(self, 
+                            variants:list, 
+                            show_notes:bool=False, 
+                            chunked:bool=False, 
+                            max_workers:int=4, 
+                            use_cache:bool=True, 
+                            transcode:bool=False, 
+                            trim_silence:bool=False, 
+                            checkpoint:bool=False) -> dict:
+        """
+        Transcribes an audio file once and generates several notes from it, e.g. 5-point and 10-point
+        notes or notes for different personas, with one shared pass over the transcript. See
+        OpenAI_Summarizer.summarize_variants().
+
+        Args:
+            variants (list): One dictionary per variant, with a 'system_prompt', an 'n_items' and an optional 'name'.
+            show_notes (bool, optional): If True, the notes of every variant are printed. Defaults to False.
+            chunked (bool, optional): If True, long recordings are split at silences and transcribed in parallel chunks. Defaults to False.
+            max_workers (int, optional): The maximum number of chunks transcribed, and of requests sent, at the same time. Defaults to 4.
+            use_cache (bool, optional): If True, the transcript and summary caches are used. Defaults to True.
+            transcode (bool, optional): If True, the audio file is converted in memory to a speech profile before upload. Defaults to False.
+            trim_silence (bool, optional): If True, long silences are shortened before upload to cut the billed minutes. Defaults to False.
+            checkpoint (bool, optional): If True, finished units are checkpointed so that a crashed job resumes where it stopped. See take_notes(). Defaults to False.
+
+        Returns:
+            dict: The notes of each variant, keyed by its name.
+
+        Examples:
+            notes = note_taker.take_notes_variants([{'system_prompt': role_txt, 'n_items': 5},
+                                                    {'system_prompt': role_txt, 'n_items': 10},
+                                                    {'system_prompt': mentor_txt, 'n_items': 5, 'name': "mentor"}])
+            note_taker.Summarizer.save_variants(export_dir="Data/Output/QnA [Notes]")
+        """
+        # checked before transcribing, so an empty list does not pay for a transcript
+        if not variants:
+            raise ValueError("variants must not be empty")
+        self.system_prompt, self.n_items = variants[0]['system_prompt'], variants[0]['n_items']
+        with event_context(file=self.input_dir), stage('take_notes_variants', n_variants=len(variants)):
+            self._transcribe(transcode = transcode, 
+                             chunked = chunked, 
+                             max_workers = max_workers, 
+                             use_cache = use_cache, 
+                             trim_silence = trim_silence, 
+                             checkpoint = checkpoint)
+            
+            variant_notes = self.Summarizer.summarize_variants(variants = variants, 
+                                                               max_workers = max_workers, 
+                                                               show_notes = show_notes, 
+                                                               use_cache = use_cache)
+            self._clear_checkpoint()
+            
+            return variant_notes
+        
+    def stream_notes(self, 
+                     system_prompt:str=None, 
+                     n_items:int=None, 
+                     export_summary_dir:str=None, 
+                     show_notes:bool=False, 
+                     chunked:bool=False, 
+                     max_workers:int=4, 
+                     transcode:bool=False, 
+                     use_cache:bool=True, 
+                     progress_callback=None, 
+                     trim_silence:bool=False, 
+                     checkpoint:bool=False):
+        """
+        Transcribes an audio file, then streams its summary, yielding each bullet point as soon as the
+        model has written it instead of waiting for the whole response.
+
+        Args:
+            system_prompt (str, optional): The prompt that is used to generate the summary. Defaults to None.
+            n_items (int, optional): The number of summary items to generate. Defaults to None.
+            export_summary_dir (str, optional): If given, each bullet point is appended to "<export_summary_dir>.txt" as it arrives. Defaults to None.
+            show_notes (bool, optional): If True, each bullet point is printed as it arrives. Defaults to False.
+            chunked (bool, optional): If True, long recordings are split at silences and transcribed in parallel chunks. Defaults to False.
+            max_workers (int, optional): The maximum number of chunks transcribed at the same time when chunked is True. Defaults to 4.
+            transcode (bool, optional): If True, the audio file is converted in memory to a speech profile before upload. Defaults to False.
+            use_cache (bool, optional): If True, the transcript and summary caches are used. Defaults to True.
+            progress_callback (callable, optional): Called as progress_callback(n_done, n_total) each time a chunk is transcribed. Defaults to None.
+            trim_silence (bool, optional): If True, long silences are shortened before upload to cut the billed minutes. Defaults to False.
+            checkpoint (bool, optional): If True, the transcription is checkpointed so that a crashed job resumes where it stopped. See take_notes(). Defaults to False.
+
+        Yields:
+            str: Each line of the summary.
+
+        Examples:
+            for bullet in note_taker.stream_notes(system_prompt=role_txt, n_items=5):
+                print(bullet)
+            print(f"First note after {note_taker.Summarizer.time_to_first_token_s:.2f} s")
+        """
+        self.system_prompt, self.n_items = system_prompt, n_items
+        with event_context(file=self.input_dir), stage('stream_notes', chunked=chunked, transcode=transcode):
+            self._transcribe(transcode = transcode, 
+                             chunked = chunked, 
+                             max_workers = max_workers, 
+                             use_cache = use_cache, 
+                             progress_callback = progress_callback, 
+                             trim_silence = trim_silence, 
+                             checkpoint = checkpoint)
+            
+            yield from self.Summarizer.summarize_text_stream(system_prompt = system_prompt, 
+                                                             n_items = n_items, 
+                                                             export_dir = export_summary_dir, 
+                                                             show_notes = show_notes, 
+                                                             use_cache = use_cache)
+            self._clear_checkpoint()
+        
+    async def take_notes_async(self, 
+                               system_prompt:str=None, 
+                               n_items:int=None, 
+                               client:openai.AsyncOpenAI=None, 
+                               semaphore:asyncio.Semaphore=None, 
+                               max_concurrency:int=4, 
+                               max_chunk_mb:float=4.0, 
+                               show_notes:bool=False, 
+                               use_cache:bool=True, 
+                               checkpoint:bool=False):
+        """
+        Asynchronous version of take_notes() built on the async OpenAI client, with overlapped stages.
+        
+        The audio is split at silences into chunks, and each chunk is summarized into partial notes as
+        soon as its transcript arrives, so the transcription of chunk N+1 overlaps with the map-phase
+        summarization of chunk N. The partial notes are then combined into the final `n_items` bullet
+        points. The chunks default to 4 MB (about 8 minutes at 64 kbps) so that each chunk transcript
+        fits in the summarizer model's context window.
+        
+        Many recordings can share one event loop, one client and one semaphore, which caps the number of
+        API requests in flight across all of them. See take_notes_many().
+
+        Args:
+            system_prompt (str, optional): The prompt that is used to generate the summary. Defaults to None.
+            n_items (int, optional): The number of summary items to display. Defaults to None.
+            client (openai.AsyncOpenAI, optional): The async OpenAI client. If None, the shared async client of the running event loop is used. Defaults to None.
+            semaphore (asyncio.Semaphore, optional): Caps the API requests in flight, and may be shared between jobs. Defaults to None.
+            max_concurrency (int, optional): The cap on API requests in flight when no semaphore is given. Defaults to 4.
+            max_chunk_mb (float, optional): The maximum size of each audio chunk in MB. Defaults to 4.0.
+            show_notes (bool, optional): If True, the summary is printed to the console. Defaults to False.
+            use_cache (bool, optional): If True, the transcript and summary caches are used. Defaults to True.
+            checkpoint (bool, optional): If True, the probe, each transcribed chunk and each summary request are checkpointed so that a crashed job resumes where it stopped. See take_notes(). Defaults to False.
+
+        Returns:
+            str: The summarized text.
+
+        Examples:
+            note_taker = OpenAI_NoteTaker(input_dir='path/to/input')
+            asyncio.run(note_taker.take_notes_async(system_prompt=role_txt, n_items=5))
+            
+            # In a Jupyter Notebook, where an event loop is already running
+            await note_taker.take_notes_async(system_prompt=role_txt, n_items=5)
+        """
+        self.system_prompt, self.n_items = system_prompt, n_items
+        with event_context(file=self.input_dir), stage('take_notes_async', max_chunk_mb=max_chunk_mb):
+            if client is None:
+                client = get_async_client()
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(max_concurrency)
+            if checkpoint==True:
+                self.checkpoint = await asyncio.to_thread(NoteTaker_Checkpoint.for_job, 
+                                                          self.input_dir, 
+                                                          self.checkpoint_dir, 
+                                                          transcriber_model = self.transcriber_model, 
+                                                          chunked = True, 
+                                                          max_chunk_mb = max_chunk_mb, 
+                                                          mode = 'async')
+            else:
+                self.checkpoint = None
+            
+            self.Transcriber = OpenAI_Transcriber(input_dir = self.input_dir, 
+                                                  transcriber_model = self.transcriber_model, 
+                                                  USD_per_min = self.USD_per_min, 
+                                                  transcript_cache = self.transcript_cache, 
+                                                  client = self.client)
+            self.Summarizer = OpenAI_Summarizer(transcript_text = "", 
+                                                summarizer_model = self.summarizer_model, 
+                                                USD_per_1k = self.USD_per_1k, 
+                                                encoding_name = self.encoding_name, 
+                                                summary_cache = self.summary_cache, 
+                                                client = self.client)
+            self.Transcriber.checkpoint = self.checkpoint
+            self.Summarizer.checkpoint = self.checkpoint
+            
+            await asyncio.to_thread(self.Transcriber.get_filesize)
+            await asyncio.to_thread(self.Transcriber.get_duration)
+            
+            cache_key = await asyncio.to_thread(self.Transcriber._transcript_cache_key, True, max_chunk_mb)
+            cached_transcript = self.transcript_cache.get(cache_key) if use_cache==True else None
+            
+            async def summarize_segment(segment):
+                async with semaphore:
+                    return await self.Summarizer._chat_completion_async(client, 
+                                                                        system_prompt = system_prompt, 
+                                                                        user_content = self.Summarizer._map_prompt(segment['text']), 
+                                                                        use_cache = use_cache)
+            
+            async def upload(audio_file):
+                audio_file.seek(0)
+                return await client.audio.transcriptions.create(model = self.transcriber_model, 
+                                                                file = audio_file, 
+                                                                response_format = self.Transcriber._response_format())
+            
+            async def transcribe_and_summarize(chunk):
+                checkpoint_key = self.Transcriber._chunk_checkpoint_key(chunk)
+                segment = self.checkpoint.get('segment', checkpoint_key) if self.checkpoint is not None else None
+                
+                if segment is None:
+                    async with semaphore:
+                        with event_context(chunk=chunk['index']), stage('upload', model=self.transcriber_model, mode='async') as metrics:
+                            # chunk files are BytesIO or, for MP3 input, Memory_File slices of the mapped file
+                            chunk['audio_file'].seek(0, os.SEEK_END)
+                            metrics['bytes_uploaded'] = chunk['audio_file'].tell()
+                            transcript = await get_rate_limiter(self.transcriber_model).call_async(upload, chunk['audio_file'])
+                    segment = {'index': chunk['index'], 
+                               'start': chunk['start'], 
+                               'end': chunk['end'], 
+                               'text': transcript.text.strip(), 
+                               'timed_segments': self.Transcriber._timed_segments(transcript, chunk['upload_start'])}
+                    if self.checkpoint is not None:
+                        self.checkpoint.set('segment', checkpoint_key, segment)
+                
+                return segment, await summarize_segment(segment)
+            
+            if cached_transcript is not None:
+                print("Transcript loaded from cache.")
+                segments = cached_transcript['segments']
+                partial_completions = await asyncio.gather(*(summarize_segment(segment) for segment in segments))
+                
+            else:
+                chunk_iter = self.Transcriber.iter_audio_chunks(max_chunk_mb=max_chunk_mb)
+                tasks = []
+                while (chunk := await asyncio.to_thread(next, chunk_iter, None)) is not None:
+                    tasks.append(asyncio.create_task(transcribe_and_summarize(chunk)))
+                
+                results = await asyncio.gather(*tasks)
+                segments = [segment for segment, _ in results]
+                partial_completions = [completion for _, completion in results]
             
-        self.Summarizer.summarize_text(system_prompt = system_prompt, 
-                                       n_items = n_items, 
-                                       show_notes = show_notes)
+            self.Transcriber.transcript_segments = segments
+            self.Transcriber.transcript = {'text': ' '.join(segment['text'] for segment in segments), 
+                                           'segments': segments, 
+                                           'timed_segments': [timed_segment for segment in segments 
+                                                              for timed_segment in segment.get('timed_segments', [])]}
+            self.Transcriber.transcript_text = self.Transcriber.transcript['text']
+            self.Transcriber.timed_segments = self.Transcriber.transcript['timed_segments']
+            
+            if use_cache==True and cached_transcript is None:
+                self.transcript_cache.set(cache_key, self.Transcriber.transcript)
+            
+            self.Transcribed_Audio = self.Transcriber.transcript_text
+            self.Summarizer.transcript_text = self.Transcribed_Audio
+            self.Summarizer.transcript_chunks = [segment['text'] for segment in segments]
+            
+            async with semaphore:
+                completion = await self.Summarizer._chat_completion_async(client, 
+                                                                          system_prompt = system_prompt, 
+                                                                          user_content = self.Summarizer._reduce_prompt([c['summarized_text'] for c in partial_completions], n_items), 
+                                                                          use_cache = use_cache)
+            
+            self.Summarizer._set_map_reduce_result(partial_completions, completion)
+            self._clear_checkpoint()
+            
+            if show_notes==True:
+                print(f"NoteTaker's Summary in {n_items} points: \n")
+                print(self.Summarizer.summarized_text)
+            
+            return self.Summarizer.summarized_text
         
     def save_notes(self, 
                    export_transcription_dir:str=None, 
-                   export_summary_dir:str=None):
+                   export_summary_dir:str=None, 
+                   export_segments_dir:str=None, 
+                   store=None):
         """
-        Saves the transcribed text and summary to text files at the specified directory.
+        Saves the transcribed text and summary to text files at the specified directory, and records
+        them in a NoteTaker_Store if one is given.
         
         Parameters:
         -----------
@@ -125,7 +521,15 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
             The directory to export the transcribed text file to.
         
         export_summary_dir : str, optional
-            The directory to export the summary text file to.
+            The directory to export the summary text file to. If None, the summary is saved next to
+            the input audio file as "<name> [Notes].txt".
+        
+        export_segments_dir : str, optional
+            If given, the timed segments of the transcript are also saved to "<export_segments_dir>.arrow",
+            a columnar file that is loaded memory-mapped.
+        
+        store : NoteTaker_Store, optional
+            The searchable store where the transcript segments, the summary, the prompt and the cost are recorded.
             
         Examples:
         ---------
@@ -147,8 +551,18 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
         -----------
         None
         """
+        if export_summary_dir is None:
+            export_summary_dir = f"{os.path.splitext(self.input_dir)[0]} [Notes]"
+        
         self.Transcriber.save_txt(export_dir=export_transcription_dir)
         self.Summarizer.save_txt(export_dir=export_summary_dir)
+        if export_segments_dir is not None:
+            self.Transcriber.save_segments(export_dir=export_segments_dir, encoding_name=self.encoding_name)
+        
+        if store is not None:
+            store.add_session(self, 
+                              transcript_path = self.Transcriber.filepath_txt, 
+                              notes_path = self.Summarizer.filepath_txt)
         
         
     def get_total_job_price(self):
@@ -202,4 +616,35 @@ class OpenAI_NoteTaker(OpenAI_Transcriber, OpenAI_Summarizer):
         
         print('\nJob Price Breakdown: \n')
         for job_type,value_USD in self.complete_job_price_dict_USD.items(): 
-            print(f"{job_type}: {value_USD}") 
\ No newline at end of file
+            print(f"{job_type}: {value_USD}")
+
+
+async def take_notes_many(note_takers:list, 
+                          max_concurrency:int=8, 
+                          client:openai.AsyncOpenAI=None, 
+                          **kwargs) -> list:
+    """
+    Runs take_notes_async() for many OpenAI_NoteTaker instances on one event loop, sharing one async
+    client and one cap of `max_concurrency` API requests in flight across all of them.
+
+    Args:
+        note_takers (list): The OpenAI_NoteTaker instances to run.
+        max_concurrency (int, optional): The cap on API requests in flight across all jobs. Defaults to 8.
+        client (openai.AsyncOpenAI, optional): The shared async OpenAI client. If None, the shared async client of the running event loop is used. Defaults to None.
+        **kwargs: Passed on to take_notes_async(), e.g. system_prompt and n_items.
+
+    Returns:
+        list: The summarized text of each job, in the order of `note_takers`.
+
+    Examples:
+        note_takers = [OpenAI_NoteTaker(input_dir=path) for path in paths]
+        notes = asyncio.run(take_notes_many(note_takers, system_prompt=role_txt, n_items=5))
+    """
+    if client is None:
+        client = get_async_client()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    return await asyncio.gather(*(note_taker.take_notes_async(client=client, 
+                                                              semaphore=semaphore, 
+                                                              **kwargs) 
+                                  for note_taker in note_takers))
@@ -1,9 +1,19 @@
 import os
+import re
+import time
 import openai
+import hashlib
 import tiktoken
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
-import os
-import openai
+from NoteTaker_Cache import Disk_Cache, get_default_cache
+from NoteTaker_RateLimiter import get_rate_limiter
+from OpenAI_Client import get_client
+from NoteTaker_Events import stage, bind_context
+from NoteTaker_Segments import chunk_segments, load_segments
 
 class OpenAI_Summarizer:
     """
@@ -25,15 +35,46 @@ class OpenAI_Summarizer:
     encoding_name : str, optional (default="cl100k_base")
         The encoding type to use for encoding the input and output text.
 
+    summary_cache : Disk_Cache, optional (default=None)
+        The in-memory and on-disk cache of summaries. If None, the shared cache under Data/Cache/Summaries is used.
+
+    client : openai.OpenAI, optional (default=None)
+        The OpenAI client used for chat completions. If None, the shared, connection-pooled client of OpenAI_Client is used.
+
     --------
     Methods:
     --------
     num_tokens_from_input_string() -> int:
         Calculates the number of tokens in the input text using the specified encoding and returns it.
+        The tokens are encoded once per transcript and reused by split_transcript().
 
-    summarize_text(system_prompt:str, n_items:int=None, model:str="gpt-3.5-turbo", show_notes:bool=False) -> str:
+    summarize_text(system_prompt:str, n_items:int=None, model:str="gpt-3.5-turbo", show_notes:bool=False, use_cache:bool=True, refresh_cache:bool=False) -> str:
         Summarizes the input text into a bulleted list of n-items using the OpenAI GPT-3 model as default, given a system prompt, and returns the summarized text.
 
+    summarize_text_stream(system_prompt:str, n_items:int=None, export_dir:str=None, show_notes:bool=False) -> generator:
+        Streams the summary and yields each bullet point as soon as it is complete, appending it to the output file.
+
+    split_transcript(chunk_tokens:int=3000, overlap_tokens:int=200) -> list:
+        Splits the input text into overlapping, token-bounded chunks.
+
+    set_segments(segments):
+        Uses a segment table or segment file as the input, so that it is chunked at segment boundaries without re-tokenizing.
+
+    summarize_text_hierarchical(system_prompt:str, n_items:int=None, chunk_tokens:int=3000, overlap_tokens:int=200, max_workers:int=4, show_notes:bool=False) -> str:
+        Summarizes input text that exceeds the context window by summarizing its chunks in parallel, then combining the partial notes into n-items.
+
+    summarize_variants(variants:list, map_system_prompt:str=..., target_tokens:int=1500, max_workers:int=4) -> dict:
+        Generates several notes, e.g. for different n_items or personas, from one shared map pass over the input text.
+
+    save_variants(export_dir):
+        Saves the notes of every variant to its own text file.
+
+    split_transcript_stable(target_tokens:int=1500) -> list:
+        Splits the input text into content-defined chunks that stay the same when other parts of the text are edited.
+
+    summarize_text_incremental(system_prompt:str, n_items:int=None, target_tokens:int=1500, max_workers:int=4, show_notes:bool=False) -> str:
+        Summarizes the input text with a map-reduce pass that only re-summarizes the chunks changed since an earlier run.
+
     save_txt(export_dir):
         Saves the summarized text to a text file with the specified export directory.
 
@@ -59,18 +100,30 @@ class OpenAI_Summarizer:
     encoding_name : str
         The encoding type to use for encoding the input and output text.
 
+    summary_cache : Disk_Cache
+        The cache of summaries, keyed on the transcript, system prompt, n_items and summarizer model.
+
+    from_cache : bool
+        True if the last summary was read from the summary cache instead of the OpenAI API.
+
     input_encoding : tiktok.Encoding
         The encoding used to encode the input text.
 
     input_num_tokens : int
         The number of tokens in the input text.
 
-    response : openai.api_models.ModelAPIResponse
+    client : openai.OpenAI
+        The OpenAI client used for chat completions, or None for the shared client.
+
+    response : openai.types.chat.ChatCompletion
         The response object returned by the OpenAI API after generating the summarized text.
 
     summarized_text : str
         The summarized text in bullet-point form.
 
+    filepath_txt : str
+        The file path to the summary saved by save_txt().
+
     output_usage_dict : dict
         A dictionary containing the token usage of the OpenAI API after generating the summarized text.
 
@@ -80,6 +133,42 @@ class OpenAI_Summarizer:
     output_price_dict : dict
         A dictionary containing the cost of generating the summarized text based on token usage.
 
+    time_to_first_token_s : float
+        The time from sending a streamed request to receiving its first token, set by summarize_text_stream().
+
+    generation_time_s : float
+        The time from sending a streamed request to receiving its last token, set by summarize_text_stream().
+
+    transcript_chunks : list
+        The overlapping, token-bounded chunks of the input text used by summarize_text_hierarchical().
+
+    segments : pyarrow.Table
+        The timed segments of the input text with their token counts, set by set_segments(), or None.
+
+    checkpoint : NoteTaker_Checkpoint
+        If set, every completed summary request is recorded in it, and read back from it instead of being sent again. Defaults to None.
+
+    partial_summaries : list
+        The partial notes of each chunk from the map phase of summarize_text_hierarchical().
+
+    variant_notes : dict
+        The notes of each variant of the last summarize_variants(), keyed by name.
+
+    variant_usage_dict : dict
+        The token usage of the reduce request of each variant, keyed by name.
+
+    chunk_hashes : list
+        The SHA-256 digest of each chunk of split_transcript_stable().
+
+    incremental_report : dict
+        The number of chunks, reused and re-summarized chunks, and the token usage spent by the last summarize_text_incremental().
+
+    phase_usage_dict : dict
+        The token usage of the 'map' and 'reduce' phases of summarize_text_hierarchical(), or None after summarize_text().
+
+    phase_price_dict : dict
+        The cost of the 'map' and 'reduce' phases, computed by get_price() after summarize_text_hierarchical().
+
     ---------
     Examples:
     ---------
@@ -109,7 +198,9 @@ class OpenAI_Summarizer:
                  transcript_text:str, 
                  summarizer_model:str = "gpt-3.5-turbo", 
                  USD_per_1k:float = 0.002, 
-                 encoding_name:str = "cl100k_base"):
+                 encoding_name:str = "cl100k_base", 
+                 summary_cache:Disk_Cache = None, 
+                 client:openai.OpenAI = None):
         """
         Initializes the instance of the OpenAI_Summarizer class with the input text, model, USD_per_1k, and encoding_name parameters.
     
@@ -123,6 +214,10 @@ class OpenAI_Summarizer:
             The cost of 1000 tokens in USD. Default is 0.002.
         encoding_name : str, optional
             The name of the encoding to be used for tokenization. Default is "cl100k_base".
+        summary_cache : Disk_Cache, optional
+            The cache of summaries. Default is the shared cache under Data/Cache/Summaries.
+        client : openai.OpenAI, optional
+            The OpenAI client used for chat completions. Default is the shared client of OpenAI_Client.get_client().
 
         Returns:
         --------
@@ -133,6 +228,10 @@ class OpenAI_Summarizer:
         self.summarizer_model = summarizer_model
         self.USD_per_1k = USD_per_1k
         self.encoding_name = encoding_name
+        self.summary_cache = summary_cache if summary_cache is not None else get_default_cache("Summaries", max_memory_items=256)
+        self.client = client
+        self.segments = None
+        self.checkpoint = None
         
     def num_tokens_from_input_string(self) -> int:
     
@@ -143,17 +242,36 @@ class OpenAI_Summarizer:
             An integer representing the number of tokens in the input text.
         """
     
-        self.input_encoding = tiktoken.get_encoding(self.encoding_name)
-        self.input_num_tokens = len(self.input_encoding.encode(self.transcript_text))
+        self.input_encoding = get_encoding(self.encoding_name)
+        self.input_num_tokens = len(self._transcript_tokens())
+        
+        return self.input_num_tokens
+    
+    def _transcript_tokens(self) -> list:
+        """
+        Returns the tokens of the input text, encoding it only the first time or after it has changed.
+        """
+        if getattr(self, '_tokens_text', None) is not self.transcript_text:
+            self._tokens = get_encoding(self.encoding_name).encode(self.transcript_text)
+            self._tokens_text = self.transcript_text
+            _remember_token_count(self.transcript_text, self.encoding_name, len(self._tokens))
+        
+        return self._tokens
 
     def summarize_text(self, 
                        system_prompt:str, 
                        n_items:int = None, 
                        model:str = "gpt-3.5-turbo", 
-                       show_notes:bool=False) -> str:
+                       show_notes:bool=False, 
+                       use_cache:bool=True, 
+                       refresh_cache:bool=False) -> str:
         """
         Summarizes the input text into a bulleted list of n-items using the OpenAI GPT-3 model as default, 
         given a system prompt, and returns the summarized text.
+        
+        The summary text and its token usage are cached, keyed on a digest of the transcript, system prompt,
+        n_items and summarizer model, so an identical request is answered without calling the API and
+        get_price() still reports the cost of the original call.
 
         Parameters:
         -----------
@@ -168,6 +286,12 @@ class OpenAI_Summarizer:
         
         show_notes: bool
             If True, it prints the summarized text.
+        
+        use_cache: bool
+            If False, the summary cache is neither read nor written for this call.
+        
+        refresh_cache: bool
+            If True, the API is called even on a cache hit, and the new summary replaces the cached one.
 
         Returns:
         --------
@@ -182,23 +306,693 @@ class OpenAI_Summarizer:
         -----------
         Raises an OpenAI API Exception if there is an issue with the OpenAI API authentication.
         """
-        self.response = openai.ChatCompletion.create(
-            model=self.summarizer_model,
-            messages=[
-                {"role":"system", 
-                 "content": system_prompt},
-                
-                {"role":"user", 
-                 "content": f"Summarize the following transcript into {n_items} key bullet points: '\n{self.transcript_text}'"}
-            ])
-
-        self.summarized_text = self.response['choices'][0]['message']['content']
-        self.output_usage_dict = dict(self.response['usage'])
+        with stage('summarize', model=self.summarizer_model):
+            completion = self._chat_completion(system_prompt = system_prompt, 
+                                               user_content = f"Summarize the following transcript into {n_items} key bullet points: '\n{self.transcript_text}'", 
+                                               use_cache = use_cache, 
+                                               refresh_cache = refresh_cache)
+        
+        self.response = completion['response']
+        self.from_cache = completion['from_cache']
+        self.summarized_text = completion['summarized_text']
+        self.output_usage_dict = dict(completion['usage'])
+        self.phase_usage_dict = None
+        
         self.output_tokens_count = self.output_usage_dict['total_tokens']
 
         if show_notes==True:
             print(self.summarized_text)
     
+    def _chat_completion(self, 
+                         system_prompt:str, 
+                         user_content:str, 
+                         use_cache:bool=True, 
+                         refresh_cache:bool=False) -> dict:
+        """
+        Sends one system and user message pair to the summarizer model, going through the checkpoint of
+        the job, if any, and the summary cache.
+        
+        Returns:
+        --------
+        dict
+            The keys 'summarized_text', 'usage', 'from_cache' and 'response', the latter being None on a cache hit.
+        """
+        with stage('chat_completion', model=self.summarizer_model) as metrics:
+            cache_key = self.summary_cache.make_key(user_content, 
+                                                    system_prompt, 
+                                                    self.summarizer_model)
+            completion = self._stored_completion(cache_key, use_cache, refresh_cache, metrics)
+            if completion is not None:
+                return completion
+            
+            response = get_rate_limiter(self.summarizer_model).call(
+                (self.client or get_client()).chat.completions.create,
+                **self._completion_request(system_prompt, user_content))
+            
+            return self._store_completion(cache_key, response, use_cache, metrics)
+    
+    def _completion_request(self, 
+                            system_prompt:str, 
+                            user_content:str) -> dict:
+        """
+        Returns the keyword arguments of a chat completion request, with the token estimate for the rate limiter.
+        """
+        return {'tokens': self._estimate_request_tokens(system_prompt, user_content), 
+                'model': self.summarizer_model, 
+                'messages': [
+                    {"role":"system", 
+                     "content": system_prompt},
+                    
+                    {"role":"user", 
+                     "content": user_content}
+                ]}
+    
+    def _stored_completion(self, 
+                           cache_key:str, 
+                           use_cache:bool, 
+                           refresh_cache:bool, 
+                           metrics:dict) -> dict:
+        """
+        Returns the completion of cache_key from the checkpoint of the job or from the summary cache, or
+        None if the request has to be sent. Shared by _chat_completion() and _chat_completion_async().
+        """
+        # a request completed by an earlier run of the same job is never paid for again
+        stored = self.checkpoint.get('completion', cache_key) if self.checkpoint is not None else None
+        if stored is None and use_cache==True and refresh_cache==False:
+            stored = self.summary_cache.get(cache_key)
+        if stored is None:
+            return None
+        
+        metrics.update(self._usage_metrics(stored['usage'], from_cache=True))
+        return {'summarized_text': stored['summarized_text'], 
+                'usage': dict(stored['usage']), 
+                'from_cache': True, 
+                'response': None}
+    
+    def _store_completion(self, 
+                          cache_key:str, 
+                          response, 
+                          use_cache:bool, 
+                          metrics:dict) -> dict:
+        """
+        Records the response of a sent request in the summary cache and the checkpoint of the job, and
+        returns it as a completion. Shared by _chat_completion() and _chat_completion_async().
+        """
+        summarized_text = response.choices[0].message.content
+        usage = dict(response.usage)
+        
+        if use_cache==True:
+            self.summary_cache.set(cache_key, {'summarized_text': summarized_text, 
+                                               'usage': usage})
+        if self.checkpoint is not None:
+            self.checkpoint.set('completion', cache_key, {'summarized_text': summarized_text, 
+                                                          'usage': usage})
+        
+        metrics.update(self._usage_metrics(usage, from_cache=False))
+        return {'summarized_text': summarized_text, 
+                'usage': usage, 
+                'from_cache': False, 
+                'response': response}
+    
+    def summarize_text_stream(self, 
+                              system_prompt:str, 
+                              n_items:int = None, 
+                              export_dir:str = None, 
+                              show_notes:bool = False, 
+                              use_cache:bool = True, 
+                              refresh_cache:bool = False):
+        """
+        Streams the summary of the input text and yields each bullet point as soon as it is complete,
+        instead of waiting for the whole response like summarize_text().
+        
+        If export_dir is given, each bullet point is also appended to "<export_dir>.txt" as it arrives. The
+        streaming API does not report token usage, so `output_usage_dict` is reconstructed with tiktoken
+        from the request and the streamed text, and get_price() works as after summarize_text().
+        
+        Parameters:
+        -----------
+        system_prompt: str
+            A prompt to be fed into the OpenAI API model.
+        n_items: int
+            The number of bullet points the summarized text should contain.
+        export_dir: str, optional
+            The path of the output file without the .txt extension. If None, nothing is written.
+        show_notes: bool
+            If True, it prints each bullet point as it arrives.
+        use_cache: bool
+            If False, the summary cache is neither read nor written for this call.
+        refresh_cache: bool
+            If True, the API is called even on a cache hit, and the new summary replaces the cached one.
+        
+        Yields:
+        -------
+        str
+            Each line of the summary, e.g. "1. The speaker highlights ...".
+        
+        Examples:
+        ---------
+        for bullet in summarizer.summarize_text_stream(system_prompt=role_txt, n_items=5, export_dir="Data/Output/notes"):
+            print(bullet)
+        print(summarizer.time_to_first_token_s, summarizer.generation_time_s)
+        """
+        with stage('summarize_stream', model=self.summarizer_model) as metrics:
+            user_content = f"Summarize the following transcript into {n_items} key bullet points: '\n{self.transcript_text}'"
+            cache_key = self.summary_cache.make_key(user_content, 
+                                                    system_prompt, 
+                                                    self.summarizer_model)
+            # a stream completed by an earlier run of the same job is replayed from its checkpoint
+            cached_summary = self.checkpoint.get('completion', cache_key) if self.checkpoint is not None else None
+            if cached_summary is None and use_cache==True and refresh_cache==False:
+                cached_summary = self.summary_cache.get(cache_key)
+            
+            output_file = open(f"{export_dir}.txt", 'w', encoding="utf-8") if export_dir is not None else None
+            start_time = time.perf_counter()
+            self.time_to_first_token_s = None
+            self.phase_usage_dict = None
+            self.response = None
+            
+            def deltas():
+                if cached_summary is not None:
+                    yield cached_summary['summarized_text']
+                    return
+                
+                stream = get_rate_limiter(self.summarizer_model).call(
+                    (self.client or get_client()).chat.completions.create,
+                    stream=True,
+                    **self._completion_request(system_prompt, user_content))
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+            try:
+                pieces = []
+                pending = ""
+                for delta in deltas():
+                    if self.time_to_first_token_s is None:
+                        self.time_to_first_token_s = time.perf_counter() - start_time
+                    pieces.append(delta)
+                    pending += delta
+                    
+                    *lines, pending = pending.split('\n')
+                    for line in lines:
+                        if output_file is not None:
+                            output_file.write(line + '\n')
+                            output_file.flush()
+                        if line.strip():
+                            if show_notes==True:
+                                print(line)
+                            yield line
+                
+                if pending:
+                    if output_file is not None:
+                        output_file.write(pending)
+                        output_file.flush()
+                    if pending.strip():
+                        if show_notes==True:
+                            print(pending)
+                        yield pending
+            finally:
+                if output_file is not None:
+                    output_file.close()
+            
+            self.generation_time_s = time.perf_counter() - start_time
+            self.summarized_text = ''.join(pieces)
+            self.from_cache = cached_summary is not None
+            
+            if self.from_cache:
+                self.output_usage_dict = dict(cached_summary['usage'])
+            else:
+                prompt_tokens = self._count_prompt_tokens(system_prompt, user_content)
+                completion_tokens = count_tokens_batch([self.summarized_text], self.encoding_name)[0]
+                self.output_usage_dict = {'prompt_tokens': prompt_tokens, 
+                                          'completion_tokens': completion_tokens, 
+                                          'total_tokens': prompt_tokens + completion_tokens}
+                if use_cache==True:
+                    self.summary_cache.set(cache_key, {'summarized_text': self.summarized_text, 
+                                                       'usage': self.output_usage_dict})
+                if self.checkpoint is not None:
+                    self.checkpoint.set('completion', cache_key, {'summarized_text': self.summarized_text, 
+                                                                  'usage': self.output_usage_dict})
+            
+            self.output_tokens_count = self.output_usage_dict['total_tokens']
+            metrics.update(self._usage_metrics(self.output_usage_dict, from_cache=self.from_cache), 
+                           time_to_first_token_s=self.time_to_first_token_s, 
+                           generation_time_s=self.generation_time_s)
+            
+            if export_dir is not None:
+                print(f"Summarized note saved at: {export_dir}.txt")
+    
+    def _usage_metrics(self, 
+                       usage:dict, 
+                       from_cache:bool) -> dict:
+        """
+        Returns the token, cost and cache fields added to the 'stage_end' event of a completion.
+        Summaries read from the cache cost nothing.
+        """
+        return {'tokens_in': usage['prompt_tokens'], 
+                'tokens_out': usage['completion_tokens'], 
+                'cost_usd': 0.0 if from_cache else usage['total_tokens'] * (self.USD_per_1k/1000.0), 
+                'cache_hit': from_cache}
+    
+    def _count_prompt_tokens(self, 
+                             system_prompt:str, 
+                             user_content:str) -> int:
+        """
+        Counts the prompt tokens of a system and user message pair the way the chat API bills them:
+        the message contents and roles, 3 tokens of framing per message, and 3 tokens priming the reply.
+        """
+        roles_and_framing = 2 * (1 + 3) + 3
+        return sum(count_tokens_batch([system_prompt or "", user_content], self.encoding_name)) + roles_and_framing
+    
+    def _estimate_request_tokens(self, 
+                                 system_prompt:str, 
+                                 user_content:str, 
+                                 max_output_tokens:int = 512) -> int:
+        """
+        Estimates the tokens a chat request counts against the tokens per minute limit: its prompt
+        tokens, counted with tiktoken, plus an allowance for the completion.
+        """
+        return self._count_prompt_tokens(system_prompt, user_content) + max_output_tokens
+    
+    async def _chat_completion_async(self, 
+                                     client, 
+                                     system_prompt:str, 
+                                     user_content:str, 
+                                     use_cache:bool=True, 
+                                     refresh_cache:bool=False) -> dict:
+        """
+        Same as _chat_completion(), but awaits the request on an openai.AsyncOpenAI client so that many
+        summaries can be in flight on one event loop.
+        """
+        with stage('chat_completion', model=self.summarizer_model, mode='async') as metrics:
+            cache_key = self.summary_cache.make_key(user_content, 
+                                                    system_prompt, 
+                                                    self.summarizer_model)
+            completion = self._stored_completion(cache_key, use_cache, refresh_cache, metrics)
+            if completion is not None:
+                return completion
+            
+            response = await get_rate_limiter(self.summarizer_model).call_async(
+                client.chat.completions.create,
+                **self._completion_request(system_prompt, user_content))
+            
+            return self._store_completion(cache_key, response, use_cache, metrics)
+    
+    def split_transcript(self, 
+                         chunk_tokens:int = 3000, 
+                         overlap_tokens:int = 200) -> list:
+        """
+        Splits the input transcript into token-bounded chunks, where each chunk repeats the last
+        `overlap_tokens` tokens of the previous one so that no sentence loses its context at a boundary.
+        If segments were set with set_segments(), the chunks end at segment boundaries instead, and are
+        sized with the stored token counts of the segments, without re-tokenizing the transcript.
+        
+        Parameters:
+        -----------
+        chunk_tokens : int, optional
+            The maximum number of tokens per chunk. Default is 3000.
+        overlap_tokens : int, optional
+            The number of tokens shared by consecutive chunks. Default is 200.
+        
+        Returns:
+        --------
+        list
+            The transcript chunks, also stored in `transcript_chunks`.
+        """
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens.")
+        
+        if self.segments is not None:
+            self.transcript_chunks = chunk_segments(self.segments, 
+                                                    chunk_tokens=chunk_tokens, 
+                                                    overlap_tokens=overlap_tokens)
+            return self.transcript_chunks
+        
+        encoding = get_encoding(self.encoding_name)
+        tokens = self._transcript_tokens()
+        step = chunk_tokens - overlap_tokens
+        
+        self.transcript_chunks = [encoding.decode(tokens[start:start + chunk_tokens]) 
+                                  for start in range(0, max(len(tokens) - overlap_tokens, 1), step)]
+        
+        return self.transcript_chunks
+    
+    def split_transcript_stable(self, 
+                                target_tokens:int = 1500, 
+                                min_tokens:int = None, 
+                                max_tokens:int = None) -> list:
+        """
+        Splits the input transcript into content-defined chunks, whose boundaries mostly depend on the
+        sentences around them and not on their position in the transcript. Editing a sentence changes
+        the chunk that holds it, and usually at most the next one; the chunks before it, and the chunks
+        after the boundaries fall back in step, stay byte-identical, so their partial summaries can be
+        reused. Cuts forced by `min_tokens` or `max_tokens` depend on the chunk's length, so when an edit
+        changes where they fall, several more chunks can shift before the boundaries fall back in step.
+        
+        A chunk ends after a sentence once it holds at least `min_tokens` tokens and a hash of that
+        sentence falls below a threshold proportional to the sentence's token count, so that chunks
+        average about `target_tokens` tokens. A chunk is cut early rather than exceed `max_tokens`, and
+        a single sentence longer than `max_tokens` is split by tokens.
+        
+        Parameters:
+        -----------
+        target_tokens : int, optional
+            The average number of tokens per chunk. Default is 1500.
+        min_tokens : int, optional
+            The minimum number of tokens per chunk, except for the last one. Default is half of target_tokens.
+        max_tokens : int, optional
+            The maximum number of tokens per chunk. Default is twice target_tokens.
+        
+        Returns:
+        --------
+        list
+            The transcript chunks, also stored in `transcript_chunks`, with the SHA-256 digest of each
+            chunk in `chunk_hashes`.
+        """
+        min_tokens = min_tokens if min_tokens is not None else target_tokens // 2
+        max_tokens = max_tokens if max_tokens is not None else target_tokens * 2
+        if not min_tokens < target_tokens <= max_tokens:
+            raise ValueError("min_tokens < target_tokens <= max_tokens must hold.")
+        
+        sentences = [sentence for sentence in re.split(r'(?<=[.!?])\s+', self.transcript_text.strip()) if sentence]
+        sentence_tokens = count_tokens_batch(sentences, self.encoding_name) if sentences else []
+        encoding = get_encoding(self.encoding_name)
+        
+        chunks = []
+        chunk, chunk_tokens = [], 0
+        for sentence, n_tokens in zip(sentences, sentence_tokens):
+            if chunk and chunk_tokens + n_tokens > max_tokens:
+                chunks.append(' '.join(chunk))
+                chunk, chunk_tokens = [], 0
+            
+            if n_tokens > max_tokens:
+                tokens = encoding.encode(sentence)
+                chunks.extend(encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens), max_tokens))
+                continue
+            
+            chunk.append(sentence)
+            chunk_tokens += n_tokens
+            
+            sentence_hash = int.from_bytes(hashlib.blake2b(sentence.encode("utf-8"), digest_size=8).digest(), 'big')
+            if chunk_tokens >= min_tokens and sentence_hash < 2**64 * min(1.0, n_tokens / (target_tokens - min_tokens)):
+                chunks.append(' '.join(chunk))
+                chunk, chunk_tokens = [], 0
+        
+        if chunk:
+            chunks.append(' '.join(chunk))
+        
+        self.transcript_chunks = chunks
+        self.chunk_hashes = [hashlib.sha256(chunk.encode("utf-8")).hexdigest() for chunk in chunks]
+        
+        return self.transcript_chunks
+    
+    def set_segments(self, segments):
+        """
+        Uses timed segments as the input transcript, e.g. from a large transcript archive. The segment
+        file is memory-mapped, and split_transcript() chunks the segments by their stored token counts.
+        
+        Parameters:
+        -----------
+        segments : pyarrow.Table or str
+            A table from OpenAI_Transcriber.get_segments_table() or load_segments(), or the path of a
+            segment file saved by OpenAI_Transcriber.save_segments().
+        
+        Returns:
+        --------
+        None
+        """
+        self.segments = load_segments(segments) if isinstance(segments, str) else segments
+        self.transcript_text = ' '.join(self.segments.column('text').to_pylist())
+    
+    def summarize_text_hierarchical(self, 
+                                    system_prompt:str, 
+                                    n_items:int = None, 
+                                    chunk_tokens:int = 3000, 
+                                    overlap_tokens:int = 200, 
+                                    max_workers:int = 4, 
+                                    show_notes:bool = False, 
+                                    use_cache:bool = True, 
+                                    refresh_cache:bool = False) -> str:
+        """
+        Summarizes transcripts that do not fit in the model's context window with a map-reduce pass.
+        
+        The transcript is split into overlapping, token-bounded chunks with split_transcript(). Each chunk
+        is summarized into partial notes in parallel (map phase), then the partial notes are combined into
+        the final `n_items` bullet points (reduce phase). The token usage of both phases is added up in
+        `output_usage_dict`, so get_price() reports the cost of the whole job, and kept per phase in
+        `phase_usage_dict`.
+        
+        Parameters:
+        -----------
+        system_prompt: str
+            A prompt to be fed into the OpenAI API model.
+        n_items: int
+            The number of bullet points the summarized text should contain.
+        chunk_tokens: int
+            The maximum number of transcript tokens per chunk. Default is 3000.
+        overlap_tokens: int
+            The number of tokens shared by consecutive chunks. Default is 200.
+        max_workers: int
+            The maximum number of chunks summarized at the same time. Default is 4.
+        show_notes: bool
+            If True, it prints the summarized text.
+        use_cache: bool
+            If False, the summary cache is neither read nor written for this call.
+        refresh_cache: bool
+            If True, the API is called even on a cache hit, and the new summaries replace the cached ones.
+        
+        Returns:
+        --------
+        str
+            The summarized text.
+        """
+        with stage('summarize_hierarchical', model=self.summarizer_model) as metrics:
+            self.split_transcript(chunk_tokens=chunk_tokens, 
+                                  overlap_tokens=overlap_tokens)
+            
+            def summarize_chunk(chunk_text):
+                return self._chat_completion(system_prompt = system_prompt, 
+                                             user_content = self._map_prompt(chunk_text), 
+                                             use_cache = use_cache, 
+                                             refresh_cache = refresh_cache)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                partial_completions = list(executor.map(bind_context(summarize_chunk), self.transcript_chunks))
+            metrics['n_chunks'] = len(self.transcript_chunks)
+            
+            completion = self._chat_completion(system_prompt = system_prompt, 
+                                               user_content = self._reduce_prompt([c['summarized_text'] for c in partial_completions], n_items), 
+                                               use_cache = use_cache, 
+                                               refresh_cache = refresh_cache)
+            
+            self._set_map_reduce_result(partial_completions, completion)
+            
+            if show_notes==True:
+                print(self.summarized_text)
+            
+            return self.summarized_text
+    
+    def summarize_text_incremental(self, 
+                                   system_prompt:str, 
+                                   n_items:int = None, 
+                                   target_tokens:int = 1500, 
+                                   max_workers:int = 4, 
+                                   show_notes:bool = False, 
+                                   use_cache:bool = True) -> str:
+        """
+        Summarizes the transcript with a map-reduce pass over content-defined chunks, reusing the partial
+        summary of every chunk that is unchanged since an earlier run. Use it to re-summarize a transcript
+        after correcting names or jargon in it: only the edited chunks are sent to the model, followed by
+        the reduce request, so the cost of a re-run scales with the size of the edit rather than the
+        length of the recording.
+        
+        The transcript is split with split_transcript_stable(), and the partial summaries are remembered
+        in the summary cache, keyed on the content of each chunk, the system prompt and the model.
+        
+        Parameters:
+        -----------
+        system_prompt: str
+            A prompt to be fed into the OpenAI API model.
+        n_items: int
+            The number of bullet points the summarized text should contain.
+        target_tokens: int
+            The average number of transcript tokens per chunk. Default is 1500. Changing it changes
+            the chunks, so keep it the same between runs.
+        max_workers: int
+            The maximum number of chunks summarized at the same time. Default is 4.
+        show_notes: bool
+            If True, it prints the summarized text.
+        use_cache: bool
+            If False, the summary cache is neither read nor written for this call, so every chunk is
+            re-summarized and nothing is remembered for later runs.
+        
+        Returns:
+        --------
+        str
+            The summarized text. `incremental_report` holds the number of chunks, how many were reused
+            and re-summarized, and the tokens spent by this run.
+        """
+        with stage('summarize_incremental', model=self.summarizer_model) as metrics:
+            self.split_transcript_stable(target_tokens=target_tokens)
+            
+            def summarize_chunk(chunk_text):
+                return self._chat_completion(system_prompt = system_prompt, 
+                                             user_content = self._map_prompt(chunk_text), 
+                                             use_cache = use_cache)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                partial_completions = list(executor.map(bind_context(summarize_chunk), self.transcript_chunks))
+            
+            completion = self._chat_completion(system_prompt = system_prompt, 
+                                               user_content = self._reduce_prompt([c['summarized_text'] for c in partial_completions], n_items), 
+                                               use_cache = use_cache)
+            
+            self._set_map_reduce_result(partial_completions, completion)
+            
+            spent_completions = [c for c in partial_completions + [completion] if not c['from_cache']]
+            self.incremental_report = {'chunks': len(partial_completions), 
+                                       'reused': sum(c['from_cache'] for c in partial_completions), 
+                                       'resummarized': sum(not c['from_cache'] for c in partial_completions), 
+                                       'spent_usage': sum_usage([{'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}] + 
+                                                                [c['usage'] for c in spent_completions])}
+            metrics.update(n_chunks=self.incremental_report['chunks'], 
+                           n_reused=self.incremental_report['reused'])
+            
+            print(f"Re-summarized {self.incremental_report['resummarized']} of {self.incremental_report['chunks']} chunks.")
+            if show_notes==True:
+                print(self.summarized_text)
+            
+            return self.summarized_text
+    
+    def summarize_variants(self, 
+                           variants:list, 
+                           map_system_prompt:str = "You take detailed, faithful notes of transcripts, keeping every name, number and decision.", 
+                           target_tokens:int = 1500, 
+                           max_workers:int = 4, 
+                           show_notes:bool = False, 
+                           use_cache:bool = True) -> dict:
+        """
+        Generates several notes from one reading of the transcript, e.g. 5-point and 10-point notes, or
+        notes for different personas. The transcript is summarized once into partial notes per chunk
+        with a neutral `map_system_prompt` (map phase), and every variant is then derived from the
+        partial notes alone (reduce phase), in parallel. The transcript is sent to the model only once,
+        so input tokens and latency grow with the size of the partial notes, not of the transcript, for
+        every extra variant.
+        
+        The chunks are the content-defined chunks of split_transcript_stable(), so the map phase is also
+        reused by summarize_text_incremental() and by later calls with other variants.
+        
+        Parameters:
+        -----------
+        variants: list
+            One dictionary per variant, with a 'system_prompt', an 'n_items' and an optional 'name'.
+            Variants without a name are named "<n_items> points".
+        map_system_prompt: str
+            The system prompt of the shared map phase.
+        target_tokens: int
+            The average number of transcript tokens per chunk. Default is 1500.
+        max_workers: int
+            The maximum number of requests in flight at the same time. Default is 4.
+        show_notes: bool
+            If True, it prints the notes of every variant.
+        use_cache: bool
+            If False, the summary cache is neither read nor written for this call.
+        
+        Returns:
+        --------
+        dict
+            The notes of each variant, keyed by its name, also stored in `variant_notes`. The first
+            variant is also stored in `summarized_text`, and the token usage of each variant's reduce
+            request in `variant_usage_dict`.
+        """
+        if not variants:
+            raise ValueError("variants must not be empty")
+        names = [variant.get('name') or f"{variant['n_items']} points" for variant in variants]
+        if len(set(names)) < len(names):
+            raise ValueError("Variant names must be unique.")
+        
+        with stage('summarize_variants', model=self.summarizer_model, n_variants=len(variants)) as metrics:
+            self.split_transcript_stable(target_tokens=target_tokens)
+            
+            def summarize_chunk(chunk_text):
+                return self._chat_completion(system_prompt = map_system_prompt, 
+                                             user_content = self._map_prompt(chunk_text), 
+                                             use_cache = use_cache)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                partial_completions = list(executor.map(bind_context(summarize_chunk), self.transcript_chunks))
+                partial_summaries = [c['summarized_text'] for c in partial_completions]
+                
+                def summarize_variant(variant):
+                    return self._chat_completion(system_prompt = variant['system_prompt'], 
+                                                 user_content = self._reduce_prompt(partial_summaries, variant['n_items']), 
+                                                 use_cache = use_cache)
+                
+                variant_completions = list(executor.map(bind_context(summarize_variant), variants))
+            metrics['n_chunks'] = len(self.transcript_chunks)
+            
+            self._set_map_reduce_result(partial_completions, variant_completions[0])
+            self.phase_usage_dict['reduce'] = sum_usage([c['usage'] for c in variant_completions])
+            self.output_usage_dict = sum_usage(self.phase_usage_dict.values())
+            self.output_tokens_count = self.output_usage_dict['total_tokens']
+            self.from_cache = self.from_cache and all(c['from_cache'] for c in variant_completions)
+            
+            self.variant_notes = {name: c['summarized_text'] for name, c in zip(names, variant_completions)}
+            self.variant_usage_dict = {name: dict(c['usage']) for name, c in zip(names, variant_completions)}
+            
+            if show_notes==True:
+                for name, notes in self.variant_notes.items():
+                    print(f"{name}:\n{notes}\n")
+            
+            return self.variant_notes
+    
+    def save_variants(self, export_dir):
+        """
+        Saves the notes of every variant of summarize_variants() to "<export_dir> (<name>).txt".
+        
+        Returns:
+        --------
+        dict
+            The file path of each variant, keyed by its name.
+        """
+        self.variant_filepaths = {}
+        for name, notes in self.variant_notes.items():
+            filepath = f"{export_dir} ({name}).txt"
+            with stage('save', output='summary', path=filepath) as metrics:
+                with open(filepath, 'w', encoding="utf-8") as f:
+                    f.write(notes)
+                metrics['bytes_written'] = os.path.getsize(filepath)
+            print(f"Summarized note saved at: {filepath}")
+            self.variant_filepaths[name] = filepath
+        
+        return self.variant_filepaths
+    
+    @staticmethod
+    def _map_prompt(chunk_text:str) -> str:
+        return f"Summarize the following part of a transcript into key bullet points: '\n{chunk_text}'"
+    
+    @staticmethod
+    def _reduce_prompt(partial_summaries:list, n_items:int) -> str:
+        partial_notes = '\n\n'.join(f"Part {i+1}:\n{text}" for i, text in enumerate(partial_summaries))
+        return f"Combine the following partial notes of a transcript into {n_items} key bullet points: '\n{partial_notes}'"
+    
+    def _set_map_reduce_result(self, 
+                               partial_completions:list, 
+                               completion:dict):
+        """
+        Stores the result of a map-reduce pass, adding up the token usage of the map and reduce phases.
+        """
+        self.partial_summaries = [c['summarized_text'] for c in partial_completions]
+        self.response = completion['response']
+        self.from_cache = completion['from_cache'] and all(c['from_cache'] for c in partial_completions)
+        self.summarized_text = completion['summarized_text']
+        
+        map_usage = sum_usage([c['usage'] for c in partial_completions])
+        self.phase_usage_dict = {'map': map_usage, 
+                                 'reduce': dict(completion['usage'])}
+        self.output_usage_dict = sum_usage(self.phase_usage_dict.values())
+        self.output_tokens_count = self.output_usage_dict['total_tokens']
+    
     def save_txt(self, export_dir): 
         """
         Saves the summarized text to a text file with the specified export directory.
@@ -216,11 +1010,15 @@ class OpenAI_Summarizer:
         -------
         A message indicating where the summarized note was saved.
         """
-        with open(f"{export_dir}.txt", 'w', encoding="utf-8") as f:
-            f.write(self.summarized_text)
-            f.close()
+        self.filepath_txt = f"{export_dir}.txt"
+        
+        with stage('save', output='summary', path=self.filepath_txt) as metrics:
+            with open(self.filepath_txt, 'w', encoding="utf-8") as f:
+                f.write(self.summarized_text)
+                f.close()
+            metrics['bytes_written'] = os.path.getsize(self.filepath_txt)
             
-        print(f"Summarized note saved at: {export_dir}.txt")
+        print(f"Summarized note saved at: {self.filepath_txt}")
         
 
     def get_price(self) -> dict: 
@@ -240,6 +1038,10 @@ class OpenAI_Summarizer:
         None
         """
         self.output_price_dict = {k: v*(self.USD_per_1k/1000.0) for (k, v) in self.output_usage_dict.items()}
+        
+        if getattr(self, 'phase_usage_dict', None):
+            self.phase_price_dict = {phase: {k: v*(self.USD_per_1k/1000.0) for (k, v) in usage.items()} 
+                                     for phase, usage in self.phase_usage_dict.items()}
 
     
     def num_tokens_from_output_string(self, 
@@ -262,5 +1064,81 @@ class OpenAI_Summarizer:
         -------
         None
         """
-        self.output_encoding = tiktoken.get_encoding(self.encoding_name)
-        self.output_num_tokens = len(self.output_encoding.encode(self.summarized_text))
\ No newline at end of file
+        self.output_encoding = get_encoding(self.encoding_name)
+        self.output_num_tokens = count_tokens_batch([self.summarized_text], self.encoding_name)[0]
+        
+        return self.output_num_tokens
+
+def sum_usage(usage_dicts) -> dict:
+    """
+    Adds up OpenAI token usage dictionaries key by key.
+    """
+    total_usage = {}
+    for usage in usage_dicts:
+        for k, v in usage.items():
+            total_usage[k] = total_usage.get(k, 0) + (v or 0)
+    
+    return total_usage
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name:str = "cl100k_base") -> tiktoken.Encoding:
+    """
+    Returns the tiktoken encoding, loading it only once per process and sharing it between all
+    OpenAI_Summarizer instances.
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+_token_counts = OrderedDict()
+_token_counts_lock = threading.Lock()
+_MAX_TOKEN_COUNTS = 4096
+
+def _token_count_key(text:str, encoding_name:str) -> tuple:
+    return (encoding_name, hashlib.sha1(text.encode("utf-8")).digest())
+
+def _remember_token_count(text:str, encoding_name:str, num_tokens:int):
+    with _token_counts_lock:
+        key = _token_count_key(text, encoding_name)
+        _token_counts[key] = num_tokens
+        _token_counts.move_to_end(key)
+        while len(_token_counts) > _MAX_TOKEN_COUNTS:
+            _token_counts.popitem(last=False)
+
+def count_tokens_batch(texts:list, 
+                       encoding_name:str = "cl100k_base", 
+                       num_threads:int = 8) -> list:
+    """
+    Counts the tokens of many texts at once. Texts counted before in this process are looked up, and
+    all the others are encoded in a single multi-threaded encode_batch() call.
+
+    Parameters:
+    -----------
+    texts : list
+        The texts to count, e.g. the transcripts of a whole batch.
+    encoding_name : str, optional
+        The name of the encoding to use. Default is "cl100k_base".
+    num_threads : int, optional
+        The number of threads tiktoken encodes with. Default is 8.
+
+    Returns:
+    --------
+    list
+        The number of tokens of each text, in the order of `texts`.
+
+    Examples:
+    ---------
+    transcripts = [open(path, encoding="utf-8").read() for path in paths]
+    token_counts = count_tokens_batch(transcripts)
+    """
+    keys = [_token_count_key(text, encoding_name) for text in texts]
+    with _token_counts_lock:
+        counts = [_token_counts.get(key) for key in keys]
+
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        encoded = get_encoding(encoding_name).encode_batch([texts[i] for i in missing], 
+                                                           num_threads=num_threads)
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            _remember_token_count(texts[i], encoding_name, counts[i])
+
+    return counts
@@ -1,9 +1,33 @@
 import os
+import io
 import openai
+import ffmpeg
+import numpy as np
 from pydub import AudioSegment
-import wave
+from pydub.silence import detect_silence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import magic
 
+from NoteTaker_Probe import probe_audio
+from NoteTaker_Cache import Disk_Cache, hash_file, get_default_cache
+from NoteTaker_RateLimiter import get_rate_limiter
+from OpenAI_Client import get_client
+from NoteTaker_Events import stage, event_context, bind_context, events_enabled
+from NoteTaker_Silence import compress_silences, to_original_time
+from NoteTaker_Segments import SEGMENT_FORMATS, segments_to_table, write_segments
+from NoteTaker_MP3 import Memory_File, frame_index, map_file, split_frames
+from OpenAI_Summarizer import count_tokens_batch
+
+# Speech-optimized encoding profiles for transcode(). Whisper resamples everything to 16 kHz mono,
+# so higher sample rates, extra channels and music-grade bitrates only inflate the upload.
+SPEECH_PROFILES = {
+    'mp3': {'format': 'mp3', 'acodec': 'libmp3lame', 'audio_bitrate': '32k', 'ext': 'mp3', 'mime': 'audio/mpeg'},
+    'opus': {'format': 'ogg', 'acodec': 'libopus', 'audio_bitrate': '24k', 'ext': 'ogg', 'mime': 'audio/ogg'},
+}
+
+# Transcriber models that return segment-level timestamps with response_format="verbose_json".
+SEGMENT_MODELS = ('whisper-1',)
+
 class OpenAI_Transcriber:
     """
     This class provides methods for transcribing an audio file using OpenAI's
@@ -19,17 +43,26 @@ class OpenAI_Transcriber:
     - input_dir (str): The file path to the audio file to be transcribed.
     - transcriber_model (str): The name of the transcriber model to use. Defaults to "whisper-1".
     - USD_per_min (float): The cost per minute in USD for using the transcriber service. Defaults to 0.006.
+    - transcript_cache (Disk_Cache): The on-disk cache of transcripts. Defaults to the shared cache under Data/Cache/Transcripts.
+    - client (openai.OpenAI): The OpenAI client used for uploads. Defaults to the shared, connection-pooled client of OpenAI_Client.
     
     --------
     Methods:
     --------
     
     - to_mp3(export_dir=None): Converts the input audio file to MP3 format if necessary.
+    - transcode(profile="mp3"): Converts the input audio file in memory to 16 kHz mono at a speech bitrate, for upload.
+    - trim_silence(min_silence_s=1.0, keep_silence_s=0.3, ...): Shortens long silences before upload, to cut the billed minutes.
+    - get_probe(): Reads the duration, sample rate, channels, bitrate and size of the input audio file from its headers.
     - get_filesize(): Returns the file size of the input audio file in megabytes.
     - get_duration(): Returns the duration of the input audio file in seconds.
     - get_price(): Calculates the total price of the transcription service based on the duration of the input audio file.
-    - transcribe_audio(show_output=False): Transcribes the input audio file using the specified transcriber model.
+    - split_audio(max_chunk_mb=24.0, ...): Splits the input audio file at silence boundaries into upload-sized chunks.
+    - iter_audio_chunks(max_chunk_mb=24.0, ...): Yields the chunks of split_audio() one at a time.
+    - transcribe_audio(show_output=False, chunked=False, max_workers=4, use_cache=True): Transcribes the input audio file using the specified transcriber model.
     - save_txt(export_dir=None): Saves the transcription output to a text file.
+    - get_segments_table(encoding_name="cl100k_base"): Returns the timed segments as an Arrow table with their token counts.
+    - save_segments(export_dir=None, file_format="arrow"): Saves the timed segments to a columnar Arrow or Parquet file.
     
     -----------
     Attributes:
@@ -38,11 +71,23 @@ class OpenAI_Transcriber:
     - input_dir (str): The file path to the input audio file.
     - transcriber_model (str): The name of the transcriber model used.
     - USD_per_min (float): The cost per minute in USD for using the transcriber service.
+    - transcript_cache (Disk_Cache): The on-disk cache of transcripts, keyed by the audio bytes, model and options.
+    - client (openai.OpenAI): The OpenAI client used for uploads, or None for the shared client.
     - filepath_mp3 (str): The file path to the MP3 version of the input audio file.
+    - transcode_profile (str): The SPEECH_PROFILES key used by transcode(), or None if the input is uploaded as is.
+    - upload_filesize (float): The size of the transcoded upload in megabytes.
+    - offset_map (list): The (trimmed_start_s, original_start_s, length_s) stretches kept by trim_silence(), or None if the audio is not trimmed.
+    - trim_report (dict): The audio seconds and dollars removed by trim_silence(), and the seconds kept.
+    - probe (dict): The cached header metadata of the input audio file, shared by get_filesize(), get_duration() and get_price().
     - input_filesize (float): The file size of the input audio file in megabytes.
     - duration (float): The duration of the input audio file in seconds.
     - transcript (dict): The output of the transcription service, including the transcription text and confidence score.
     - transcript_text (str): The transcription text output only.
+    - chunks (list): The upload-sized chunks of the input audio file, produced by split_audio().
+    - transcript_segments (list): The per-chunk transcripts with their start and end offsets in seconds.
+    - timed_segments (list): The segment-level transcript returned by the model, with the start and end of each segment in seconds of the original recording.
+    - filepath_segments (str): The file path to the saved segment file.
+    - checkpoint (NoteTaker_Checkpoint): If set, the probe and each transcribed chunk are recorded in it, and finished units are read back from it instead of being redone. Defaults to None.
     - filepath_txt (str): The file path to the saved text file containing the transcription output.
     
     ---------
@@ -64,6 +109,9 @@ class OpenAI_Transcriber:
     # Transcribe the input file
     transcriber.transcribe_audio()
     
+    # Transcribe a long recording in parallel chunks of at most 24 MB each
+    transcriber.transcribe_audio(chunked=True, max_workers=4)
+    
     # Save the transcription output to a text file
     transcriber.save_txt()
 
@@ -71,7 +119,9 @@ class OpenAI_Transcriber:
     def __init__(self, 
                  input_dir:str, 
                  transcriber_model:str = "whisper-1", 
-                 USD_per_min:float = 0.006):
+                 USD_per_min:float = 0.006, 
+                 transcript_cache:Disk_Cache = None, 
+                 client:openai.OpenAI = None):
         """
         Initializes the OpenAI_Transcriber class.
 
@@ -83,6 +133,10 @@ class OpenAI_Transcriber:
             The OpenAI transcriber model to use. Default is "whisper-1".
         USD_per_min: float, optional (default=0.006)
             The price per minute for transcribing audio. Default is 0.006 USD per minute.
+        transcript_cache: Disk_Cache, optional (default=None)
+            The on-disk cache of transcripts. If None, the shared cache under Data/Cache/Transcripts is used.
+        client: openai.OpenAI, optional (default=None)
+            The OpenAI client used for uploads. If None, the shared client of OpenAI_Client.get_client() is used.
 
         Returns:
         -------
@@ -91,9 +145,17 @@ class OpenAI_Transcriber:
         self.input_dir = input_dir
         self.transcriber_model = transcriber_model
         self.USD_per_min = USD_per_min
+        self.transcript_cache = transcript_cache if transcript_cache is not None else get_default_cache("Transcripts")
+        self.client = client
         
         self.audio_file = open(self.input_dir, "rb")
         self.filetype = magic.Magic(mime=True).from_file(self.input_dir)
+        self.transcode_profile = None
+        self.offset_map = None
+        self.trim_settings = None
+        self.trimmed_audiosegment = None
+        self.timed_segments = []
+        self.checkpoint = None
         
     def to_mp3(self, export_dir=None):
         """
@@ -112,34 +174,98 @@ class OpenAI_Transcriber:
             Exception: Raised if an error occurs during the conversion process.
 
         """
-        if self.filetype == "audio/mpeg":
-            print("File is already in mp3 format.")
+        with stage('to_mp3'):
+            if self.filetype == "audio/mpeg":
+                print("File is already in mp3 format.")
+                
+            else:
+                try:
+                    self.audiosegment = AudioSegment.from_file(self.input_dir, self.filetype.split('/')[1])
             
-        else:
-            try:
-                self.audiosegment = AudioSegment.from_file(self.input_dir, self.filetype.split('/')[1])
-        
-                if export_dir==None:
-                    self.filepath_mp3 = self.input_dir.replace(self.input_dir.split('.')[-1],'mp3')
-                    self.audiosegment.export(self.filepath_mp3, format="mp3")
+                    if export_dir==None:
+                        self.filepath_mp3 = self.input_dir.replace(self.input_dir.split('.')[-1],'mp3')
+                        self.audiosegment.export(self.filepath_mp3, format="mp3")
 
-                else:
-                    self.filepath_mp3 = export_dir
-                    self.audiosegment.export(self.filepath_mp3, format="mp3")
+                    else:
+                        self.filepath_mp3 = export_dir
+                        self.audiosegment.export(self.filepath_mp3, format="mp3")
 
-                self.audio_file = open(self.filepath_mp3, "rb")
-                self.filetype = magic.Magic(mime=True).from_file(self.filepath_mp3)
-                
-                print(f"Output .mp3 file saved to {self.filepath_mp3}")
-                print("Conversion to mp3 successful.")
-                
-                self.input_dir = self.filepath_mp3
-                
-            except Exception as e:
-                print("Error converting file to mp3.")
-                print(e)
+                    self.audio_file = open(self.filepath_mp3, "rb")
+                    self.filetype = magic.Magic(mime=True).from_file(self.filepath_mp3)
+                    
+                    print(f"Output .mp3 file saved to {self.filepath_mp3}")
+                    print("Conversion to mp3 successful.")
+                    
+                    self.input_dir = self.filepath_mp3
+                    
+                except Exception as e:
+                    print("Error converting file to mp3.")
+                    print(e)
         
                 
+    def transcode(self, profile="mp3"):
+        """
+        Converts the input audio file to a speech-optimized upload in memory, without writing to disk.
+        
+        ffmpeg drops any video stream, downmixes to mono, resamples to 16 kHz and encodes at a low speech
+        bitrate (see SPEECH_PROFILES), streaming its output into a buffer that transcribe_audio() uploads
+        directly. At 32 kbps, recordings of up to about 100 minutes fit under the 25 MB upload limit
+        without chunking.
+
+        Args:
+            profile (str, optional): The encoding profile, either "mp3" or "opus". Defaults to "mp3".
+
+        Returns:
+            None
+
+        Raises:
+            ffmpeg.Error: Raised if ffmpeg fails to decode or encode the input file.
+        """
+        with stage('transcode', profile=profile) as metrics:
+            settings = SPEECH_PROFILES[profile]
+            
+            upload_bytes, _ = (ffmpeg
+                               .input(self.input_dir)
+                               .output('pipe:', 
+                                       format=settings['format'], 
+                                       acodec=settings['acodec'], 
+                                       audio_bitrate=settings['audio_bitrate'], 
+                                       ac=1, 
+                                       ar=16000, 
+                                       vn=None)
+                               .run(capture_stdout=True, capture_stderr=True))
+            
+            self.audio_file = io.BytesIO(upload_bytes)
+            self.audio_file.name = f"{os.path.splitext(os.path.basename(self.input_dir))[0]}.{settings['ext']}"
+            self.filetype = settings['mime']
+            self.transcode_profile = profile
+            self.upload_filesize = len(upload_bytes) / (1024 * 1024)
+            metrics['bytes_out'] = len(upload_bytes)
+            
+            print(f"Transcoded upload size: {self.upload_filesize:.2} MB.")
+        
+    def get_probe(self):
+        """
+        Reads the duration, sample rate, channels, bitrate and size of the input audio file from its
+        container headers or ffprobe metadata. The file is only fully decoded if both fail.
+        
+        The probe result is cached per file, so get_filesize(), get_duration() and get_price() share it.
+        
+        Returns
+        -------
+        dict
+            The probe result. See NoteTaker_Probe.probe_audio().
+        """
+        with stage('probe') as metrics:
+            self.probe = self.checkpoint.get('probe', self.input_dir) if self.checkpoint is not None else None
+            if self.probe is None:
+                self.probe = probe_audio(self.input_dir)
+                if self.checkpoint is not None:
+                    self.checkpoint.set('probe', self.input_dir, self.probe)
+            metrics.update(audio_s=self.probe['duration'], size_bytes=self.probe['size_bytes'], method=self.probe['method'])
+        
+        return self.probe
+    
     def get_filesize(self):
         """
         Get the file size of the input audio file.
@@ -153,13 +279,13 @@ class OpenAI_Transcriber:
         input_filesize : float
             The size of the input audio file in MB.
         """
-        self.input_filesize = os.stat(self.input_dir).st_size / (1024 * 1024)
+        self.input_filesize = self.get_probe()['size_mb']
         print(f"Input file size: {self.input_filesize:.2} MB.")
         
             
     def get_duration(self):
         """
-        Gets the duration of the input audio file.
+        Gets the duration of the input audio file from its headers, without decoding it.
         
         Raises:
             OSError: If the file cannot be opened or read.
@@ -169,16 +295,8 @@ class OpenAI_Transcriber:
             The duration of the audio file in seconds.
         """
         try:
-            if self.filetype == "audio/wav" or self.filetype == "audio/x-wav":
-                with wave.open(self.input_dir, 'r') as f:
-                    frames = f.getnframes()
-                    rate = f.getframerate()
-                    self.duration = frames / float(rate)
-                    print(f'Duration: {self.duration:.2} s')
-            else:
-                audio = AudioSegment.from_file(self.input_dir)
-                self.duration = audio.duration_seconds
-                print(f'Duration: {self.duration:.2} s')
+            self.duration = self.get_probe()['duration']
+            print(f'Duration: {self.duration:.2} s')
                 
         except:
             print("Error getting file length.")
@@ -193,26 +311,380 @@ class OpenAI_Transcriber:
         Returns:
             None
         """
-        self.total_price = self.duration * (self.USD_per_min/60.0)
+        self.total_price = self.get_billed_duration() * (self.USD_per_min/60.0)
+        
+    def get_billed_duration(self):
+        """
+        Returns the duration that is uploaded and billed in seconds: the trimmed duration after
+        trim_silence(), or the duration of the input audio file otherwise.
+        """
+        if self.trimmed_audiosegment is not None:
+            return len(self.trimmed_audiosegment) / 1000.0
+        
+        return self.get_probe()['duration']
+        
+    def trim_silence(self, 
+                     min_silence_s=1.0, 
+                     keep_silence_s=0.3, 
+                     silence_thresh=-40, 
+                     frame_ms=30, 
+                     profile="mp3"):
+        """
+        Shortens the long silences of the input audio file before upload, since transcription is billed
+        per minute of audio, dead air included.
+        
+        The audio is decoded to 16 kHz mono PCM and classified as speech or silence frame by frame from
+        its energy (see NoteTaker_Silence.compress_silences()). Every silence of at least `min_silence_s`
+        seconds is shortened to `keep_silence_s` seconds, and the rest is encoded in memory with a speech
+        profile, replacing the upload like transcode() does. The kept stretches are recorded in
+        `offset_map`, so that chunk timestamps still refer to the original recording.
+
+        Args:
+            min_silence_s (float, optional): The length from which a silence is shortened, in seconds. Defaults to 1.0.
+            keep_silence_s (float, optional): The length a long silence is shortened to, in seconds. 0 drops long silences. Defaults to 0.3.
+            silence_thresh (float, optional): The loudness in dBFS below which audio is considered silent. Defaults to -40.
+            frame_ms (int, optional): The length of the analysis frames in milliseconds. Defaults to 30.
+            profile (str, optional): The SPEECH_PROFILES key used to encode the trimmed audio, either "mp3" or "opus". Defaults to "mp3".
+
+        Returns:
+            dict: The trim report, also saved in `trim_report`.
+        """
+        settings = SPEECH_PROFILES[profile]
+        
+        with stage('trim_silence', profile=profile) as metrics:
+            audiosegment = AudioSegment.from_file(self.input_dir).set_channels(1).set_frame_rate(16000).set_sample_width(2)
+            samples = np.frombuffer(audiosegment.raw_data, dtype=np.int16)
+            
+            kept_samples, self.offset_map = compress_silences(samples, 
+                                                              sample_rate=16000, 
+                                                              frame_ms=frame_ms, 
+                                                              silence_thresh=silence_thresh, 
+                                                              min_silence_s=min_silence_s, 
+                                                              keep_silence_s=keep_silence_s)
+            self.trimmed_audiosegment = AudioSegment(data=kept_samples.tobytes(), 
+                                                     sample_width=2, 
+                                                     frame_rate=16000, 
+                                                     channels=1)
+            
+            self.audio_file = io.BytesIO()
+            self.trimmed_audiosegment.export(self.audio_file, 
+                                             format=settings['format'], 
+                                             codec=settings['acodec'], 
+                                             bitrate=settings['audio_bitrate'])
+            self.audio_file.name = f"{os.path.splitext(os.path.basename(self.input_dir))[0]}.{settings['ext']}"
+            self.filetype = settings['mime']
+            self.transcode_profile = profile
+            self.trim_settings = {'min_silence_s': min_silence_s, 
+                                  'keep_silence_s': keep_silence_s, 
+                                  'silence_thresh': silence_thresh, 
+                                  'frame_ms': frame_ms}
+            self.upload_filesize = self.audio_file.tell() / (1024 * 1024)
+            
+            removed_s = len(samples) / 16000 - len(kept_samples) / 16000
+            self.trim_report = {'removed_s': removed_s, 
+                                'removed_usd': removed_s * (self.USD_per_min/60.0), 
+                                'kept_s': len(kept_samples) / 16000}
+            metrics.update(self.trim_report)
+        
+        print(f"Trimmed {self.trim_report['removed_s']:.1f} s of silence, "
+              f"saving {self.trim_report['removed_usd']:.5f} USD. Upload size: {self.upload_filesize:.2} MB.")
+        
+        return self.trim_report
+        
+    def split_audio(self, 
+                    max_chunk_mb:float = 24.0, 
+                    bitrate:str = "64k", 
+                    search_window_s:float = 30.0, 
+                    min_silence_len:int = 700, 
+                    silence_thresh:int = -40):
+        """
+        Splits the input audio file at silence boundaries into chunks that fit under the upload size limit.
+        
+        Each chunk ends at the middle of the last silence found within the final `search_window_s` seconds
+        before the size limit, so that words are not cut in half. If no silence is found, the chunk is cut
+        at the size limit.
+        
+        MP3 input that is neither transcoded nor trimmed is not decoded at all: the file is memory-mapped,
+        its MPEG frame headers are parsed, and each chunk is a slice of the original frames that ends at the
+        last frame boundary under the size limit. This is much faster than decoding and re-encoding, and
+        loses no quality, but chunks are not aligned to silences and `bitrate` and the silence parameters
+        are ignored.
+
+        Parameters:
+        -----------
+        max_chunk_mb: float, optional (default=24.0)
+            The maximum size of each exported chunk in MB. Whisper rejects uploads above 25 MB.
+        bitrate: str, optional (default="64k")
+            The bitrate at which each chunk is exported as 16 kHz mono MP3.
+        search_window_s: float, optional (default=30.0)
+            How far back from the size limit to look for a silence to cut at, in seconds.
+        min_silence_len: int, optional (default=700)
+            The minimum length of a silence to cut at, in milliseconds.
+        silence_thresh: int, optional (default=-40)
+            The loudness in dBFS below which audio is considered silent.
+
+        Returns:
+        --------
+        None
+        """
+        with stage('split', max_chunk_mb=max_chunk_mb) as metrics:
+            self.chunks = list(self.iter_audio_chunks(max_chunk_mb=max_chunk_mb, 
+                                                      bitrate=bitrate, 
+                                                      search_window_s=search_window_s, 
+                                                      min_silence_len=min_silence_len, 
+                                                      silence_thresh=silence_thresh))
+            metrics['n_chunks'] = len(self.chunks)
+        
+        print(f"Split audio into {len(self.chunks)} chunks.")
+        
+    def iter_audio_chunks(self, 
+                          max_chunk_mb:float = 24.0, 
+                          bitrate:str = "64k", 
+                          search_window_s:float = 30.0, 
+                          min_silence_len:int = 700, 
+                          silence_thresh:int = -40):
+        """
+        Yields the chunks of split_audio() one at a time, so that callers can start uploading the first
+        chunk while the next one is still being cut and exported. Takes the same parameters as split_audio().
+        """
+        if self.trimmed_audiosegment is None and self.transcode_profile is None and self.filetype == "audio/mpeg":
+            mp3_chunks = self._iter_mp3_chunks(max_chunk_mb=max_chunk_mb)
+            if mp3_chunks is not None:
+                yield from mp3_chunks
+                return
+        
+        if self.trimmed_audiosegment is not None:
+            audiosegment = self.trimmed_audiosegment
+        else:
+            audiosegment = AudioSegment.from_file(self.input_dir)
+        
+        bitrate_bps = int(bitrate.rstrip('k')) * 1000
+        max_chunk_ms = int(max_chunk_mb * 1024 * 1024 * 8 / bitrate_bps * 1000)
+        search_window_ms = int(search_window_s * 1000)
+        
+        index = 0
+        start_ms = 0
+        while start_ms < len(audiosegment):
+            end_ms = min(start_ms + max_chunk_ms, len(audiosegment))
+            
+            if end_ms < len(audiosegment):
+                window_start_ms = max(start_ms, end_ms - search_window_ms)
+                silences = detect_silence(audiosegment[window_start_ms:end_ms], 
+                                          min_silence_len=min_silence_len, 
+                                          silence_thresh=silence_thresh, 
+                                          seek_step=10)
+                if silences:
+                    silence_start, silence_end = silences[-1]
+                    end_ms = window_start_ms + (silence_start + silence_end) // 2
+            
+            chunk_file = io.BytesIO()
+            audiosegment[start_ms:end_ms].export(chunk_file, 
+                                                 format="mp3", 
+                                                 bitrate=bitrate, 
+                                                 parameters=["-ac", "1", "-ar", "16000"])
+            chunk_file.name = f"chunk_{index}.mp3"
+            chunk_file.seek(0)
+            
+            yield {'index': index, 
+                   'start': to_original_time(start_ms / 1000.0, self.offset_map), 
+                   'end': to_original_time(end_ms / 1000.0, self.offset_map), 
+                   'upload_start': start_ms / 1000.0, 
+                   'audio_file': chunk_file}
+            
+            index += 1
+            start_ms = end_ms
+        
+    def _iter_mp3_chunks(self, max_chunk_mb=24.0):
+        """
+        Splits an MP3 input file at frame boundaries without decoding it, for iter_audio_chunks(). Each
+        chunk's audio file is a zero-copy slice of the memory-mapped input. Returns None if no MPEG frames
+        are found, e.g. for a free-format stream, so that the caller falls back to decoding.
+        """
+        with stage('index_frames') as metrics:
+            data = map_file(self.input_dir)
+            index = frame_index(data)
+            metrics.update(n_frames=len(index['offsets']), bytes_in=len(data))
+        
+        if len(index['offsets']) == 0:
+            return None
+        
+        def chunks():
+            for i, (start_byte, end_byte, start_s, end_s) in enumerate(split_frames(index, int(max_chunk_mb * 1024 * 1024))):
+                yield {'index': i, 
+                       'start': start_s, 
+                       'end': end_s, 
+                       'upload_start': start_s, 
+                       'audio_file': Memory_File(data[start_byte:end_byte], name=f"chunk_{i}.mp3")}
+        
+        return chunks()
+        
+    def _upload(self, audio_file, upload_start_s=0.0):
+        """
+        Sends an audio file to the transcriber model through the shared rate limiter of the model, which
+        retries throttled and failed uploads with backoff. The file is rewound before every attempt.
+        Models in SEGMENT_MODELS are asked for segment-level timestamps, which are returned in
+        `timed_segments` relative to the original recording, given where the uploaded audio starts.
+        """
+        def transcribe():
+            audio_file.seek(0)
+            return (self.client or get_client()).audio.transcriptions.create(model=self.transcriber_model, 
+                                                           file=audio_file, 
+                                                           response_format=self._response_format())
+        
+        with stage('upload', model=self.transcriber_model) as metrics:
+            audio_file.seek(0, os.SEEK_END)
+            metrics['bytes_uploaded'] = audio_file.tell()
+            
+            response = get_rate_limiter(self.transcriber_model).call(transcribe)
+            return {'text': response.text, 
+                    'timed_segments': self._timed_segments(response, upload_start_s)}
+        
+    def _response_format(self):
+        return "verbose_json" if self.transcriber_model in SEGMENT_MODELS else "json"
+        
+    def _timed_segments(self, response, upload_start_s=0.0):
+        """
+        Returns the segments of a verbose_json transcription response with their start and end in
+        seconds of the original recording, or an empty list if the response has no segments.
+        """
+        timed_segments = []
+        for segment in getattr(response, 'segments', None) or []:
+            if not isinstance(segment, dict):
+                segment = {'start': segment.start, 'end': segment.end, 'text': segment.text}
+            timed_segments.append({'start': to_original_time(upload_start_s + segment['start'], self.offset_map), 
+                                   'end': to_original_time(upload_start_s + segment['end'], self.offset_map), 
+                                   'text': segment['text'].strip()})
+        
+        return timed_segments
+        
+    def _chunk_checkpoint_key(self, chunk):
+        """
+        Returns the key of a chunk's transcript in the checkpoint, which identifies the chunk by its
+        index and its span of the original recording.
+        """
+        return f"{chunk['index']}:{chunk['start']:.3f}-{chunk['end']:.3f}"
+        
+    def _transcribe_chunk(self, chunk):
+        """
+        Transcribes a single chunk produced by split_audio() and returns it as a segment. With a
+        checkpoint, a chunk transcribed by an earlier run of the job is returned without uploading it.
+        """
+        checkpoint_key = self._chunk_checkpoint_key(chunk)
+        if self.checkpoint is not None and (segment := self.checkpoint.get('segment', checkpoint_key)) is not None:
+            return segment
+        
+        with event_context(chunk=chunk['index']):
+            transcript = self._upload(chunk['audio_file'], upload_start_s=chunk['upload_start'])
+        
+        segment = {'index': chunk['index'], 
+                   'start': chunk['start'], 
+                   'end': chunk['end'], 
+                   'text': transcript['text'].strip(), 
+                   'timed_segments': transcript['timed_segments']}
+        if self.checkpoint is not None:
+            self.checkpoint.set('segment', checkpoint_key, segment)
+        
+        return segment
+        
+    def _transcript_cache_key(self, chunked, max_chunk_mb):
+        """
+        Returns the transcript cache key of the input audio file for the given transcription options.
+        Trimmed audio is keyed by its trim settings as well.
+        """
+        options = {'chunked': chunked, 
+                   'max_chunk_mb': max_chunk_mb, 
+                   'transcode_profile': None if chunked else self.transcode_profile}
+        if self.trim_settings is not None:
+            options['trim_settings'] = self.trim_settings
+        
+        return self.transcript_cache.make_key(hash_file(self.input_dir), 
+                                              self.transcriber_model, 
+                                              options)
         
     def transcribe_audio(self, 
-                         show_output=False):
+                         show_output=False, 
+                         chunked=False, 
+                         max_workers=4, 
+                         max_chunk_mb=24.0, 
+                         use_cache=True, 
+                         progress_callback=None):
         """
         Transcribes the audio file using the specified transcriber model.
+        
+        In chunked mode, the audio is split at silence boundaries with split_audio() and the chunks are
+        transcribed concurrently by at most `max_workers` threads. The chunk transcripts are stitched back
+        together in order, and their time offsets are kept in `transcript_segments`.
+        
+        Transcripts are cached on disk, keyed by a hash of the audio bytes, the transcriber model and the
+        chunking options, so transcribing unchanged audio again returns instantly without an API call.
 
         Args:
             show_output (bool, optional): If True, prints the transcribed text. Defaults to False.
+            chunked (bool, optional): If True, splits the audio and transcribes the chunks in parallel. Defaults to False.
+            max_workers (int, optional): The maximum number of chunks transcribed at the same time. Defaults to 4.
+            max_chunk_mb (float, optional): The maximum size of each chunk in MB. Defaults to 24.0.
+            use_cache (bool, optional): If True, reads and writes the transcript cache. Defaults to True.
+            progress_callback (callable, optional): Called as progress_callback(n_done, n_total) each time a chunk
+                is transcribed. An unchunked or cached transcript counts as a single chunk. Defaults to None.
 
         Returns:
             None
         """
-        self.transcript = openai.Audio.transcribe(self.transcriber_model, 
-                                                  self.audio_file)
-        
-        self.transcript_text = self.transcript['text']
-        
-        if show_output==True:
-            print(self.transcript_text)
+        with stage('transcribe', model=self.transcriber_model, chunked=chunked) as metrics:
+            if use_cache==True:
+                cache_key = self._transcript_cache_key(chunked=chunked, max_chunk_mb=max_chunk_mb)
+                cached_transcript = self.transcript_cache.get(cache_key)
+            else:
+                cached_transcript = None
+            
+            if cached_transcript is not None:
+                self.transcript = cached_transcript
+                self.transcript_segments = cached_transcript.get('segments', [])
+                print("Transcript loaded from cache.")
+                
+            elif chunked==True:
+                self.split_audio(max_chunk_mb=max_chunk_mb)
+                
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(bind_context(self._transcribe_chunk), chunk) for chunk in self.chunks]
+                    for n_done, _ in enumerate(as_completed(futures), start=1):
+                        if progress_callback is not None:
+                            progress_callback(n_done, len(futures))
+                    self.transcript_segments = [future.result() for future in futures]
+                
+                self.transcript = {'text': ' '.join(segment['text'] for segment in self.transcript_segments), 
+                                   'segments': self.transcript_segments, 
+                                   'timed_segments': [timed_segment for segment in self.transcript_segments 
+                                                      for timed_segment in segment.get('timed_segments', [])]}
+                
+            elif self.checkpoint is not None and self.checkpoint.get('transcript', self.transcode_profile or "input") is not None:
+                self.transcript = self.checkpoint.get('transcript', self.transcode_profile or "input")
+                print("Transcript loaded from checkpoint.")
+                
+            else:
+                self.transcript = self._upload(self.audio_file)
+                if self.checkpoint is not None:
+                    self.checkpoint.set('transcript', self.transcode_profile or "input", self.transcript)
+            
+            if progress_callback is not None and (cached_transcript is not None or chunked==False):
+                progress_callback(1, 1)
+            
+            if use_cache==True and cached_transcript is None:
+                self.transcript_cache.set(cache_key, dict(self.transcript))
+            
+            self.transcript_text = self.transcript['text']
+            self.timed_segments = self.transcript.get('timed_segments', [])
+            
+            if events_enabled():
+                billed_s = self.get_billed_duration()
+                metrics.update(cache_hit=cached_transcript is not None, 
+                               audio_s=self.get_probe()['duration'], 
+                               billed_s=billed_s, 
+                               n_chunks=len(self.transcript.get('segments', [])) or 1, 
+                               cost_usd=0.0 if cached_transcript is not None else billed_s * (self.USD_per_min/60.0))
+            
+            if show_output==True:
+                print(self.transcript_text)
             
     def save_txt(self, export_dir=None): 
         """
@@ -221,20 +693,72 @@ class OpenAI_Transcriber:
         Parameters:
         -----------
         export_dir: str, optional
-            The export directory of the output .txt file. If None, 
-            the directory will be the same as the input audio file.
+            The export directory of the output .txt file. If None, the transcript
+            is saved next to the input audio file as "<name> [Transcribed].txt".
         
         Returns:
         --------
         None
         """
         if export_dir is None:
-            self.filepath_txt = self.input_dir.replace(self.input_dir.split('.')[-1],' txt')
+            self.filepath_txt = f"{os.path.splitext(self.input_dir)[0]} [Transcribed].txt"
         else:
             self.filepath_txt = f"{export_dir}.txt"
         
-        with open(self.filepath_txt, 'w', encoding="utf-8") as f:
-            f.write(self.transcript_text)
-            f.close()
+        with stage('save', output='transcript', path=self.filepath_txt) as metrics:
+            with open(self.filepath_txt, 'w', encoding="utf-8") as f:
+                f.write(self.transcript_text)
+                f.close()
+            metrics['bytes_written'] = os.path.getsize(self.filepath_txt)
+        
+        print(f"Transcript saved at: {self.filepath_txt}")
+        
+    def get_segments_table(self, encoding_name="cl100k_base"):
+        """
+        Returns the timed segments of the transcript as an Arrow table with the start, end, text and
+        token count of each segment. Transcripts without timed segments, e.g. from older cache entries
+        or models outside SEGMENT_MODELS, fall back to one row per chunk, or to one row for the whole recording.
+        
+        Parameters:
+        -----------
+        encoding_name: str, optional
+            The encoding used to count the tokens of each segment. Default is "cl100k_base".
+        
+        Returns:
+        --------
+        pyarrow.Table
+        """
+        segments = self.timed_segments or getattr(self, 'transcript_segments', None) or \
+                   [{'start': 0.0, 'end': self.get_probe()['duration'], 'text': self.transcript_text}]
+        
+        return segments_to_table(segments, count_tokens_batch([segment['text'] for segment in segments], encoding_name))
+        
+    def save_segments(self, export_dir=None, file_format="arrow", encoding_name="cl100k_base"):
+        """
+        Saves the timed segments of the transcript to a columnar file that load_segments() of
+        NoteTaker_Segments reads memory-mapped.
+        
+        Parameters:
+        -----------
+        export_dir: str, optional
+            The export directory of the output file, without its extension. If None, the segments are
+            saved next to the input audio file as "<name> [Segments].arrow".
+        file_format: str, optional
+            Either "arrow", for an uncompressed Arrow IPC file that is mapped without copying, or
+            "parquet", for a compressed Parquet file. Default is "arrow".
+        encoding_name: str, optional
+            The encoding used to count the tokens of each segment. Default is "cl100k_base".
+        
+        Returns:
+        --------
+        None
+        """
+        if export_dir is None:
+            export_dir = f"{os.path.splitext(self.input_dir)[0]} [Segments]"
+        self.filepath_segments = f"{export_dir}{SEGMENT_FORMATS[file_format]}"
+        
+        with stage('save', output='segments', path=self.filepath_segments) as metrics:
+            write_segments(self.get_segments_table(encoding_name=encoding_name), self.filepath_segments)
+            metrics['bytes_written'] = os.path.getsize(self.filepath_segments)
         
-        print(f"Transcript saved at: {self.filepath_txt}")
\ No newline at end of file
+        print(f"Segments saved at: {self.filepath_segments}")
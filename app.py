@@ -1,32 +1,209 @@
 import streamlit as st
-# import OpenAI_NoteTaker as nt
-# import OpenAI_Summarizer as sm
-# import OpenAI_Transcriber as transcriber
+from NoteTaker_Daemon import daemon_running, request
 import os
+import time
+import hashlib
+import tempfile
+import threading
 
 # NOTE: magic-bin currently doesn't provide support for linux, but it supports x32, x64 and OSX
 
 # const
-# api_key_local = st.secrets['OPEN_API_KEY']
+ENCODING_NAME = "cl100k_base"
+POLL_INTERVAL_S = 0.5
+MAX_CACHED_NOTES = 128
+DEFAULT_PROMPT = "You are a graduating SHS student, excellent at summarizing notes in layman's terms."
+
+# resources shared by every session and rerun
+@st.cache_resource
+def load_client():
+  from OpenAI_Client import configure_client, get_client
+
+  # the API key comes from .streamlit/secrets.toml if given, else from OPENAI_API_KEY
+  try:
+    api_key_local = st.secrets.get('OPEN_API_KEY')
+  except FileNotFoundError:
+    api_key_local = None
+  if api_key_local:
+    configure_client(api_key=api_key_local)
+  return get_client()
+
+@st.cache_resource
+def load_encoding():
+  from OpenAI_Summarizer import get_encoding
+
+  # warms the tokenizer shared with OpenAI_Summarizer, so the first job does not pay for loading it
+  return get_encoding(ENCODING_NAME)
+
+@st.cache_resource
+def job_registry():
+  # running and unread jobs, keyed by (upload hash, prompt, number of items)
+  return {}
+
+@st.cache_resource
+def notes_cache():
+  # the results of finished jobs, keyed like job_registry(), oldest first
+  return {}
+
+class NoteJob:
+  """
+  Runs OpenAI_NoteTaker on one uploaded recording in a background thread. The script reruns poll its
+  progress, so the page stays responsive while the recording is transcribed and summarized. If a
+  worker daemon is running (python notetaker.py daemon), the job is sent to it instead, and the thread
+  only relays its messages.
+  """
+  def __init__(self, input_path, system_prompt, n_items, client):
+    self.input_path = input_path
+    self.system_prompt = system_prompt
+    self.n_items = n_items
+    self.client = client
+    self.stage = 'Queued'
+    self.chunks_done = 0
+    self.chunks_total = 0
+    self.bullets = []
+    self.result = None
+    self.error = None
+    self.thread = threading.Thread(target=self._run, daemon=True)
+
+  def _on_chunk(self, n_done, n_total):
+    self.chunks_done = n_done
+    self.chunks_total = n_total
+    if n_done == n_total:
+      self.stage = 'Summarizing'
+
+  def _run_local(self):
+    # imported here, as in notetaker.py, so jobs sent to the daemon never load the pipeline in the app
+    from OpenAI_NoteTaker import OpenAI_NoteTaker
+
+    note_taker = OpenAI_NoteTaker(input_dir=self.input_path, encoding_name=ENCODING_NAME, client=self.client)
+    self.stage = 'Transcribing'
+    for bullet in note_taker.stream_notes(system_prompt=self.system_prompt,
+                                          n_items=self.n_items,
+                                          chunked=True,
+                                          progress_callback=self._on_chunk):
+      self.bullets.append(bullet)
+    note_taker.get_total_job_price()
+    self.result = {'transcript': note_taker.Transcribed_Audio,
+                   'notes': note_taker.Summarizer.summarized_text,
+                   'price': note_taker.complete_job_price_dict}
+
+  def _run_remote(self):
+    job = {'input_path': self.input_path, 'system_prompt': self.system_prompt, 'n_items': self.n_items, 'chunked': True}
+    for message in request({'op': 'submit', 'job': job}):
+      if message['type'] == 'accepted':
+        self.stage = 'Transcribing'
+      elif message['type'] == 'progress':
+        self._on_chunk(message['chunks_done'], message['chunks_total'])
+      elif message['type'] == 'bullet':
+        self.bullets.append(message['text'])
+      elif message['type'] == 'done':
+        self.result = message['result']
+      elif message['type'] == 'error':
+        raise RuntimeError(message['error'])
+    if self.result is None:
+      raise RuntimeError('The worker daemon stopped before the job finished.')
+
+  def _run(self):
+    try:
+      if daemon_running():
+        self._run_remote()
+      else:
+        self._run_local()
+      self.stage = 'Done'
+    except Exception as e:
+      self.error = repr(e)
+      self.stage = 'Failed'
+    finally:
+      os.remove(self.input_path)
+
+def get_notes(job_key):
+  # a finished job moves its result to notes_cache(); running and failed jobs are never cached
+  cache = notes_cache()
+  if job_key not in cache:
+    job = job_registry().get(job_key)
+    if job is None or job.result is None:
+      return None
+    cache[job_key] = job.result
+    job_registry().pop(job_key, None)
+    while len(cache) > MAX_CACHED_NOTES:
+      cache.pop(next(iter(cache)))
+  return cache[job_key]
+
+def upload_digest(file):
+  # the upload is hashed once, not again on every poll rerun
+  upload_id = (getattr(file, 'file_id', None), file.name, file.size)
+  if st.session_state.get('upload_id') != upload_id:
+    st.session_state['upload_id'] = upload_id
+    st.session_state['upload_digest'] = hashlib.sha256(file.getvalue()).hexdigest()
+  return st.session_state['upload_digest']
 
 # functions
-def testCallback(file):
-  # parse note taker file
+def submitCallback(file, job_key):
+  # start a note taker job for the uploaded file, unless its notes are cached or already running
   if not file:
-    print('Input file first.')
+    st.session_state['message'] = 'Input file first.'
+    return
+  if get_notes(job_key) is not None or job_key in job_registry():
     return
-  print('Processing...')
-  print(file)
+
+  _, extension = os.path.splitext(file.name)
+  fd, input_path = tempfile.mkstemp(suffix=extension)
+  with os.fdopen(fd, 'wb') as f:
+    f.write(file.getvalue())
+
+  job = NoteJob(input_path=input_path, system_prompt=job_key[1], n_items=job_key[2], client=load_client())
+  job_registry()[job_key] = job
+  job.thread.start()
 
 # Page Content
 st.title('Note Taker by Lanz Lagman')
 
+load_client()
+load_encoding()
+
 file = st.file_uploader("Upload your audio here!")
-st.button("Submit", on_click=testCallback(file), use_container_width=True)
+system_prompt = st.text_area("Note taker role", value=DEFAULT_PROMPT)
+n_items = st.number_input("Number of bullet points", min_value=1, max_value=30, value=5)
+
+job_key = None
+if file:
+  job_key = (upload_digest(file), system_prompt, int(n_items))
+
+st.button("Submit", on_click=submitCallback, args=(file, job_key), use_container_width=True)
+
+if 'message' in st.session_state:
+  st.warning(st.session_state.pop('message'))
+
+if job_key is not None:
+  notes = get_notes(job_key)
+  job = job_registry().get(job_key)
+
+  if notes is not None:
+    st.subheader('Notes')
+    st.markdown(notes['notes'])
+    st.caption(f"Total job price: {notes['price']['total_job_price']:.5f} USD")
+    with st.expander('Transcript'):
+      st.write(notes['transcript'])
+
+    stem = os.path.splitext(file.name)[0]
+    st.download_button("Download notes", notes['notes'], file_name=f"{stem} [Notes].txt")
+    st.download_button("Download transcript", notes['transcript'], file_name=f"{stem} [Transcribed].txt")
+
+  elif job is not None and job.error is not None:
+    job_registry().pop(job_key, None)
+    st.error(f"Note taking failed: {job.error}")
 
-# st.write(api_key_local)
+  elif job is not None:
+    if job.chunks_total:
+      st.progress(job.chunks_done / job.chunks_total,
+                  text=f"{job.stage}: {job.chunks_done}/{job.chunks_total} chunks transcribed")
+    else:
+      st.progress(0.0, text=f"{job.stage}...")
+    if job.bullets:
+      st.markdown('\n'.join(job.bullets))
 
-# TODO: implement a basic file upload that 
+    time.sleep(POLL_INTERVAL_S)
+    st.rerun()
 
 st.divider()
 st.write("""
@@ -34,4 +211,4 @@ st.write("""
       <span>Streamlit build designed by Jay Cruz</span>
       <span>Source code here</span>
     </div>
-  """, unsafe_allow_html=True)
\ No newline at end of file
+  """, unsafe_allow_html=True)
@@ -0,0 +1,159 @@
+"""
+Command-line interface of the note taker.
+
+    python notetaker.py notes "Data/Input/QnA.mp3" --n-items 5 --chunked
+    python notetaker.py daemon --max-jobs 4
+    python notetaker.py status
+    python notetaker.py stop
+
+`notes` sends the job to the worker daemon if one is running, and runs it in this process otherwise.
+Only the standard library is imported at startup; the pipeline, tiktoken and the OpenAI client are
+imported when a job actually runs here, so the CLI starts in milliseconds.
+"""
+import os
+import sys
+import time
+import argparse
+
+def _job(args) -> dict:
+    stem = os.path.splitext(args.input_path)[0]
+    out = args.out if args.out is not None else stem
+
+    return {'input_path': os.path.abspath(args.input_path),
+            'system_prompt': args.prompt,
+            'n_items': args.n_items,
+            'chunked': args.chunked,
+            'transcode': args.transcode,
+            'trim_silence': args.trim_silence,
+            'hierarchical': args.hierarchical,
+            'incremental': args.incremental,
+            'use_cache': not args.no_cache,
+            'checkpoint': args.checkpoint,
+            'export_transcription_dir': os.path.abspath(f"{out} [Transcribed]"),
+            'export_summary_dir': os.path.abspath(f"{out} [Notes]")}
+
+def _print_message(message:dict, quiet:bool):
+    if message['type'] == 'bullet':
+        print(message['text'], flush=True)
+    elif message['type'] == 'progress' and not quiet:
+        print(f"Transcribed {message['chunks_done']}/{message['chunks_total']} chunks.", file=sys.stderr, flush=True)
+
+def _notes_remote(job:dict, args) -> dict:
+    from NoteTaker_Daemon import request
+
+    for message in request({'op': 'submit', 'job': job}, args.address):
+        _print_message(message, args.quiet)
+        if message['type'] == 'accepted' and not args.quiet:
+            print(f"Job {message['job_id']} accepted by the daemon.", file=sys.stderr, flush=True)
+        elif message['type'] == 'done':
+            return message['result']
+        elif message['type'] == 'error':
+            raise RuntimeError(message['error'])
+
+    raise RuntimeError("The daemon closed the connection before the job finished.")
+
+def _notes_local(job:dict, args) -> dict:
+    from NoteTaker_Daemon import NoteTaker_Daemon
+
+    # the same job runner as the daemon, without the socket
+    daemon = NoteTaker_Daemon(max_jobs=1)
+    daemon.warm_up()
+    results = []
+
+    def listener(message:dict):
+        _print_message(message, args.quiet)
+        if message['type'] == 'done':
+            results.append(message['result'])
+
+    job_id = daemon.submit(job, listener=listener)
+    daemon.shutdown()
+    if not results:
+        raise RuntimeError(daemon.jobs[job_id]['error'])
+
+    return results[0]
+
+def notes(args):
+    from NoteTaker_Daemon import daemon_running
+
+    job = _job(args)
+    start = time.perf_counter()
+    if args.no_daemon==False and daemon_running(args.address):
+        result = _notes_remote(job, args)
+    else:
+        result = _notes_local(job, args)
+
+    if not args.quiet:
+        print(f"\nTranscription saved at: {result.get('transcript_path')}", file=sys.stderr)
+        print(f"Notes saved at: {result.get('notes_path')}", file=sys.stderr)
+        print(f"Total job price: {result['price']['total_job_price']:.5f} USD "
+              f"({time.perf_counter() - start:.1f} s)", file=sys.stderr)
+
+def daemon(args):
+    from NoteTaker_Daemon import NoteTaker_Daemon
+
+    NoteTaker_Daemon(address=args.address,
+                     max_jobs=args.max_jobs,
+                     transcriber_model=args.transcriber_model,
+                     summarizer_model=args.summarizer_model).serve_forever()
+
+def status(args):
+    from NoteTaker_Daemon import request
+
+    try:
+        jobs = next(request({'op': 'status'}, args.address))['jobs']
+    except OSError:
+        print(f"No NoteTaker daemon is running at {args.address}.")
+        return 1
+
+    print(f"NoteTaker daemon running at {args.address}: {len(jobs)} job(s).")
+    for job_id, job in jobs.items():
+        print(f"  {job_id}  {job['status']:<8}  {job['input_path']}" + (f"  {job['error']}" if job['error'] else ""))
+
+def stop(args):
+    from NoteTaker_Daemon import request
+
+    try:
+        next(request({'op': 'shutdown'}, args.address))
+    except OSError:
+        print(f"No NoteTaker daemon is running at {args.address}.")
+        return 1
+
+    print("NoteTaker daemon stopping once its running jobs finish.")
+
+def main(argv:list = None) -> int:
+    from NoteTaker_Daemon import DEFAULT_ADDRESS
+
+    parser = argparse.ArgumentParser(prog="notetaker", description="Transcribe and summarize recordings with the OpenAI API.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="The socket of the worker daemon. Defaults to %(default)s.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    notes_parser = subparsers.add_parser("notes", help="Take notes of a recording.")
+    notes_parser.add_argument("input_path", help="The recording to transcribe and summarize.")
+    notes_parser.add_argument("--prompt", default=None, help="The system prompt of the summarizer.")
+    notes_parser.add_argument("--n-items", type=int, default=None, help="The number of bullet points.")
+    notes_parser.add_argument("--chunked", action="store_true", help="Transcribe long recordings in parallel chunks.")
+    notes_parser.add_argument("--transcode", action="store_true", help="Convert the recording to a speech profile before upload.")
+    notes_parser.add_argument("--trim-silence", action="store_true", help="Shorten long silences before upload.")
+    notes_parser.add_argument("--hierarchical", action="store_true", help="Summarize long transcripts with a map-reduce pass.")
+    notes_parser.add_argument("--incremental", action="store_true", help="Remember partial summaries, so edited transcripts are cheap to re-summarize.")
+    notes_parser.add_argument("--checkpoint", action="store_true", help="Checkpoint finished chunks and requests, so a crashed job resumes where it stopped.")
+    notes_parser.add_argument("--no-cache", action="store_true", help="Ignore the transcript and summary caches.")
+    notes_parser.add_argument("--out", default=None, help="The output path stem. Defaults to the recording's path without extension.")
+    notes_parser.add_argument("--no-daemon", action="store_true", help="Run the job in this process even if a daemon is running.")
+    notes_parser.add_argument("--quiet", action="store_true", help="Only print the bullet points.")
+    notes_parser.set_defaults(func=notes)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Run the warm worker daemon in the foreground.")
+    daemon_parser.add_argument("--max-jobs", type=int, default=4, help="The maximum number of jobs that run at the same time. Defaults to %(default)s.")
+    daemon_parser.add_argument("--transcriber-model", default="whisper-1")
+    daemon_parser.add_argument("--summarizer-model", default="gpt-3.5-turbo")
+    daemon_parser.set_defaults(func=daemon)
+
+    subparsers.add_parser("status", help="List the jobs of the running daemon.").set_defaults(func=status)
+    subparsers.add_parser("stop", help="Stop the running daemon.").set_defaults(func=stop)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import os
+import sys
+import wave
+from types import SimpleNamespace
+
+import pytest
+import tiktoken
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class Fake_Encoding:
+    """
+    Stands in for a tiktoken encoding, which is downloaded on first use, with one token per word.
+    """
+    name = "fake"
+
+    def encode(self, text:str) -> list:
+        return text.split()
+
+    def encode_batch(self, texts:list, num_threads:int = 8) -> list:
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens:list) -> str:
+        return ' '.join(tokens)
+
+class Fake_Client:
+    """
+    Stands in for openai.OpenAI or, with is_async=True, openai.AsyncOpenAI. Every chat completion
+    answers with one bullet point, streamed in two pieces with stream=True, and every transcription
+    with the size of the uploaded file.
+    The requests are recorded in `chat_requests` and `uploads`.
+    """
+    def __init__(self, is_async:bool = False):
+        self.is_async = is_async
+        self.chat_requests = []
+        self.uploads = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._wrap(self._chat)))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._wrap(self._transcribe)))
+
+    def _wrap(self, fn):
+        if not self.is_async:
+            return fn
+
+        async def create(**kwargs):
+            return fn(**kwargs)
+        return create
+
+    def _chat(self, model:str, messages:list, stream:bool = False):
+        self.chat_requests.append(messages[-1]['content'])
+        if stream==True:
+            pieces = ["- note ", f"{len(self.chat_requests)}"]
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]) for piece in pieces])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"- note {len(self.chat_requests)}"))],
+                               usage={'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15})
+
+    def _transcribe(self, model:str, file, response_format:str):
+        file.seek(0)
+        self.uploads.append(len(file.read()))
+        return SimpleNamespace(text=f"{self.uploads[-1]} bytes of speech.")
+
+@pytest.fixture(autouse=True)
+def fake_encoding(monkeypatch):
+    encoding = Fake_Encoding()
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda encoding_name: encoding)
+    return encoding
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # the default caches and outputs live under Data/, relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def client():
+    return Fake_Client()
+
+@pytest.fixture
+def async_client():
+    return Fake_Client(is_async=True)
+
+def write_wav(path:str, seconds:float, rate:int = 8000, channels:int = 1):
+    """
+    Writes a silent 16-bit PCM WAV file.
+    """
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(bytes(2 * channels * int(rate * seconds)))
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import NoteTaker_Probe
+from NoteTaker_Batch import NoteTaker_Batch
+from NoteTaker_Cache import Disk_Cache
+from conftest import write_wav
+
+def make_batch(tmp_path, **kwargs) -> NoteTaker_Batch:
+    return NoteTaker_Batch(input_dir=str(tmp_path / "Input"),
+                           output_dir=str(tmp_path / "Output"),
+                           max_processes=2,
+                           transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                           summary_cache=Disk_Cache(str(tmp_path / "Summaries")),
+                           **kwargs)
+
+def test_find_files_detects_recordings_in_subdirectories(tmp_path):
+    os.makedirs(tmp_path / "Input" / "Day 2")
+    write_wav(str(tmp_path / "Input" / "part 1.wav"), seconds=1.0)
+    write_wav(str(tmp_path / "Input" / "Day 2" / "part 2.wav"), seconds=1.0)
+    (tmp_path / "Input" / "agenda.txt").write_text("Not a recording.")
+
+    files = make_batch(tmp_path).find_files()
+
+    assert sorted(files) == sorted(["part 1.wav", os.path.join("Day 2", "part 2.wav")])
+    assert all(filetype.startswith("audio/") for filetype in files.values())
+
+def test_pending_files_skips_done_and_unchanged_files(tmp_path):
+    os.makedirs(tmp_path / "Input")
+    for name in ["done.wav", "changed.wav", "failed.wav", "new.wav"]:
+        write_wav(str(tmp_path / "Input" / name), seconds=1.0)
+
+    batch = make_batch(tmp_path)
+    for name in ["done.wav", "changed.wav"]:
+        batch._update_manifest(name, status='done', fingerprint=batch._fingerprint(name))
+    batch._update_manifest("failed.wav", status='failed', fingerprint=batch._fingerprint("failed.wav"))
+    write_wav(str(tmp_path / "Input" / "changed.wav"), seconds=2.0)
+
+    # the manifest is saved after every update, so a new batch over the same output picks it up
+    assert sorted(make_batch(tmp_path).pending_files()) == ["changed.wav", "failed.wav", "new.wav"]
+
+def test_run_takes_notes_for_every_file_and_passes_max_workers(tmp_path, client, monkeypatch):
+    os.makedirs(tmp_path / "Input" / "Day 2")
+    for i, relpath in enumerate(["part 1.wav", "part 2.wav", os.path.join("Day 2", "part 3.wav")]):
+        write_wav(str(tmp_path / "Input" / relpath), seconds=1.0 + i)
+    probes = []
+    probe_wave = NoteTaker_Probe._probe_wave
+    monkeypatch.setattr(NoteTaker_Probe, "_probe_wave", lambda path: probes.append(path) or probe_wave(path))
+
+    manifest = make_batch(tmp_path, client=client).run(system_prompt="Take notes.", n_items=3, max_workers=3)
+
+    assert sorted(manifest) == sorted(["part 1.wav", "part 2.wav", os.path.join("Day 2", "part 3.wav")])
+    assert all(entry['status'] == 'done' for entry in manifest.values()), manifest
+    assert len(client.uploads) == 3
+    assert os.path.exists(tmp_path / "Output" / "Day 2" / "part 3 [Notes].txt")
+    # the worker processes probed the files, so the note takers did not probe them again
+    assert probes == []
+
+def test_rerun_skips_files_that_are_done(tmp_path, client):
+    os.makedirs(tmp_path / "Input")
+    write_wav(str(tmp_path / "Input" / "part 1.wav"), seconds=1.0)
+    make_batch(tmp_path, client=client).run(system_prompt="Take notes.", n_items=3)
+
+    write_wav(str(tmp_path / "Input" / "part 2.wav"), seconds=2.0)
+    batch = make_batch(tmp_path, client=client)
+
+    assert list(batch.pending_files()) == ["part 2.wav"]
+    batch.run(system_prompt="Take notes.", n_items=3)
+    assert len(client.uploads) == 2
+
+def test_estimate_uses_the_note_takers_models_and_prices(tmp_path):
+    os.makedirs(tmp_path / "Input")
+    write_wav(str(tmp_path / "Input" / "part 1.wav"), seconds=120.0)
+
+    estimates = make_batch(tmp_path, transcriber_model="whisper-custom", USD_per_min=0.01).estimate(system_prompt="Take notes.", n_items=5)
+
+    estimate = estimates['files'][str(tmp_path / "Input" / "part 1.wav")]
+    assert estimate['transcription_price'] == pytest.approx(2 * 0.01)
+
+def test_estimate_writes_nothing(tmp_path):
+    os.makedirs(tmp_path / "Input" / "Day 2")
+    write_wav(str(tmp_path / "Input" / "Day 2" / "part 1.wav"), seconds=1.0)
+
+    make_batch(tmp_path).estimate(system_prompt="Take notes.", n_items=5)
+
+    assert not os.path.exists(tmp_path / "Output" / "Day 2")
@@ -0,0 +1,65 @@
+import os
+
+from NoteTaker_Cache import Disk_Cache, hash_file
+
+def entry_mb(cache:Disk_Cache, key:str) -> float:
+    return os.path.getsize(cache._path(key)) / (1024 * 1024)
+
+def test_get_and_set_persist_across_instances(tmp_path):
+    cache = Disk_Cache(str(tmp_path / "Cache"))
+    key = cache.make_key("audio-hash", "whisper-1", {'chunked': True})
+
+    assert cache.get(key) is None
+    cache.set(key, {'text': "Hello."})
+
+    reopened = Disk_Cache(str(tmp_path / "Cache"))
+    assert reopened.get(key) == {'text': "Hello."}
+    assert (reopened.hits, reopened.misses) == (1, 0)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+def test_make_key_ignores_the_order_of_options():
+    assert Disk_Cache.make_key("a", {'x': 1, 'y': 2}) == Disk_Cache.make_key("a", {'y': 2, 'x': 1})
+    assert Disk_Cache.make_key("a", {'x': 1}) != Disk_Cache.make_key("a", {'x': 2})
+    assert Disk_Cache.make_key("a", "b") != Disk_Cache.make_key("ab")
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = Disk_Cache(str(tmp_path / "Cache"))
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.set(key, "x" * 1000)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+
+    # reading "a" makes it the most recently used entry, so "b" is the oldest
+    assert cache.get("a") is not None
+    cache.max_size_mb = 3.5 * entry_mb(cache, "a")
+    cache.set("d", "x" * 1000)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+    assert cache.stats()['entries'] == 3
+    assert cache.stats()['size_mb'] <= cache.max_size_mb
+
+def test_memory_layer_keeps_recent_entries(tmp_path):
+    cache = Disk_Cache(str(tmp_path / "Cache"), max_memory_items=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key.upper())
+    cache.clear()
+    assert cache.get("c") is None
+
+    for key in ["a", "b", "c"]:
+        cache.set(key, key.upper())
+    for key in ["a", "b", "c"]:
+        os.remove(cache._path(key))
+
+    # only the two most recently used entries are still in memory
+    assert cache.get("a") is None
+    assert cache.get("b") == "B"
+    assert cache.get("c") == "C"
+
+def test_hash_file_follows_the_file_contents(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"first take")
+    digest = hash_file(str(path))
+
+    assert hash_file(str(path)) == digest
+    path.write_bytes(b"second take, longer")
+    assert hash_file(str(path)) != digest
@@ -0,0 +1,125 @@
+import os
+import asyncio
+
+from NoteTaker_Cache import Disk_Cache
+from NoteTaker_Checkpoint import NoteTaker_Checkpoint
+import OpenAI_Transcriber
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Summarizer import OpenAI_Summarizer
+from conftest import write_wav
+from test_mp3 import FRAME_S, mp3_bytes
+
+def test_checkpoint_resumes_finished_units(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    checkpoint = NoteTaker_Checkpoint(path)
+    checkpoint.set('segment', "0", {'text': "Hello."})
+    checkpoint.set('completion', "abc", {'summarized_text': "- Hello"})
+
+    resumed = NoteTaker_Checkpoint(path)
+
+    assert resumed.resumed == 2
+    assert resumed.get('segment', "0") == {'text': "Hello."}
+    assert resumed.get('completion', "abc") == {'summarized_text': "- Hello"}
+    assert resumed.get('segment', "1") is None
+
+def test_checkpoint_skips_a_line_cut_short_by_a_crash(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    NoteTaker_Checkpoint(path).set('segment', "0", {'text': "Hello."})
+    with open(path, 'a', encoding="utf-8") as f:
+        f.write('{"kind": "segment", "key": "1", "val')
+
+    resumed = NoteTaker_Checkpoint(path)
+
+    assert resumed.resumed == 1
+    assert resumed.get('segment', "1") is None
+
+def test_cleared_checkpoint_is_not_recreated(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    checkpoint = NoteTaker_Checkpoint(path)
+    checkpoint.set('segment', "0", {'text': "Hello."})
+
+    checkpoint.clear()
+    checkpoint.set('probe', "audio.mp3", {'duration': 1.0})
+
+    assert not os.path.exists(path)
+    assert NoteTaker_Checkpoint(path).resumed == 0
+
+def test_for_job_keys_on_recording_and_options(tmp_path):
+    recording = tmp_path / "audio.mp3"
+    recording.write_bytes(b"first take")
+    checkpoint_dir = str(tmp_path / "Checkpoints")
+
+    path = NoteTaker_Checkpoint.for_job(str(recording), checkpoint_dir, chunked=True).path
+
+    assert NoteTaker_Checkpoint.for_job(str(recording), checkpoint_dir, chunked=True).path == path
+    assert NoteTaker_Checkpoint.for_job(str(recording), checkpoint_dir, chunked=False).path != path
+    recording.write_bytes(b"second take")
+    assert NoteTaker_Checkpoint.for_job(str(recording), checkpoint_dir, chunked=True).path != path
+
+def test_summarizer_resumes_completions_without_calling_the_api(tmp_path, client):
+    path = str(tmp_path / "job.jsonl")
+    transcript = " ".join(f"Sentence number {i} of the meeting." for i in range(200))
+
+    summarizer = OpenAI_Summarizer(transcript, summary_cache=Disk_Cache(str(tmp_path / "Summaries")), client=client)
+    summarizer.checkpoint = NoteTaker_Checkpoint(path)
+    summarizer.summarize_text_hierarchical("Take notes.", n_items=3, chunk_tokens=300, overlap_tokens=20, use_cache=False)
+    n_requests = len(client.chat_requests)
+
+    # a restarted job, without the summary cache
+    resumed = OpenAI_Summarizer(transcript, summary_cache=Disk_Cache(str(tmp_path / "Summaries")), client=client)
+    resumed.checkpoint = NoteTaker_Checkpoint(path)
+    resumed.summarize_text_hierarchical("Take notes.", n_items=3, chunk_tokens=300, overlap_tokens=20, use_cache=False)
+
+    assert n_requests > 2
+    assert len(client.chat_requests) == n_requests
+    assert resumed.summarized_text == summarizer.summarized_text
+    summarizer.get_price()
+    resumed.get_price()
+    assert resumed.output_usage_dict == summarizer.output_usage_dict
+    assert resumed.output_usage_dict['total_tokens'] == 15 * n_requests
+    assert resumed.output_price_dict == summarizer.output_price_dict
+
+def test_take_notes_async_resumes_and_clears_its_checkpoint(tmp_path, async_client, monkeypatch):
+    path = tmp_path / "meeting.mp3"
+    path.write_bytes(mp3_bytes(2000))
+    probe = {'duration': 2000 * FRAME_S, 'sample_rate': 44100, 'channels': 2,
+             'bit_rate': 128000, 'size_bytes': path.stat().st_size,
+             'size_mb': path.stat().st_size / (1024 * 1024), 'method': 'test'}
+    monkeypatch.setattr(OpenAI_Transcriber, "probe_audio", lambda input_dir: probe)
+    checkpoint_dir = tmp_path / "Data" / "Checkpoints"
+
+    def take_notes():
+        note_taker = OpenAI_NoteTaker(str(path),
+                                      transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                                      summary_cache=Disk_Cache(str(tmp_path / "Summaries")))
+        asyncio.run(note_taker.take_notes_async(system_prompt="Take notes.", n_items=3, client=async_client,
+                                                max_chunk_mb=0.25, use_cache=False, checkpoint=True))
+        return note_taker
+
+    # the first run dies after its last request, before the checkpoint is deleted
+    with monkeypatch.context() as crash:
+        crash.setattr(OpenAI_NoteTaker, "_clear_checkpoint", lambda self: None)
+        crashed = take_notes()
+    n_uploads, n_requests = len(async_client.uploads), len(async_client.chat_requests)
+    assert len(os.listdir(checkpoint_dir)) == 1
+
+    resumed = take_notes()
+    resumed.get_total_job_price()
+
+    assert len(async_client.uploads) == n_uploads
+    assert len(async_client.chat_requests) == n_requests
+    assert resumed.Summarizer.summarized_text == crashed.Summarizer.summarized_text
+    assert os.listdir(checkpoint_dir) == []
+
+def test_take_notes_writes_no_checkpoint_unless_asked(tmp_path, client, monkeypatch):
+    write_wav(str(tmp_path / "meeting.wav"), seconds=1.0)
+    note_taker = OpenAI_NoteTaker(str(tmp_path / "meeting.wav"), client=client,
+                                  transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                                  summary_cache=Disk_Cache(str(tmp_path / "Summaries")))
+    checkpoints = []
+    monkeypatch.setattr(NoteTaker_Checkpoint, "set", lambda self, kind, key, value: checkpoints.append(kind))
+
+    note_taker.take_notes(system_prompt="Take notes.", n_items=3)
+    list(note_taker.stream_notes(system_prompt="Take notes.", n_items=3))
+
+    assert checkpoints == []
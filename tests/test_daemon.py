@@ -0,0 +1,99 @@
+import io
+import os
+import json
+import stat
+import time
+import socket
+import threading
+
+import pytest
+
+import OpenAI_Client
+from NoteTaker_Daemon import NoteTaker_Daemon, _Stream, daemon_running
+from conftest import write_wav
+
+def handle(daemon:NoteTaker_Daemon, line:bytes) -> list:
+    output = io.BytesIO()
+    daemon._handle(_Stream(io.BytesIO(line), output))
+    return [json.loads(reply) for reply in output.getvalue().splitlines()]
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = NoteTaker_Daemon(address=str(tmp_path / "notetaker.sock"), max_jobs=1, data_root=str(tmp_path))
+    yield daemon
+    daemon.shutdown()
+
+@pytest.mark.parametrize("job", [None, "Data/Input/QnA.mp3", {'input_path': "Data/Input/QnA.mp3"}, {'n_items': 5}])
+def test_submit_rejects_jobs_without_an_absolute_input_path(daemon, job):
+    with pytest.raises(ValueError):
+        daemon.submit(job)
+    assert daemon.status() == {}
+
+@pytest.mark.parametrize("line", [b"not json\n", b"[1, 2]\n", b'{"job": {}}\n',
+                                  b'{"op": "submit", "job": {"input_path": "QnA.mp3"}}\n'])
+def test_malformed_requests_get_an_error_reply(daemon, line):
+    replies = handle(daemon, line)
+
+    assert [reply['type'] for reply in replies] == ['error']
+
+def test_ping_and_unknown_op(daemon):
+    assert handle(daemon, b'{"op": "ping"}\n') == [{'type': 'pong'}]
+    assert handle(daemon, b'{"op": "status"}\n') == [{'type': 'status', 'jobs': {}}]
+    assert handle(daemon, b'{"op": "restart"}\n')[0]['type'] == 'error'
+
+def run_job(daemon:NoteTaker_Daemon, job:dict) -> list:
+    messages = []
+    daemon.submit(job, listener=messages.append)
+    daemon.shutdown()
+    return messages
+
+def test_jobs_keep_their_data_under_data_root_without_changing_directory(tmp_path, client, monkeypatch):
+    monkeypatch.setattr(OpenAI_Client, "_client", client)
+    write_wav(str(tmp_path / "meeting.wav"), seconds=1.0)
+    data_root = tmp_path / "Root"
+    daemon = NoteTaker_Daemon(address=str(tmp_path / "notetaker.sock"), max_jobs=1, data_root=str(data_root), client=client)
+    daemon.warm_up()
+
+    messages = run_job(daemon, {'input_path': str(tmp_path / "meeting.wav"),
+                                'system_prompt': "Take notes.",
+                                'n_items': 3,
+                                'export_summary_dir': "meeting [Notes]"})
+
+    assert messages[-1]['type'] == 'done', messages[-1]
+    assert daemon.status()[1]['status'] == 'done'
+    assert os.getcwd() == str(tmp_path)
+    assert os.listdir(data_root / "Data" / "Cache" / "Transcripts") != []
+    assert messages[-1]['result']['notes_path'] == str(data_root / "meeting [Notes].txt")
+    assert not os.path.exists(tmp_path / "Data")
+    # like take_notes(), a job is not chunked unless it asks to be, so the recording is uploaded as is
+    assert client.uploads == [os.path.getsize(tmp_path / "meeting.wav")]
+
+def test_requests_without_the_token_are_refused(daemon):
+    daemon._token = "secret"
+
+    assert handle(daemon, b'{"op": "ping"}\n')[0]['type'] == 'error'
+    assert handle(daemon, b'{"op": "ping", "token": "wrong"}\n')[0]['type'] == 'error'
+    assert handle(daemon, b'{"op": "ping", "token": "secret"}\n') == [{'type': 'pong'}]
+
+def test_tcp_daemon_writes_a_private_token(tmp_path, client, monkeypatch):
+    monkeypatch.setattr(OpenAI_Client, "_client", client)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        address = sock.getsockname()
+    token_path = str(tmp_path / "daemon.token")
+    daemon = NoteTaker_Daemon(address=address, max_jobs=1, token_path=token_path, data_root=str(tmp_path), client=client)
+    server = threading.Thread(target=daemon.serve_forever)
+    server.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(token_path) and daemon_running(address, token_path):
+                break
+            time.sleep(0.05)
+
+        assert stat.S_IMODE(os.stat(token_path).st_mode) == 0o600
+        assert daemon_running(address, token_path)
+        assert not daemon_running(address, str(tmp_path / "missing.token"))
+    finally:
+        daemon.shutdown()
+        server.join()
+    assert not os.path.exists(token_path)
@@ -0,0 +1,62 @@
+import pytest
+
+from NoteTaker_Estimator import NoteTaker_Estimator
+from conftest import write_wav
+
+PROMPTS = [{'system_prompt': "Take notes.", 'n_items': 5}]
+
+def test_predicts_transcript_length_from_duration(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_wav(path, seconds=120.0)
+
+    estimates = NoteTaker_Estimator(tokens_per_min=200, tokens_per_item=40).estimate(files=[path], prompts=PROMPTS)
+    estimate = estimates['files'][path]
+
+    assert estimate['transcript_source'] == 'predicted'
+    assert estimate['transcript_tokens'] == 400
+    assert estimate['transcription_price'] == pytest.approx(2 * 0.006)
+    # transcript, system prompt and five bullet points of output
+    assert estimate['summarization_price'] == pytest.approx((400 + 2 + 200) * 0.002 / 1000)
+    assert estimates['total']['total_price'] == pytest.approx(estimate['total_price'])
+
+def test_counts_existing_transcripts_and_does_not_charge_them(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_wav(path, seconds=120.0)
+    (tmp_path / "meeting [Transcribed].txt").write_text("Ten words of an existing transcript for this short meeting.", encoding="utf-8")
+
+    estimate = NoteTaker_Estimator().estimate(files=[path], prompts=PROMPTS, transcript_dir=str(tmp_path))['files'][path]
+
+    assert estimate['transcript_source'] == 'existing'
+    assert estimate['transcript_tokens'] == 10
+    assert estimate['transcription_price'] == 0.0
+
+def test_prices_can_be_overridden(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_wav(path, seconds=60.0)
+
+    estimator = NoteTaker_Estimator(USD_per_min=0.01, USD_per_1k=0.5)
+    estimate = estimator.estimate(files=[path], prompts=[{'system_prompt': None, 'n_items': 1}])['files'][path]
+
+    assert estimate['transcription_price'] == pytest.approx(0.01)
+    assert estimate['summarization_price'] == pytest.approx((200 + 40) * 0.5 / 1000)
+
+def test_wall_clock_spreads_files_over_concurrent_jobs(tmp_path):
+    files = []
+    for i in range(4):
+        files.append(str(tmp_path / f"part {i}.wav"))
+        write_wav(files[-1], seconds=60.0)
+    estimator = NoteTaker_Estimator()
+
+    one_at_a_time = estimator.estimate(files=files, prompts=PROMPTS, max_api_concurrency=1)['total']['wall_clock_s']
+    four_at_a_time = estimator.estimate(files=files, prompts=PROMPTS, max_api_concurrency=4)['total']['wall_clock_s']
+
+    assert four_at_a_time == pytest.approx(one_at_a_time / 4)
+    assert four_at_a_time == pytest.approx(estimator.estimates['files'][files[0]]['wall_clock_s'])
+
+def test_unknown_models_need_a_price():
+    with pytest.raises(ValueError):
+        NoteTaker_Estimator(transcriber_model="unknown")
+    with pytest.raises(ValueError):
+        NoteTaker_Estimator(summarizer_model="unknown")
+
+    assert NoteTaker_Estimator(transcriber_model="unknown", USD_per_min=0.01).USD_per_min == 0.01
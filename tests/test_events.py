@@ -0,0 +1,66 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from NoteTaker_Events import (JSONL_Event_Writer, add_event_handler, bind_context, emit, event_context,
+                              events_enabled, remove_event_handler, stage)
+
+@pytest.fixture
+def events():
+    events = []
+    add_event_handler(events.append)
+    yield events
+    remove_event_handler(events.append)
+
+def test_stage_emits_start_and_end_with_metrics(events):
+    with event_context(file="meeting.mp3"):
+        with stage('upload', model="whisper-1") as metrics:
+            metrics['bytes_uploaded'] = 1024
+
+    start, end = events
+    assert (start['event'], end['event']) == ('stage_start', 'stage_end')
+    assert start['stage_id'] == end['stage_id']
+    assert end['status'] == 'ok' and end['error'] is None
+    assert end['bytes_uploaded'] == 1024 and end['model'] == "whisper-1"
+    assert end['file'] == "meeting.mp3" and end['wall_s'] >= 0.0
+
+def test_stage_records_errors(events):
+    with pytest.raises(ValueError):
+        with stage('summarize'):
+            raise ValueError("bad request")
+
+    assert events[-1]['status'] == 'error'
+    assert "bad request" in events[-1]['error']
+
+def test_nested_stages_and_threads_keep_their_parent(events):
+    def work():
+        emit('chunk_done')
+
+    with event_context(job="batch"):
+        with stage('take_notes'):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda fn: fn(), [bind_context(work)] * 2))
+
+    parent_id = events[0]['stage_id']
+    chunk_events = [event for event in events if event['event'] == 'chunk_done']
+    assert len(chunk_events) == 2
+    assert all(event['parent_id'] == parent_id and event['job'] == "batch" for event in chunk_events)
+
+def test_no_events_without_handlers():
+    assert not events_enabled()
+
+    with stage('upload') as metrics:
+        metrics['bytes_uploaded'] = 1
+
+def test_jsonl_writer(tmp_path):
+    writer = add_event_handler(JSONL_Event_Writer(str(tmp_path / "Events" / "events.jsonl")))
+    try:
+        with stage('probe'):
+            pass
+    finally:
+        remove_event_handler(writer)
+        writer.close()
+
+    with open(tmp_path / "Events" / "events.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)['event'] for line in f] == ['stage_start', 'stage_end']
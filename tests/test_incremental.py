@@ -0,0 +1,108 @@
+import pytest
+
+from NoteTaker_Cache import Disk_Cache
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Summarizer import OpenAI_Summarizer
+from conftest import write_wav
+
+SENTENCES = [f"Speaker {i % 4} said point {i} about topic {i // 10} of the roadmap." for i in range(300)]
+
+def transcript(sentences:list) -> str:
+    return " ".join(sentences)
+
+def edited(index:int, replacement:str = "road map review") -> list:
+    sentences = list(SENTENCES)
+    sentences[index] = sentences[index].replace("roadmap", replacement)
+    return sentences
+
+def test_chunks_cover_the_transcript_within_bounds():
+    summarizer = OpenAI_Summarizer(transcript(SENTENCES), summary_cache=Disk_Cache("Summaries"))
+
+    chunks = summarizer.split_transcript_stable(target_tokens=100, min_tokens=50, max_tokens=200)
+
+    assert " ".join(chunks) == transcript(SENTENCES)
+    assert len(chunks) > 3
+    assert all(len(chunk.split()) <= 200 for chunk in chunks)
+    assert all(len(chunk.split()) >= 50 for chunk in chunks[:-1])
+    assert len(summarizer.chunk_hashes) == len(chunks)
+
+def test_edit_changes_at_most_two_chunks():
+    chunks = OpenAI_Summarizer(transcript(SENTENCES), summary_cache=Disk_Cache("Summaries")).split_transcript_stable(target_tokens=100)
+
+    for index in (0, 150, 299):
+        edited_chunks = OpenAI_Summarizer(transcript(edited(index)), summary_cache=Disk_Cache("Summaries")).split_transcript_stable(target_tokens=100)
+
+        assert len(set(edited_chunks) - set(chunks)) <= 2
+
+def test_forced_cuts_shift_chunks_until_boundaries_fall_back_in_step():
+    def split(sentences:list) -> list:
+        summarizer = OpenAI_Summarizer(transcript(sentences), summary_cache=Disk_Cache("Summaries"))
+        return summarizer.split_transcript_stable(target_tokens=100, min_tokens=80, max_tokens=110)
+    chunks = split(SENTENCES)
+
+    edited_chunks = split(edited(0, replacement="road map review with many more words added to it"))
+
+    # with little room between min_tokens and max_tokens most cuts are forced, so the edit shifts
+    # more than the next chunk, but the later chunks are reused again
+    assert len(set(edited_chunks) - set(chunks)) > 2
+    assert edited_chunks[-20:] == chunks[-20:]
+
+def test_long_sentence_is_split_by_tokens():
+    sentence = " ".join(f"word{i}" for i in range(450)) + "."
+    summarizer = OpenAI_Summarizer(sentence, summary_cache=Disk_Cache("Summaries"))
+
+    chunks = summarizer.split_transcript_stable(target_tokens=100, max_tokens=200)
+
+    assert [len(chunk.split()) for chunk in chunks] == [200, 200, 50]
+
+def test_rejects_inconsistent_bounds():
+    summarizer = OpenAI_Summarizer(transcript(SENTENCES), summary_cache=Disk_Cache("Summaries"))
+
+    with pytest.raises(ValueError):
+        summarizer.split_transcript_stable(target_tokens=100, min_tokens=100)
+
+def test_incremental_run_resummarizes_only_edited_chunks(tmp_path, client):
+    summary_cache = Disk_Cache(str(tmp_path / "Summaries"))
+
+    first = OpenAI_Summarizer(transcript(SENTENCES), summary_cache=summary_cache, client=client)
+    first.summarize_text_incremental("Take notes.", n_items=5, target_tokens=100)
+    n_chunks = first.incremental_report['chunks']
+    assert first.incremental_report['resummarized'] == n_chunks
+    assert len(client.chat_requests) == n_chunks + 1
+
+    client.chat_requests.clear()
+    second = OpenAI_Summarizer(transcript(edited(150)), summary_cache=summary_cache, client=client)
+    second.summarize_text_incremental("Take notes.", n_items=5, target_tokens=100)
+    report = second.incremental_report
+
+    assert 1 <= report['resummarized'] <= 2
+    assert report['reused'] == report['chunks'] - report['resummarized']
+    # the edited chunks and the reduce request
+    assert len(client.chat_requests) == report['resummarized'] + 1
+    assert report['spent_usage']['total_tokens'] == 15 * len(client.chat_requests)
+    assert "road map review" in " ".join(client.chat_requests)
+
+def test_unchanged_transcript_costs_nothing(tmp_path, client):
+    summary_cache = Disk_Cache(str(tmp_path / "Summaries"))
+    OpenAI_Summarizer(transcript(SENTENCES), summary_cache=summary_cache, client=client).summarize_text_incremental("Take notes.", target_tokens=100)
+    client.chat_requests.clear()
+
+    rerun = OpenAI_Summarizer(transcript(SENTENCES), summary_cache=summary_cache, client=client)
+    rerun.summarize_text_incremental("Take notes.", target_tokens=100)
+
+    assert client.chat_requests == []
+    assert rerun.incremental_report['resummarized'] == 0
+    assert rerun.incremental_report['spent_usage']['total_tokens'] == 0
+
+def test_take_notes_incremental_honours_use_cache(tmp_path, client):
+    write_wav(str(tmp_path / "meeting.wav"), seconds=1.0)
+    summary_cache = Disk_Cache(str(tmp_path / "Summaries"))
+    for _ in range(2):
+        note_taker = OpenAI_NoteTaker(str(tmp_path / "meeting.wav"), client=client,
+                                      transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                                      summary_cache=summary_cache)
+        note_taker.take_notes(system_prompt="Take notes.", n_items=3, incremental=True, use_cache=False)
+
+    # one chunk and the reduce request, sent again on the second run
+    assert len(client.chat_requests) == 4
+    assert note_taker.Summarizer.incremental_report['reused'] == 0
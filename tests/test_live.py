@@ -0,0 +1,60 @@
+import pytest
+from pydub import AudioSegment
+
+from NoteTaker_Cache import Disk_Cache
+from NoteTaker_Live import NoteTaker_Live
+from conftest import write_wav
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """
+    Records the start_second of every decode, and decodes the WAV test recordings without ffmpeg.
+    """
+    decodes = []
+    from_file = AudioSegment.from_file
+    def record(path, start_second=None, **kwargs):
+        decodes.append(start_second)
+        return from_file(path, format="wav", start_second=start_second)
+    monkeypatch.setattr(AudioSegment, "from_file", record)
+    return decodes
+
+def make_live(tmp_path, client, name:str = "meeting.wav") -> NoteTaker_Live:
+    return NoteTaker_Live(input_dir=str(tmp_path / name), client=client,
+                          transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                          summary_cache=Disk_Cache(str(tmp_path / "Summaries")))
+
+def test_input_file_is_not_kept_open(tmp_path, client):
+    write_wav(str(tmp_path / "meeting.wav"), seconds=1.0)
+
+    live = make_live(tmp_path, client)
+
+    assert live.audio_file.closed and live.Transcriber.audio_file.closed
+
+def test_wav_reads_only_the_new_audio(tmp_path, client):
+    write_wav(str(tmp_path / "meeting.wav"), seconds=10.0)
+    live = make_live(tmp_path, client)
+    assert len(live._read_new_audio()) == 10000
+
+    write_wav(str(tmp_path / "meeting.wav"), seconds=25.0)
+    live.processed_s = 8.0
+
+    assert len(live._read_new_audio()) == 17000
+
+def test_other_formats_decode_only_the_appended_audio(tmp_path, client, decodes):
+    # a WAV file under another name, routed to the ffmpeg path as if it were compressed
+    write_wav(str(tmp_path / "meeting.rec"), seconds=10.0)
+    live = make_live(tmp_path, client, name="meeting.rec")
+    live.Transcriber.filetype = "audio/ogg"
+
+    assert len(live._read_new_audio()) == 10000
+
+    write_wav(str(tmp_path / "meeting.rec"), seconds=25.0)
+    assert len(live._read_new_audio()) == 25000
+
+    # a segment up to 12 s was transcribed
+    write_wav(str(tmp_path / "meeting.rec"), seconds=40.0)
+    live.processed_s = 12.0
+    assert len(live._read_new_audio()) == 28000
+
+    # only the guard_s seconds before the previous end of the file are decoded again
+    assert decodes == [0.0, 8.0, 23.0]
@@ -0,0 +1,135 @@
+import io
+import asyncio
+
+import pytest
+
+from NoteTaker_MP3 import Memory_File, frame_index, map_file, parse_frame_header, split_frames
+from NoteTaker_Cache import Disk_Cache
+
+# MPEG-1 layer III, 128 kbps, 44.1 kHz: 417 bytes per frame, or 418 with the padding bit set
+HEADER = 0xFFFB9000
+FRAME_BYTES = 417
+FRAME_S = 1152 / 44100
+
+def frame(padding:bool = False) -> bytes:
+    header = HEADER | (0x200 if padding else 0)
+    length = FRAME_BYTES + (1 if padding else 0)
+    return header.to_bytes(4, 'big') + bytes(length - 4)
+
+def id3v2_tag(size:int) -> bytes:
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x03\x00\x00" + syncsafe + bytes(size)
+
+def mp3_bytes(n_frames:int) -> bytes:
+    return id3v2_tag(64) + b"".join(frame(padding=i % 3 == 0) for i in range(n_frames))
+
+def test_parse_frame_header():
+    assert parse_frame_header(HEADER) == (417, 1152, 44100)
+    assert parse_frame_header(HEADER | 0x200) == (418, 1152, 44100)
+    # MPEG-2 layer III, 64 kbps, 22.05 kHz
+    assert parse_frame_header(0xFFF38000) == (208, 576, 22050)
+
+@pytest.mark.parametrize("header", [0x00000000,   # no frame sync
+                                    0xFFFB0000,   # free-format bitrate
+                                    0xFFFBF000,   # bad bitrate
+                                    0xFFFB9C00,   # reserved sample rate
+                                    0xFFE99000])  # reserved layer
+def test_parse_frame_header_rejects_invalid_headers(header):
+    assert parse_frame_header(header) is None
+
+def test_frame_index_skips_tags_header_frame_and_junk():
+    xing = bytearray(frame())
+    xing[36:40] = b"Xing"
+    audio = [frame(padding=i % 2 == 0) for i in range(10)]
+    # junk with a stray frame sync in it, which is not followed by a valid frame
+    junk = b"junk" + HEADER.to_bytes(4, 'big') + b"junk"
+    data = id3v2_tag(100) + bytes(xing) + b"".join(audio[:5]) + junk + b"".join(audio[5:]) + b"TAG" + bytes(125)
+
+    index = frame_index(data)
+
+    first = 110 + len(xing)
+    assert len(index['offsets']) == 10
+    assert index['offsets'][0] == first
+    assert index['offsets'][5] == first + sum(map(len, audio[:5])) + len(junk)
+    assert (index['ends'] - index['offsets']).tolist() == [len(f) for f in audio]
+    assert index['starts_s'][0] == 0.0
+    assert index['ends_s'][-1] == pytest.approx(10 * FRAME_S)
+    assert index['starts_s'][1:] == pytest.approx(index['ends_s'][:-1])
+
+def test_frame_index_of_data_without_frames():
+    assert len(frame_index(b"not an mp3 file" * 100)['offsets']) == 0
+    assert len(frame_index(b"")['offsets']) == 0
+
+def test_split_frames_covers_every_frame_once():
+    index = frame_index(mp3_bytes(100))
+
+    chunks = split_frames(index, max_chunk_bytes=10 * FRAME_BYTES)
+
+    assert chunks[0][0] == index['offsets'][0]
+    assert chunks[-1][1] == index['ends'][-1]
+    for (_, end_byte, _, end_s), (next_start_byte, _, next_start_s, _) in zip(chunks, chunks[1:]):
+        assert end_byte == next_start_byte
+        assert end_s == pytest.approx(next_start_s)
+    assert all(end_byte - start_byte <= 10 * FRAME_BYTES for start_byte, end_byte, _, _ in chunks)
+    assert chunks[-1][3] == pytest.approx(100 * FRAME_S)
+
+def test_split_frames_limits_duration():
+    index = frame_index(mp3_bytes(100))
+
+    chunks = split_frames(index, max_chunk_bytes=10**9, max_chunk_s=1.0)
+
+    assert len(chunks) == 3
+    assert all(end_s - start_s <= 1.0 for _, _, start_s, end_s in chunks)
+
+def test_split_frames_keeps_oversized_frames():
+    index = frame_index(mp3_bytes(5))
+
+    assert len(split_frames(index, max_chunk_bytes=100)) == 5
+
+def test_memory_file_reads_and_seeks():
+    audio_file = Memory_File(memoryview(b"0123456789"), name="chunk_0.mp3")
+
+    assert audio_file.read(4) == b"0123"
+    assert audio_file.seek(0, io.SEEK_END) == 10
+    assert audio_file.tell() == 10
+    assert audio_file.read() == b""
+    audio_file.seek(-3, io.SEEK_CUR)
+    assert audio_file.read() == b"789"
+    audio_file.seek(0)
+    buffer = bytearray(6)
+    assert audio_file.readinto(buffer) == 6
+    assert bytes(buffer) == b"012345"
+
+def test_map_file(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(mp3_bytes(20))
+    empty_path = tmp_path / "empty.mp3"
+    empty_path.write_bytes(b"")
+
+    assert bytes(map_file(str(path))) == mp3_bytes(20)
+    assert len(map_file(str(empty_path))) == 0
+
+def test_take_notes_async_uploads_mp3_chunks(tmp_path, async_client, monkeypatch):
+    import OpenAI_Transcriber
+    from OpenAI_NoteTaker import OpenAI_NoteTaker
+
+    path = tmp_path / "meeting.mp3"
+    path.write_bytes(mp3_bytes(2000))
+    # ffprobe is not needed to read the duration of the synthetic file
+    probe = {'duration': 2000 * FRAME_S, 'sample_rate': 44100, 'channels': 2,
+             'bit_rate': 128000, 'size_bytes': path.stat().st_size,
+             'size_mb': path.stat().st_size / (1024 * 1024), 'method': 'test'}
+    monkeypatch.setattr(OpenAI_Transcriber, "probe_audio", lambda input_dir: probe)
+    note_taker = OpenAI_NoteTaker(str(path),
+                                  transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                                  summary_cache=Disk_Cache(str(tmp_path / "Summaries")))
+
+    asyncio.run(note_taker.take_notes_async(system_prompt="Take notes.", n_items=3, client=async_client,
+                                            max_chunk_mb=0.25, use_cache=False))
+
+    chunk_bytes = int(0.25 * 1024 * 1024)
+    assert len(async_client.uploads) > 1
+    assert all(size <= chunk_bytes for size in async_client.uploads)
+    assert sum(async_client.uploads) == len(mp3_bytes(2000)) - 74
+    assert len(note_taker.Transcriber.transcript_segments) == len(async_client.uploads)
+    assert note_taker.Summarizer.summarized_text == f"- note {len(async_client.uploads) + 1}"
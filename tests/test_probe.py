@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import NoteTaker_Probe
+from NoteTaker_Probe import probe_audio
+from conftest import write_wav
+
+def test_probes_wav_header(tmp_path):
+    path = str(tmp_path / "audio.wav")
+    write_wav(path, seconds=2.5, rate=16000, channels=2)
+
+    probe = probe_audio(path)
+
+    assert probe['method'] == 'wave'
+    assert probe['duration'] == pytest.approx(2.5)
+    assert (probe['sample_rate'], probe['channels'], probe['bit_rate']) == (16000, 2, 16000 * 2 * 16)
+    assert probe['size_bytes'] == os.path.getsize(path)
+
+def test_probe_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "audio.wav")
+    write_wav(path, seconds=1.0)
+    probes = []
+    probe_wave = NoteTaker_Probe._probe_wave
+    monkeypatch.setattr(NoteTaker_Probe, "_probe_wave", lambda path: probes.append(path) or probe_wave(path))
+
+    probe_audio(path)
+    probe_audio(path)
+    assert len(probes) == 1
+
+    write_wav(path, seconds=3.0)
+    assert probe_audio(path)['duration'] == pytest.approx(3.0)
+    assert len(probes) == 2
+
+def test_returned_probe_is_a_copy(tmp_path):
+    path = str(tmp_path / "audio.wav")
+    write_wav(path, seconds=1.0)
+
+    probe_audio(path)['duration'] = 0.0
+
+    assert probe_audio(path)['duration'] == pytest.approx(1.0)
@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+import NoteTaker_RateLimiter
+from NoteTaker_RateLimiter import Rate_Limiter, configure_rate_limit, get_rate_limiter
+
+class Fake_Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds:float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Fake_Clock()
+    monkeypatch.setattr(NoteTaker_RateLimiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(NoteTaker_RateLimiter.time, "sleep", clock.sleep)
+    return clock
+
+def rate_limit_error(retry_after:str = None) -> openai.RateLimitError:
+    headers = {'retry-after': retry_after} if retry_after is not None else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    return openai.RateLimitError("Rate limit reached.", response=response, body=None)
+
+def test_burst_then_requests_per_minute(clock):
+    limiter = Rate_Limiter(rpm=60)
+
+    for _ in range(60):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+    assert limiter.waited_s == pytest.approx(1.0)
+
+def test_tokens_per_minute(clock):
+    limiter = Rate_Limiter(tpm=6000)
+
+    limiter.acquire(tokens=5000)
+    limiter.acquire(tokens=3000)
+
+    # 2000 tokens are missing, and the bucket refills at 100 tokens per second
+    assert sum(clock.sleeps) == pytest.approx(20.0)
+
+def test_call_larger_than_the_token_limit_is_not_blocked_forever(clock):
+    limiter = Rate_Limiter(tpm=1000)
+
+    limiter.acquire(tokens=5000)
+    limiter.acquire(tokens=5000)
+
+    assert sum(clock.sleeps) == pytest.approx(60.0)
+
+def test_unlimited_limiter_never_waits(clock):
+    limiter = Rate_Limiter()
+
+    for _ in range(1000):
+        limiter.acquire(tokens=10**6)
+
+    assert clock.sleeps == []
+
+def test_call_retries_retryable_errors(clock):
+    limiter = Rate_Limiter(max_retries=3)
+    errors = [rate_limit_error(retry_after="2"), rate_limit_error(retry_after="120")]
+
+    def fn(x):
+        if errors:
+            raise errors.pop(0)
+        return x * 2
+
+    assert limiter.call(fn, 21) == 42
+    assert limiter.retries == 2
+    # Retry-After is followed, up to max_delay_s
+    assert clock.sleeps == [2.0, 60.0]
+
+def test_call_gives_up_after_max_retries(clock):
+    limiter = Rate_Limiter(max_retries=2, base_delay_s=1.0)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise rate_limit_error()
+
+    with pytest.raises(openai.RateLimitError):
+        limiter.call(fn)
+    assert len(calls) == 3
+    # full-jitter backoff, doubling on every retry
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 2.0
+
+def test_call_does_not_retry_other_errors(clock):
+    limiter = Rate_Limiter()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call(fn)
+    assert len(calls) == 1
+    assert limiter.retries == 0
+
+def test_call_async_retries_retryable_errors():
+    limiter = Rate_Limiter(rpm=60, max_retries=3)
+    errors = [rate_limit_error(retry_after="0")]
+
+    async def fn(x):
+        if errors:
+            raise errors.pop(0)
+        return x * 2
+
+    assert asyncio.run(limiter.call_async(fn, 21)) == 42
+    assert limiter.retries == 1
+
+def test_rate_limiters_are_shared_per_model(monkeypatch):
+    monkeypatch.setattr(NoteTaker_RateLimiter, "_rate_limiters", {})
+    limiter = get_rate_limiter("test-model")
+    assert get_rate_limiter("test-model") is limiter
+
+    configured = configure_rate_limit("test-model", rpm=10, tpm=1000, max_retries=1)
+    assert get_rate_limiter("test-model") is configured
+    assert (configured.rpm, configured.tpm, configured.max_retries) == (10, 1000, 1)
@@ -0,0 +1,68 @@
+import pytest
+
+from NoteTaker_Segments import chunk_segments, load_segment_archive, load_segments, segments_to_table, write_segments
+from OpenAI_Summarizer import OpenAI_Summarizer
+from OpenAI_Transcriber import OpenAI_Transcriber
+from NoteTaker_Cache import Disk_Cache
+from conftest import write_wav
+
+def table_of(texts:list):
+    segments = [{'start': 10.0 * i, 'end': 10.0 * (i + 1), 'text': text} for i, text in enumerate(texts)]
+    return segments_to_table(segments, [len(text.split()) for text in texts])
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_write_and_load_segments(tmp_path, extension):
+    table = table_of(["Hello and welcome.", "Today we talk about data pipelines."])
+
+    path = write_segments(table, str(tmp_path / "Segments" / f"meeting{extension}"))
+    loaded = load_segments(path)
+
+    assert loaded.equals(table)
+    assert loaded.column('tokens').to_pylist() == [3, 6]
+    assert loaded.column('start').to_pylist() == [0.0, 10.0]
+
+def test_load_segment_archive(tmp_path):
+    write_segments(table_of(["First meeting."]), str(tmp_path / "Archive" / "first.arrow"))
+    write_segments(table_of(["Second meeting.", "Still the second."]), str(tmp_path / "Archive" / "2023" / "second.parquet"))
+
+    archive = load_segment_archive(str(tmp_path / "Archive"))
+
+    assert archive.num_rows == 3
+    assert sorted(archive.column('text').to_pylist()) == ["First meeting.", "Second meeting.", "Still the second."]
+    assert {source.endswith(("first.arrow", "second.parquet")) for source in archive.column('source').to_pylist()} == {True}
+    assert load_segment_archive(str(tmp_path / "Empty")).num_rows == 0
+
+def test_chunk_segments_respects_the_token_budget_and_overlap():
+    texts = [f"segment {i} has five tokens" for i in range(20)]
+
+    chunks = chunk_segments(table_of(texts), chunk_tokens=25, overlap_tokens=10)
+
+    assert all(len(chunk.split()) <= 25 for chunk in chunks)
+    assert chunks[0] == " ".join(texts[:5])
+    # each chunk starts with the last two segments of the previous one
+    assert chunks[1].startswith(" ".join(texts[3:5]))
+    assert chunks[-1].endswith(texts[-1])
+
+def test_chunk_segments_keeps_long_segments_whole():
+    texts = ["short one", " ".join(["long"] * 40), "short two"]
+
+    assert chunk_segments(table_of(texts), chunk_tokens=10, overlap_tokens=2) == texts
+
+def test_chunk_segments_rejects_overlap_larger_than_chunks():
+    with pytest.raises(ValueError):
+        chunk_segments(table_of(["text"]), chunk_tokens=10, overlap_tokens=10)
+
+def test_transcriber_saves_segments_that_the_summarizer_chunks(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_wav(path, seconds=30.0)
+    transcriber = OpenAI_Transcriber(path, transcript_cache=Disk_Cache(str(tmp_path / "Cache")))
+    transcriber.transcript_text = "Hello and welcome. Today we talk about data pipelines."
+    transcriber.timed_segments = [{'start': 0.0, 'end': 2.5, 'text': "Hello and welcome."},
+                                  {'start': 2.5, 'end': 6.0, 'text': "Today we talk about data pipelines."}]
+
+    transcriber.save_segments(str(tmp_path / "meeting [Segments]"))
+    summarizer = OpenAI_Summarizer("", summary_cache=Disk_Cache(str(tmp_path / "Cache")))
+    summarizer.set_segments(transcriber.filepath_segments)
+
+    assert summarizer.transcript_text == transcriber.transcript_text
+    assert summarizer.split_transcript(chunk_tokens=5, overlap_tokens=1) == ["Hello and welcome.", "Today we talk about data pipelines."]
@@ -0,0 +1,73 @@
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from NoteTaker_Silence import compress_silences, frame_levels, to_original_time
+from OpenAI_Transcriber import OpenAI_Transcriber
+
+RATE = 16000
+
+def tone(seconds:float) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+def silence(seconds:float) -> np.ndarray:
+    return np.zeros(int(RATE * seconds), dtype=np.int16)
+
+def test_frame_levels():
+    levels = frame_levels(np.concatenate((tone(0.3), silence(0.3))), RATE, frame_ms=30)
+
+    assert len(levels) == 20
+    assert (levels[:10] > -20).all()
+    assert (levels[10:] < -90).all()
+
+def test_long_silences_are_shortened_and_short_ones_kept():
+    samples = np.concatenate((tone(1.2), silence(3.0), tone(1.2), silence(0.6), tone(1.2)))
+
+    kept, offset_map = compress_silences(samples, RATE, min_silence_s=1.0, keep_silence_s=0.3)
+
+    assert len(kept) / RATE == pytest.approx(1.2 + 0.3 + 1.2 + 0.6 + 1.2, abs=0.03)
+    assert len(offset_map) == 2
+    assert offset_map[0][:2] == (0.0, 0.0)
+    assert sum(length for _, _, length in offset_map) == pytest.approx(len(kept) / RATE)
+
+def test_zero_keep_drops_long_silences():
+    samples = np.concatenate((tone(0.9), silence(2.1), tone(0.9)))
+
+    kept, _ = compress_silences(samples, RATE, min_silence_s=1.0, keep_silence_s=0.0)
+
+    assert len(kept) / RATE == pytest.approx(1.8, abs=0.03)
+
+def test_audio_without_long_silences_is_kept_whole():
+    samples = np.concatenate((tone(1.0), silence(0.5), tone(1.0)))
+
+    kept, offset_map = compress_silences(samples, RATE)
+
+    assert np.array_equal(kept, samples)
+    assert offset_map == [(0.0, 0.0, len(samples) / RATE)]
+
+def test_to_original_time_maps_across_removed_silences():
+    samples = np.concatenate((tone(1.2), silence(3.0), tone(1.2)))
+    kept, offset_map = compress_silences(samples, RATE, min_silence_s=1.0, keep_silence_s=0.0)
+    second_start = offset_map[1][0]
+
+    assert to_original_time(0.5, offset_map) == pytest.approx(0.5)
+    assert to_original_time(second_start + 0.5, offset_map) == pytest.approx(4.2 + 0.5, abs=0.03)
+    assert to_original_time(3.0, []) == 3.0
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="the trimmed audio is encoded with ffmpeg")
+def test_trim_silence_reports_the_removed_seconds_and_dollars(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(np.concatenate((tone(1.2), silence(60.0), tone(1.2))).tobytes())
+
+    report = OpenAI_Transcriber(path, USD_per_min=0.006).trim_silence(min_silence_s=1.0, keep_silence_s=0.0)
+
+    assert report['removed_s'] == pytest.approx(60.0, abs=0.03)
+    assert report['kept_s'] == pytest.approx(2.4, abs=0.03)
+    assert report['removed_usd'] == pytest.approx(0.006, rel=0.01)
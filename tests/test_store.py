@@ -0,0 +1,80 @@
+import pytest
+
+from NoteTaker_Cache import Disk_Cache
+from NoteTaker_Store import NoteTaker_Store
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Summarizer import OpenAI_Summarizer
+from OpenAI_Transcriber import OpenAI_Transcriber
+from conftest import write_wav
+
+def finished_note_taker(tmp_path, name:str, segments:list, summary:str, n_items:int = 3, seconds:float = 60.0) -> OpenAI_NoteTaker:
+    """
+    Returns a note taker in the state take_notes() leaves it in, without calling the API.
+    """
+    path = str(tmp_path / name)
+    write_wav(path, seconds=seconds)
+    cache = Disk_Cache(str(tmp_path / "Cache"))
+
+    note_taker = OpenAI_NoteTaker(path, transcript_cache=cache, summary_cache=cache)
+    note_taker.system_prompt, note_taker.n_items = "Take notes.", n_items
+    note_taker.Transcriber = OpenAI_Transcriber(path, transcript_cache=cache)
+    note_taker.Transcriber.transcript_segments = [{'start': 20.0 * i, 'end': 20.0 * (i + 1), 'text': text}
+                                                  for i, text in enumerate(segments)]
+    note_taker.Transcriber.transcript_text = " ".join(segments)
+    note_taker.Summarizer = OpenAI_Summarizer(note_taker.Transcriber.transcript_text, summary_cache=cache)
+    note_taker.Summarizer.summarized_text = summary
+    note_taker.Summarizer.output_usage_dict = {'prompt_tokens': 900, 'completion_tokens': 100, 'total_tokens': 1000}
+    return note_taker
+
+@pytest.fixture
+def store(tmp_path):
+    with NoteTaker_Store(str(tmp_path / "Store" / "notetaker.db")) as store:
+        yield store
+
+def test_add_session_records_segments_summary_and_cost(tmp_path, store):
+    note_taker = finished_note_taker(tmp_path, "mentorship.wav",
+                                     ["Welcome to the mentorship session.", "Data engineers build pipelines."],
+                                     "- Data engineering careers")
+
+    session = store.get_session(store.add_session(note_taker, notes_path="notes.txt"))
+
+    assert [segment['text'] for segment in session['segments']] == ["Welcome to the mentorship session.",
+                                                                    "Data engineers build pipelines."]
+    assert session['segments'][1]['start_s'] == 20.0
+    assert session['summary'] == "- Data engineering careers"
+    assert session['duration_s'] == pytest.approx(60.0)
+    assert session['transcription_usd'] == pytest.approx(0.006)
+    assert session['summarization_usd'] == pytest.approx(0.002)
+    assert session['usage']['total_tokens'] == 1000
+    assert session['notes_path'] == "notes.txt"
+
+def test_search_matches_stems_across_sessions(tmp_path, store):
+    store.add_session(finished_note_taker(tmp_path, "first.wav", ["We talked about the budget.", "Engineers hired."], "- Budget"))
+    second_id = store.add_session(finished_note_taker(tmp_path, "second.wav", ["Engineering interviews start soon."], "- Hiring", seconds=30.0))
+
+    hits = store.search("engineering")
+
+    assert len(hits) == 2
+    assert {hit['text'] for hit in hits} == {"Engineers hired.", "Engineering interviews start soon."}
+    assert [hit['text'] for hit in store.search("engineering", session_id=second_id)] == ["Engineering interviews start soon."]
+    assert store.search("interviews")[0]['snippet'] == "Engineering [interviews] start soon."
+    assert [hit['text'] for hit in store.search_summaries("hiring")] == ["- Hiring"]
+
+def test_rerun_replaces_the_previous_session(tmp_path, store):
+    store.add_session(finished_note_taker(tmp_path, "meeting.wav", ["First take."], "- First"))
+    session_id = store.add_session(finished_note_taker(tmp_path, "meeting.wav", ["Second take."], "- Second"))
+    store.add_session(finished_note_taker(tmp_path, "meeting.wav", ["Other notes."], "- Other", n_items=10))
+
+    assert len(store.list_sessions()) == 2
+    assert store.search("first") == []
+    assert store.get_session(session_id)['summary'] == "- Second"
+
+def test_delete_session_removes_it_from_searches(tmp_path, store):
+    session_id = store.add_session(finished_note_taker(tmp_path, "meeting.wav", ["A forgettable remark."], "- Nothing"))
+
+    store.delete_session(session_id)
+
+    assert store.search("forgettable") == []
+    assert store.search_summaries("nothing") == []
+    with pytest.raises(KeyError):
+        store.get_session(session_id)
@@ -0,0 +1,26 @@
+from OpenAI_Summarizer import OpenAI_Summarizer, count_tokens_batch, get_encoding
+
+def test_count_tokens_batch_keeps_the_order_of_texts():
+    texts = ["one", "two words", "", "three more words"]
+
+    assert count_tokens_batch(texts) == [1, 2, 0, 3]
+
+def test_count_tokens_batch_only_encodes_new_texts(fake_encoding, monkeypatch):
+    encoded = []
+    encode_batch = fake_encoding.encode_batch
+    monkeypatch.setattr(fake_encoding, "encode_batch", lambda texts, num_threads=8: encoded.extend(texts) or encode_batch(texts))
+    get_encoding.cache_clear()
+
+    count_tokens_batch(["a counted text", "another counted text"])
+    assert count_tokens_batch(["a counted text", "a new text"]) == [3, 3]
+
+    assert encoded == ["a counted text", "another counted text", "a new text"]
+
+def test_summarizers_share_one_encoding():
+    get_encoding.cache_clear()
+    first = OpenAI_Summarizer("The first transcript.")
+    second = OpenAI_Summarizer("The second transcript, which is longer.")
+
+    assert first.num_tokens_from_input_string() == 3
+    assert second.num_tokens_from_input_string() == 6
+    assert first.input_encoding is second.input_encoding
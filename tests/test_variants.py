@@ -0,0 +1,69 @@
+import pytest
+
+from NoteTaker_Cache import Disk_Cache
+from OpenAI_NoteTaker import OpenAI_NoteTaker
+from OpenAI_Summarizer import OpenAI_Summarizer
+from conftest import write_wav
+
+TRANSCRIPT = " ".join(f"Speaker {i % 3} said point {i} about the launch plan." for i in range(120))
+
+VARIANTS = [{'system_prompt': "Take notes.", 'n_items': 5},
+            {'system_prompt': "Take notes.", 'n_items': 10},
+            {'system_prompt': "Take notes for a mentor.", 'n_items': 5, 'name': "mentor"}]
+
+def test_variants_share_one_map_pass(tmp_path, client):
+    summarizer = OpenAI_Summarizer(TRANSCRIPT, summary_cache=Disk_Cache(str(tmp_path / "Summaries")), client=client)
+
+    notes = summarizer.summarize_variants(VARIANTS, target_tokens=100)
+
+    n_chunks = len(summarizer.transcript_chunks)
+    assert n_chunks > 1
+    # one request per chunk, then one reduce request per variant over the partial notes only
+    assert len(client.chat_requests) == n_chunks + len(VARIANTS)
+    reduce_requests = client.chat_requests[n_chunks:]
+    assert all("launch plan" not in request for request in reduce_requests)
+    assert sorted("10 key bullet points" in request for request in reduce_requests) == [False, False, True]
+
+    assert list(notes) == ["5 points", "10 points", "mentor"]
+    assert summarizer.summarized_text == notes["5 points"]
+    assert summarizer.phase_usage_dict['map']['total_tokens'] == 15 * n_chunks
+    assert summarizer.phase_usage_dict['reduce']['total_tokens'] == 15 * len(VARIANTS)
+    assert summarizer.variant_usage_dict["mentor"]['total_tokens'] == 15
+
+def test_new_variant_reuses_the_cached_map_pass(tmp_path, client):
+    summary_cache = Disk_Cache(str(tmp_path / "Summaries"))
+    OpenAI_Summarizer(TRANSCRIPT, summary_cache=summary_cache, client=client).summarize_variants(VARIANTS[:1], target_tokens=100)
+    client.chat_requests.clear()
+
+    OpenAI_Summarizer(TRANSCRIPT, summary_cache=summary_cache, client=client).summarize_variants(VARIANTS, target_tokens=100)
+
+    # only the two new variants are requested
+    assert len(client.chat_requests) == 2
+
+def test_save_variants_writes_one_file_per_variant(tmp_path, client):
+    summarizer = OpenAI_Summarizer(TRANSCRIPT, summary_cache=Disk_Cache(str(tmp_path / "Summaries")), client=client)
+    notes = summarizer.summarize_variants(VARIANTS, target_tokens=100)
+
+    filepaths = summarizer.save_variants(export_dir=str(tmp_path / "QnA [Notes]"))
+
+    assert filepaths["mentor"] == str(tmp_path / "QnA [Notes] (mentor).txt")
+    assert all(open(filepaths[name], encoding="utf-8").read() == notes[name] for name in notes)
+
+def test_variant_names_must_be_unique(client):
+    summarizer = OpenAI_Summarizer(TRANSCRIPT, summary_cache=Disk_Cache("Summaries"), client=client)
+
+    with pytest.raises(ValueError):
+        summarizer.summarize_variants([{'system_prompt': "Take notes.", 'n_items': 5},
+                                       {'system_prompt': "Take other notes.", 'n_items': 5}])
+
+def test_empty_variants_are_rejected_before_transcribing(tmp_path, client):
+    write_wav(str(tmp_path / "meeting.wav"), seconds=1.0)
+    note_taker = OpenAI_NoteTaker(str(tmp_path / "meeting.wav"), client=client,
+                                  transcript_cache=Disk_Cache(str(tmp_path / "Transcripts")),
+                                  summary_cache=Disk_Cache(str(tmp_path / "Summaries")))
+
+    with pytest.raises(ValueError):
+        note_taker.take_notes_variants([])
+    with pytest.raises(ValueError):
+        OpenAI_Summarizer(TRANSCRIPT, summary_cache=Disk_Cache("Summaries"), client=client).summarize_variants([])
+    assert client.uploads == []